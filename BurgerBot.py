@@ -1,11 +1,28 @@
 # -*- coding: utf-8 -*-
+import argparse
 import os
 import sys
 import json
-import sqlite3
-from openai import OpenAI
+import textwrap
+import time
 from dotenv import load_dotenv
+from openai_client import get_async_openai_client, get_openai_client
 from order_formatter import OrderFormatter
+from menu_pricing import format_price
+from batch_runner import add_batch_arguments, run_batch_cli
+from history_compactor import HistoryCompactor
+from prompt_cache import prompt_cache_stats
+from metrics import TurnMetrics
+from order_models import BurgerComboOrder, BurgerSetOrder, ChickenPackOrder, OrderList, SingleOrder
+from order_parser import OrderBlockParser, register_orders
+from order_stream import OrderTagSplitter
+from menu_db import get_db_path, get_menu_db_pool
+from menu_snapshot import (
+    FEW_SHOT_PATH,
+    ORDER_FORM_PATH,
+    get_menu_snapshot,
+    read_prompt_file,
+)
 
 # Windows에서 UTF-8 출력 설정
 if sys.platform == "win32":
@@ -15,49 +32,69 @@ if sys.platform == "win32":
 
 load_dotenv()
 
-class BurgerBot:
-    def __init__(self, system_prompt=None):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        self.conversation_history = []
-        self.order_list = []
-        self.db_connection = None
-        self.order_formatter = OrderFormatter()
-        self.connect_to_local_db()
+# 모든 세션이 공유하는 시스템 프롬프트 원본
+# - 바이트가 하나라도 바뀌면 OpenAI 프롬프트 캐시(접두사 일치)가 깨지므로 메서드 밖에서 들여쓰기를 정리해 둠
+# - 항상 같은 부분(지시문 → 주문서 → 예시)을 앞에, 메뉴 버전마다 바뀌는 메뉴 목록을 맨 뒤에 둠
+SYSTEM_PROMPT_TEMPLATE = textwrap.dedent("""\
+    당신은 Burger House(버거하우스)에서 주문을 받는 봇, 이름은 '버거하우스'입니다.
+    당신의 역할은 버거하우스에 온 손님을 친절하게 맞이하고, 그들의 주문을 정확하게 받거나 고객에게 필요한 카페, 메뉴 정보를 제공하는 것입니다. 금액은 모든 상품이 등록된 후에 표기가 가능합니다.
+    그 이전에 가격을 물어본다면, 메뉴 선택이 완료된 후에 가격을 알려줄 수 있다고 답하세요.
 
-        menu_section = self.get_menuinfo_query()
-        order_form = self.get_order_form()
-        sample_data = self.get_few_shot()
-        
-        default_system_prompt = f"""당신은 Burger House(버거하우스)에서 주문을 받는 봇, 이름은 '버거하우스'입니다.
-        당신의 역할은 버거하우스에 온 손님을 친절하게 맞이하고, 그들의 주문을 정확하게 받거나 고객에게 필요한 카페, 메뉴 정보를 제공하는 것입니다. 금액은 모든 상품이 등록된 후에 표기가 가능합니다.
-        그 이전에 가격을 물어본다면, 메뉴 선택이 완료된 후에 가격을 알려줄 수 있다고 답하세요.
+    [**주문서 양식**]
+    {order_form}
+    [**주문서 양식끝**]
 
-        [**주문서 양식**]
-        {order_form}
-        [**주문서 양식끝**]
-        
-        [**대화 예시 시작**]
-        {sample_data}
-        [**대화 예시 끝**]
-        
-        [**메뉴시작**]
+    [**대화 예시 시작**]
+    {sample_data}
+    [**대화 예시 끝**]
+
+    [**메뉴시작**]
 
-            - 메뉴 정보 양식
-            [카테고리]
-            메뉴ID:메뉴
+        - 메뉴 정보 양식
+        [카테고리]
+        메뉴ID:메뉴
 
-            예)
-            [버거]
-            1:한우불고기버거
-            2:더블 한우불고기 버거
+        예)
+        [버거]
+        1:한우불고기버거
+        2:더블 한우불고기 버거
 
-            [드링크]
-            15:펩시 콜라
+        [드링크]
+        15:펩시 콜라
 
-        {menu_section}
-        [**메뉴끝**]"""
+    {menu_section}
+    [**메뉴끝**]""")
+
+class BurgerBot:
+    def __init__(self, system_prompt=None, db_path=None, client=None, async_client=None):
+        # OpenAI 클라이언트는 프로세스 전체에서 공유 (연결 풀/keep-alive 재사용)
+        self.client = client or get_openai_client()
+        self.async_client = async_client  # achat_with_gpt 용 (없으면 공유 AsyncOpenAI 사용)
+        self.conversation_history = []
+        self.order_list = OrderList()
+        self.state_version = 0  # 세션 저장소에 저장된 상태 버전 (낙관적 잠금용)
+        self.db_pool = None
+        self.db_path = None
+        self.order_formatter = OrderFormatter()
+        # 오래된 턴은 백그라운드에서 요약해 요청마다 보내는 토큰 수를 제한
+        self.history_compactor = HistoryCompactor(self.client)
+        self.last_prompt_cache = None  # 직전 요청의 프롬프트 캐시 적중 정보
+        self.last_turn_metrics = None  # 직전 턴의 토큰/지연 정보 (metrics.TurnMetrics)
+        self.last_order_errors = []  # 직전 턴의 주문 블록 파싱 오류 (order_parser.OrderParseError)
+        self.connect_to_local_db(db_path)
+
+        # 메뉴/주문서/예시는 프로세스 전체에서 공유하는 스냅샷에서 가져옴 (세션마다 I/O 없음)
+        self.menu_snapshot = get_menu_snapshot(self.db_path, self.db_pool)
+        self.default_system_prompt = self.menu_snapshot.get_prompt("BurgerBot", self._build_default_system_prompt)
         
-        self.set_system_prompt(system_prompt or default_system_prompt)
+        self.set_system_prompt(system_prompt or self.default_system_prompt)
+
+    def _build_default_system_prompt(self, snapshot):
+        return SYSTEM_PROMPT_TEMPLATE.format(
+            order_form=snapshot.order_form,
+            sample_data=snapshot.few_shot,
+            menu_section=snapshot.menu_section
+        )
         
     def set_system_prompt(self, system_prompt):
         if system_prompt:
@@ -72,174 +109,128 @@ class BurgerBot:
             self.conversation_history.insert(0, {"role": "system", "content": prompt})
         
     def parse_orders_from_response(self, response):
-        if "[ORDER_COMPLETE]" not in response:
-            return []
-        
-        orders_added = []
-        
-        # 모든 [ORDER_COMPLETE] 섹션을 찾기
-        parts = response.split("[ORDER_COMPLETE]")
-        
-        for i in range(1, len(parts)):  # 첫 번째는 일반 텍스트이므로 제외
-            try:
-                order_section = parts[i].strip()
-                lines = [line.strip() for line in order_section.split('\n') if line.strip()]
-                
-                order_data = {}
-                for line in lines:
-                    if ':' in line:
-                        key, value = line.split(':', 1)
-                        order_data[key.strip()] = value.strip()
-                
-                order_type = order_data.get('TYPE')
-                if not order_type:
-                    continue
-                    
-                quantity = int(order_data.get('QUANTITY', 1))
-                
-                if order_type == 'set':
-                    set_type = order_data.get('SET_TYPE', 'burger_set')
-                    order = None
-                    
-                    if set_type == 'burger_set':
-                        burger_id = order_data.get('BURGER')
-                        if not burger_id:
-                            continue
-                        
-                        # 토핑 처리
-                        burger_toppings = None
-                        if 'TOPPINGS' in order_data:
-                            toppings_str = order_data['TOPPINGS']
-                            burger_toppings = [int(t.strip()) for t in toppings_str.split(',') if t.strip().isdigit()]
-                        
-                        # 사이드 처리
-                        side_id = int(order_data.get('SIDE', 10))
-                        
-                        # 음료 처리
-                        drink_id = int(order_data.get('DRINK', 15))
-                        
-                        order = self.add_burger_set_order(int(burger_id), side_id, drink_id, quantity, burger_toppings)
-                        
-                    elif set_type == 'burger_combo':
-                        burger_id = order_data.get('BURGER')
-                        if not burger_id:
-                            continue
-                        
-                        # 토핑 처리
-                        burger_toppings = None
-                        if 'TOPPINGS' in order_data:
-                            toppings_str = order_data['TOPPINGS']
-                            burger_toppings = [int(t.strip()) for t in toppings_str.split(',') if t.strip().isdigit()]
-                        
-                        drink_id = int(order_data.get('DRINK', 15))
-                        order = self.add_burger_combo_order(int(burger_id), drink_id, quantity, burger_toppings)
-                        
-                    elif set_type == 'chicken_full_pack':
-                        chicken_id = order_data.get('CHICKEN')
-                        if not chicken_id:
-                            continue
-                        sauce_id = int(order_data.get('SAUCE', 40))
-                        order = self.add_chicken_full_pack_order(int(chicken_id), sauce_id, quantity)
-                        
-                    elif set_type == 'chicken_half_pack':
-                        chicken_id = order_data.get('CHICKEN')
-                        if not chicken_id:
-                            continue
-                        sauce_id = int(order_data.get('SAUCE', 40))
-                        order = self.add_chicken_half_pack_order(int(chicken_id), sauce_id, quantity)
-                    
-                    if order:
-                        orders_added.append(order)
-                        
-                elif order_type == 'single':
-                    order = None
-                    if 'BURGER' in order_data:
-                        # 토핑 처리
-                        toppings = None
-                        if 'TOPPINGS' in order_data:
-                            toppings_str = order_data['TOPPINGS']
-                            toppings = [int(t.strip()) for t in toppings_str.split(',') if t.strip().isdigit()]
-                        order = self.add_single_order(int(order_data['BURGER']), 'burger', None, quantity, toppings)
-                    elif 'CHICKEN' in order_data:
-                        order = self.add_single_order(int(order_data['CHICKEN']), 'chicken', None, quantity)
-                    elif 'SIDE' in order_data:
-                        side_id = int(order_data['SIDE'])
-                        order = self.add_single_order(side_id, 'side', quantity)
-                    elif 'DRINK' in order_data:
-                        drink_id = int(order_data['DRINK'])
-                        order = self.add_single_order(drink_id, 'drink', None, quantity)
-                    elif 'SAUCE' in order_data:
-                        sauce_id = int(order_data['SAUCE'])
-                        order = self.add_single_order(sauce_id, 'sauce', None, quantity)
-                    
-                    if order:
-                        orders_added.append(order)
-                        
-            except Exception as e:
-                print(f"주문 파싱 중 오류: {e}")
-                continue
-        
-        return orders_added
+        """응답의 [ORDER_COMPLETE] 블록을 주문으로 등록 (order_parser.OrderBlockParser 로 한 번에 파싱)"""
+        parser = OrderBlockParser()
+        parser.feed(response)
+        return register_orders(self, parser)
     
-    def chat_with_gpt(self, user_input):
+    def _begin_turn(self, user_input, model):
+        """턴 시작: 지표 준비, 완성된 요약 반영, 사용자 메시지 추가"""
+        turn = self.last_turn_metrics = TurnMetrics(model)
+        self.history_compactor.apply(self.conversation_history, self.order_list)
         self.conversation_history.append({"role": "user", "content": user_input})
-        
-        response = self.client.chat.completions.create(
-            model="gpt-4.1-mini-2025-04-14",
+        return turn
+    
+    def _stream_request(self, model):
+        return dict(
+            model=model,
             messages=self.conversation_history,
             max_tokens=200,
             temperature=0.7,
-            stream=True
+            stream=True,
+            stream_options={"include_usage": True}
         )
+    
+    def _read_stream_chunk(self, chunk, turn, splitter, response_parts, order_parser):
+        """
+        스트리밍 청크 하나를 처리하고 화면에 보낼 텍스트를 반환 ([ORDER_COMPLETE] 이후는 숨김)
         
-        full_response = ""
-        
-        # 먼저 전체 응답을 수집
-        for chunk in response:
-            if chunk.choices[0].delta.content:
-                content = chunk.choices[0].delta.content
-                full_response += content
-        
-        # 대화 기록에 추가
+        주문 블록은 도착하는 대로 order_parser 에 넣어서 응답이 끝날 때 다시 훑지 않게 함
+        """
+        # 마지막 청크에만 usage 가 있음 (choices 는 비어 있음)
+        if chunk.usage:
+            self.last_prompt_cache = prompt_cache_stats.record(chunk.usage)
+            turn.add_usage(self.last_prompt_cache)
+        if not chunk.choices:
+            return ""
+        content = chunk.choices[0].delta.content
+        if not content:
+            return ""
+        turn.first_token()
+        response_parts.append(content)
+        with turn.timed("parse_orders_seconds"):
+            order_parser.feed(content)
+        return splitter.feed(content)
+    
+    def _complete_turn(self, turn, full_response, order_parser=None):
+        """턴 종료: 대화 기록 추가, 주문 등록, 요약 예약"""
         self.conversation_history.append({"role": "assistant", "content": full_response})
         
-        # 주문 파싱 및 자동 등록 (전체 응답으로)
-        parsed_orders = self.parse_orders_from_response(full_response)
+        # 주문 파싱 및 자동 등록 (스트리밍은 이미 조각 단위로 파싱해 둔 결과를 사용)
+        with turn.timed("parse_orders_seconds"):
+            if order_parser is None:
+                parsed_orders = self.parse_orders_from_response(full_response)
+            else:
+                parsed_orders = register_orders(self, order_parser)
         if parsed_orders:
             print(f"✅ {len(parsed_orders)}개의 주문이 자동으로 등록되었습니다!")
         
-        # 사용자에게 보여줄 부분만 스트리밍 (ORDER_COMPLETE 태그 제거)
-        display_response = full_response.split("[ORDER_COMPLETE]")[0].strip()
+        self.history_compactor.schedule(self.conversation_history, self.order_list)
+        turn.finish()
+    
+    def chat_with_gpt(self, user_input):
+        model = "gpt-4.1-mini-2025-04-14"
+        turn = self._begin_turn(user_input, model)
+        
+        response = self.client.chat.completions.create(**self._stream_request(model))
         
-        # 단어 단위로 스트리밍 효과 생성 (더 자연스러움)
-        import time
-        words = display_response.split(' ')
-        for i, word in enumerate(words):
-            if i == 0:
-                yield word
-            else:
-                yield ' ' + word
-            # 약간의 지연으로 타이핑 효과
-            time.sleep(0.05)
+        # 도착하는 대로 바로 전달하되, [ORDER_COMPLETE] 이후의 주문 정보는 숨김
+        splitter = OrderTagSplitter()
+        order_parser = OrderBlockParser()
+        response_parts = []
+        
+        for chunk in response:
+            visible = self._read_stream_chunk(chunk, turn, splitter, response_parts, order_parser)
+            if visible:
+                yield visible
+        
+        remaining = splitter.flush()
+        if remaining:
+            yield remaining
+        
+        self._complete_turn(turn, "".join(response_parts), order_parser)
+    
+    async def achat_with_gpt(self, user_input):
+        """chat_with_gpt 의 asyncio 버전 (AsyncOpenAI, async generator) - async_app.py 용"""
+        model = "gpt-4.1-mini-2025-04-14"
+        turn = self._begin_turn(user_input, model)
+        
+        if self.async_client is None:
+            self.async_client = get_async_openai_client()
+        response = await self.async_client.chat.completions.create(**self._stream_request(model))
+        
+        splitter = OrderTagSplitter()
+        order_parser = OrderBlockParser()
+        response_parts = []
+        
+        async for chunk in response:
+            visible = self._read_stream_chunk(chunk, turn, splitter, response_parts, order_parser)
+            if visible:
+                yield visible
+        
+        remaining = splitter.flush()
+        if remaining:
+            yield remaining
+        
+        self._complete_turn(turn, "".join(response_parts), order_parser)
     
     def chat_with_gpt_non_streaming(self, user_input):
         """Non-streaming version for compatibility"""
-        self.conversation_history.append({"role": "user", "content": user_input})
+        model = "gpt-4o-mini"
+        turn = self._begin_turn(user_input, model)
         
         response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=model,
             messages=self.conversation_history,
             max_tokens=200,
             temperature=0.7
         )
         
+        turn.first_token()
+        self.last_prompt_cache = prompt_cache_stats.record(response.usage)
+        turn.add_usage(self.last_prompt_cache)
         gpt_response = response.choices[0].message.content.strip()
-        self.conversation_history.append({"role": "assistant", "content": gpt_response})
-        
-        # 주문 파싱 및 자동 등록
-        parsed_orders = self.parse_orders_from_response(gpt_response)
-        if parsed_orders:
-            print(f"✅ {len(parsed_orders)}개의 주문이 자동으로 등록되었습니다!")
+        self._complete_turn(turn, gpt_response)
         
         # [ORDER_COMPLETE] 태그 제거한 응답 반환
         display_response = gpt_response.split("[ORDER_COMPLETE]")[0].strip()
@@ -255,139 +246,67 @@ class BurgerBot:
             self.conversation_history = [{"role": "system", "content": system_prompt}]
     
     def add_burger_set_order(self, burger_id, side_id=None, drink_id=None, quantity=1, burger_toppings=None):
-        """버거 세트 주문 (버거 + 사이드 + 음료)"""
-        if not side_id:
-            side_id = 10  # 기본 후렌치 후라이
-        if not drink_id:
-            drink_id = 15  # 기본 코카 콜라
-            
-        burger_data = {"menu_id": burger_id}
-        if burger_toppings:
-            burger_data["toppings"] = burger_toppings
-            
-        order = {
-            "order_type": "set",
-            "set_type": "burger_set",
-            "quantity": quantity,
-            "burger": burger_data,
-            "side": {
-                "menu_id": side_id
-            },
-            "drink": {
-                "menu_id": drink_id
-            }
-        }
-        self.order_list.append(order)
-        return order
+        """버거 세트 주문 (버거 + 사이드 + 음료, 기본 후렌치 후라이 / 코카 콜라)"""
+        return self.order_list.append(BurgerSetOrder(burger_id, side_id, drink_id, quantity, burger_toppings))
     
     def add_burger_combo_order(self, burger_id, drink_id=None, quantity=1, burger_toppings=None):
-        """버거 콤보 주문 (버거 + 음료)"""
-        if not drink_id:
-            drink_id = 15  # 기본 코카 콜라
-            
-        burger_data = {"menu_id": burger_id}
-        if burger_toppings:
-            burger_data["toppings"] = burger_toppings
-            
-        order = {
-            "order_type": "set",
-            "set_type": "burger_combo",
-            "quantity": quantity,
-            "burger": burger_data,
-            "drink": {
-                "menu_id": drink_id
-            }
-        }
-        self.order_list.append(order)
-        return order
+        """버거 콤보 주문 (버거 + 음료, 기본 코카 콜라)"""
+        return self.order_list.append(BurgerComboOrder(burger_id, drink_id, quantity, burger_toppings))
     
     def add_chicken_full_pack_order(self, chicken_id, sauce_id=None, quantity=1):
-        """치킨 풀팩 주문 (치킨 + 소스 2개)"""
-        if not sauce_id:
-            sauce_id = 40  # 기본 치킨 소스
-            
-        order = {
-            "order_type": "set",
-            "set_type": "chicken_full_pack",
-            "quantity": quantity,
-            "chicken": {
-                "menu_id": chicken_id
-            },
-            "sauce": {
-                "menu_id": sauce_id,
-                "quantity": 2
-            }
-        }
-        self.order_list.append(order)
-        return order
+        """치킨 풀팩 주문 (치킨 + 소스 2개, 기본 치킨 소스)"""
+        return self.order_list.append(ChickenPackOrder("chicken_full_pack", chicken_id, sauce_id, quantity))
     
     def add_chicken_half_pack_order(self, chicken_id, sauce_id=None, quantity=1):
-        """치킨 하프팩 주문 (치킨 + 소스 1개)"""
-        if not sauce_id:
-            sauce_id = 40  # 기본 치킨 소스
-            
-        order = {
-            "order_type": "set",
-            "set_type": "chicken_half_pack",
-            "quantity": quantity,
-            "chicken": {
-                "menu_id": chicken_id
-            },
-            "sauce": {
-                "menu_id": sauce_id,
-                "quantity": 1
-            }
-        }
-        self.order_list.append(order)
-        return order
+        """치킨 하프팩 주문 (치킨 + 소스 1개, 기본 치킨 소스)"""
+        return self.order_list.append(ChickenPackOrder("chicken_half_pack", chicken_id, sauce_id, quantity))
     
     def add_single_order(self, item_id, item_type, quantity=1, toppings=None):
         """단품 주문"""
-        order = {
-            "order_type": "single",
-            "quantity": quantity
-        }
-        
-        if item_type == "burger":
-            burger_data = {"menu_id": item_id}
-            if toppings:
-                burger_data["toppings"] = toppings
-            order["burger"] = burger_data
-        elif item_type == "chicken":
-            order["chicken"] = {"menu_id": item_id}
-        elif item_type == "side":
-            order["side"] = {"menu_id": item_id}
-        elif item_type == "drink":
-            order["drink"] = {"menu_id": item_id}
-        elif item_type == "sauce":
-            order["sauce"] = {"menu_id": item_id}
-        
-        self.order_list.append(order)
-        return order
+        return self.order_list.append(SingleOrder(item_type, item_id, quantity, toppings))
     
     def get_orders_json(self):
-        return json.dumps(self.order_list, ensure_ascii=False, indent=2)
+        """주문 목록 JSON (주문이 바뀌지 않았으면 캐시된 문자열 재사용)"""
+        return self.order_list.to_json()
     
     def clear_orders(self):
-        self.order_list = []
+        self.order_list.clear()
+
+    def export_state(self):
+        """세션 저장소에 저장할 상태 (공유 system prompt 는 저장하지 않음)"""
+        history = self.conversation_history
+        system_prompt = None
+        if history and history[0]["role"] == "system":
+            if history[0]["content"] != self.default_system_prompt:
+                system_prompt = history[0]["content"]
+            history = history[1:]
+        return {
+            "system_prompt": system_prompt,
+            "history": history,
+            "orders": self.order_list.to_dicts(),
+            "order_version": self.order_list.version
+        }
+
+    def load_state(self, state):
+        """export_state() 로 저장한 상태를 복원 (기본 프롬프트는 현재 메뉴 버전 사용)"""
+        self.set_system_prompt(state.get("system_prompt") or self.default_system_prompt)
+        self.conversation_history.extend(state.get("history", []))
+        self.order_list = OrderList.from_dicts(state.get("orders"), state.get("order_version", 0))
+    
+    def close(self):
+        """
+        세션이 제거될 때 호출 (SessionRegistry 제거 훅)
+        
+        OpenAI 클라이언트와 DB 커넥션 풀은 프로세스 공유 자원이므로 여기서 닫지 않습니다.
+        종료 시에는 openai_client.close_openai_client() 를 사용하세요.
+        """
     
-    def connect_to_local_db(self):
-        """로컬 데이터베이스에 연결하는 함수"""
+    def connect_to_local_db(self, db_path=None):
+        """로컬 데이터베이스 커넥션 풀에 연결하는 함수 (프로세스 전체에서 공유)"""
         try:
-            # C:\data\BurgerDB.db 경로 설정
-            db_directory = r"C:\data"
-            db_path = os.path.join(db_directory, "BurgerDB.db")
-            
-            # 디렉토리가 없으면 생성
-            if not os.path.exists(db_directory):
-                os.makedirs(db_directory)
-                print(f"✅ 디렉토리 생성: {db_directory}")
-            
-            # SQLite 데이터베이스 연결
-            self.db_connection = sqlite3.connect(db_path)
-            self.db_connection.row_factory = sqlite3.Row  # 딕셔너리 형태로 결과 반환
-            
-            print(f"✅ SQLite 데이터베이스 연결 성공! (경로: {db_path})")
+            # 기본 경로: C:\data\BurgerDB.db (환경 변수 BURGER_DB_PATH 로 변경 가능)
+            self.db_path = db_path or get_db_path()
+            self.db_pool = get_menu_db_pool(self.db_path)
             return True
             
         except Exception as e:
@@ -396,91 +315,58 @@ class BurgerBot:
     
     def get_order_form(self):
         """주문서 양식을 반환하는 함수"""
-        try:
-            # PROMPT\ORDER_FORM 파일 읽기
-            order_form_path = os.path.join(os.path.dirname(__file__), "PROMPT", "ORDER_FORM.txt")
-            
-            with open(order_form_path, 'r', encoding='utf-8') as file:
-                order_form_content = file.read()
-            
-            return order_form_content
-            
-        except Exception as e:
-            print(f"❌ 주문서 양식 파일 읽기 실패: {e}")
-            return "주문서 양식을 불러올 수 없습니다."
+        return read_prompt_file(ORDER_FORM_PATH, "주문서 양식을 불러올 수 없습니다.")
         
     def get_few_shot(self):
-        """주문서 양식을 반환하는 함수"""
-        try:
-            # PROMPT\FEW_SHOT 파일 읽기
-            order_form_path = os.path.join(os.path.dirname(__file__), "PROMPT", "FEW_SHOT.txt")
-            
-            with open(order_form_path, 'r', encoding='utf-8') as file:
-                few_shot_content = file.read()
-            
-            return few_shot_content
-            
-        except Exception as e:
-            print(f"❌ 주문서 양식 파일 읽기 실패: {e}")
-            return "주문서 양식을 불러올 수 없습니다."
+        """Few-shot 예시를 반환하는 함수"""
+        return read_prompt_file(FEW_SHOT_PATH, "대화 예시를 불러올 수 없습니다.")
 
     def get_menuinfo_query(self):
         """메뉴 정보를 가져와서 system prompt에 넣을 데이터베이스 쿼리 함수"""
-        query = """
-        SELECT 
-            A.MENU_ID,
-            B.CATEGORY_NAME,
-            A.MENU_NAME
-        FROM MENU A, MenuCategory B
-        WHERE 1=1
-        AND A.CATEGORY_ID = B.CATEGORY_ID
-        ORDER BY B.CATEGORY_NAME, A.MENU_ID
-        """
-        
-        try:
-            if not self.db_connection:
-                print("❌ 데이터베이스 연결이 없습니다.")
-                return None
-            
-            cursor = self.db_connection.cursor()
-            cursor.execute(query)
-            
-            results = cursor.fetchall()
-            
-            # [CATEGORY_NAME]\nMENU_ID:MENU_NAME 형태로 포맷팅
-            formatted_result = ""
-            current_category = ""
-            
-            for row in results:
-                category = row['CATEGORY_NAME']
-                menu_id = row['MENU_ID']
-                menu_name = row['MENU_NAME']
-                
-                # 카테고리가 바뀌면 새로운 카테고리 헤더 추가
-                if category != current_category:
-                    if formatted_result:  # 첫 번째가 아니면 줄바꿈 추가
-                        formatted_result += "\n"
-                    formatted_result += f"[{category}]\n"
-                    current_category = category
-                
-                formatted_result += f"{menu_id}:{menu_name}\n"
-            
-            return formatted_result.strip()
-                
-        except Exception as e:
-            print(f"❌ 메뉴 정보 쿼리 실행 실패: {e}")
-            return None
+        return get_menu_snapshot(self.db_path, self.db_pool).catalog.menu_section()
     
+    def get_order_total(self):
+        """
+        (합계 금액, 가격을 알 수 없는 주문 수) - 세션을 시작할 때의 메뉴 스냅샷 가격 기준
+
+        주문이 바뀌지 않았으면 이전 계산을 재사용합니다.
+        """
+        return self.order_list.memo("total", lambda: self.menu_snapshot.price_table.order_total(self.order_list))
+
+    def _build_order_summary(self):
+        summary = self.order_formatter.format_order_lines(self.order_list)
+        if not self.order_list:
+            return summary
+        total, unpriced = self.get_order_total()
+        summary += f"\n합계: {format_price(total)}"
+        if unpriced:
+            summary += f" (가격 확인 필요 {unpriced}건)"
+        return summary
+
     def get_order_summary(self):
-        return self.order_formatter.format_order_summary(self.order_list)
+        started = time.perf_counter()
+        # 주문이 바뀌지 않았으면 이전 요약 재사용, 바뀌었으면 새로 추가/변경된 주문만 렌더링
+        summary = self.order_list.memo("summary", self._build_order_summary)
+        if self.last_turn_metrics is not None:
+            self.last_turn_metrics["format_summary_seconds"] = time.perf_counter() - started
+        return summary
     
-    def start_greeting(self):
+    def start_greeting(self, echo=True):
         greeting = "안녕하세요! Burger House에 오신 걸 환영합니다! 저는 버거하우스이에요. 무엇을 도와드릴까요? 오늘 맛있는 버거 주문하고 싶으시죠?"
-        print(f"Bot: {greeting}")
+        if echo:
+            print(f"Bot: {greeting}")
         self.conversation_history.append({"role": "assistant", "content": greeting})
         return greeting
 
 def main():
+    parser = argparse.ArgumentParser(description="Burger House 주문 시스템")
+    add_batch_arguments(parser)
+    args = parser.parse_args()
+    if args.batch:
+        # 대본 일괄 실행 모드 (batch_runner.py 참고)
+        run_batch_cli(BurgerBot, args.batch, args.workers, args.report)
+        return
+
     bot = BurgerBot()
     print("=== Burger House 주문 시스템 ===")
     
@@ -497,7 +383,7 @@ def main():
             print(bot.get_order_summary())
         elif user_input.lower() == "json":
             print("=== 주문 JSON ===")
-            print(bot.get_orders_json())
+            print(json.dumps(bot.order_list.to_dicts(), ensure_ascii=False, indent=2))
         elif user_input.lower() == "clear":
             bot.clear_orders()
             print("주문 내역을 초기화했습니다.")
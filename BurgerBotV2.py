@@ -1,11 +1,28 @@
 # -*- coding: utf-8 -*-
+import argparse
 import os
 import sys
 import json
-import sqlite3
-from openai import OpenAI
+import textwrap
+import time
 from dotenv import load_dotenv
+from openai_client import get_openai_client
 from order_formatter import OrderFormatter
+from menu_pricing import format_price
+from batch_runner import add_batch_arguments, run_batch_cli
+from history_compactor import HistoryCompactor
+from prompt_cache import prompt_cache_stats
+from metrics import TurnMetrics
+from order_models import BurgerComboOrder, BurgerSetOrder, ChickenPackOrder, OrderList, SingleOrder
+from order_parser import OrderBlockParser, order_from_tool_arguments, register_order, register_orders
+from order_stream import ORDER_COMPLETE_TAG, OrderTagSplitter
+from menu_db import get_db_path, get_menu_db_pool
+from menu_snapshot import (
+    FEW_SHOT_PATH,
+    ORDER_FORM_PATH,
+    get_menu_snapshot,
+    read_prompt_file,
+)
 
 # Windows에서 UTF-8 출력 설정
 if sys.platform == "win32":
@@ -15,14 +32,131 @@ if sys.platform == "win32":
 
 load_dotenv()
 
+# 모든 세션이 공유하는 시스템 프롬프트 원본 (메뉴 목록 없음 - get_menu_info 로 조회)
+# - 바이트가 하나라도 바뀌면 OpenAI 프롬프트 캐시(접두사 일치)가 깨지므로 메서드 밖에서 들여쓰기를 정리해 둠
+SYSTEM_PROMPT_TEMPLATE = textwrap.dedent("""\
+    당신은 Burger House(버거하우스)에서 주문을 받는 봇, 이름은 '버거하우스'입니다.
+    당신의 역할은 버거하우스에 온 손님을 친절하게 맞이하고, 그들의 주문을 정확하게 받거나 고객에게 필요한 카페, 메뉴 정보를 제공하는 것입니다.
+
+    메뉴 정보가 필요할 때는 get_menu_info 함수를 사용하여 데이터베이스에서 조회하세요.
+    - 카테고리 목록 조회: get_menu_info(action="get_categories")
+    - 메뉴 검색: get_menu_info(action="search", query="검색어")
+    - 특정 메뉴 조회: get_menu_info(action="get_by_id", menu_id=메뉴ID)
+    - 카테고리별 메뉴 조회: get_menu_info(action="get_by_category", category="카테고리명")
+
+    금액은 모든 상품이 등록된 후에 표기가 가능합니다. 그 이전에 가격을 물어본다면, 메뉴 선택이 완료된 후에 가격을 알려줄 수 있다고 답하세요.
+
+    [**주문서 양식**]
+    {order_form}
+    [**주문서 양식끝**]
+
+    [**대화 예시 시작**]
+    {sample_data}
+    [**대화 예시 끝**]
+    """)
+
+# 주문 등록 방식: tool = add_order/remove_order 함수 호출 (기본값), text = 응답 끝의 [ORDER_COMPLETE] 블록
+ORDER_MODES = ("tool", "text")
+
+# add_order/remove_order 도구 정의 (strict 스키마 - 인자가 add_* 메서드에 그대로 대응)
+ORDER_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "add_order",
+            "description": "확정된 메뉴 하나를 주문 내역에 등록합니다. 여러 메뉴는 메뉴마다 한 번씩 호출합니다.",
+            "strict": True,
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "order_type": {
+                        "type": "string",
+                        "enum": ["burger_set", "burger_combo", "chicken_full_pack", "chicken_half_pack", "single"],
+                        "description": "세트 종류 또는 단품(single)"
+                    },
+                    "menu_id": {
+                        "type": "integer",
+                        "description": "세트는 버거/치킨 메뉴ID, 단품은 해당 메뉴ID"
+                    },
+                    "item_type": {
+                        "type": ["string", "null"],
+                        "enum": ["burger", "chicken", "side", "drink", "sauce", None],
+                        "description": "단품일 때 메뉴 종류 (세트는 null)"
+                    },
+                    "side_id": {
+                        "type": ["integer", "null"],
+                        "description": "burger_set 의 사이드 메뉴ID (기본값이면 null)"
+                    },
+                    "drink_id": {
+                        "type": ["integer", "null"],
+                        "description": "burger_set/burger_combo 의 음료 메뉴ID (기본값이면 null)"
+                    },
+                    "sauce_id": {
+                        "type": ["integer", "null"],
+                        "description": "치킨팩의 소스 메뉴ID (기본값이면 null)"
+                    },
+                    "toppings": {
+                        "type": "array",
+                        "items": {"type": "integer"},
+                        "description": "버거 토핑 메뉴ID 목록 (없으면 빈 배열)"
+                    },
+                    "quantity": {
+                        "type": "integer",
+                        "description": "수량"
+                    }
+                },
+                "required": ["order_type", "menu_id", "item_type", "side_id", "drink_id", "sauce_id", "toppings", "quantity"],
+                "additionalProperties": False
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "remove_order",
+            "description": "주문 내역에서 주문 하나를 취소합니다.",
+            "strict": True,
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "order_number": {
+                        "type": "integer",
+                        "description": "취소할 주문 번호 (주문 내역의 1부터 시작하는 순서)"
+                    }
+                },
+                "required": ["order_number"],
+                "additionalProperties": False
+            }
+        }
+    }
+]
+ORDER_TOOL_NAMES = {tool["function"]["name"] for tool in ORDER_TOOLS}
+
 class BurgerBotV2:
-    def __init__(self, system_prompt=None):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    def __init__(self, system_prompt=None, max_tool_rounds=3, db_path=None, client=None, order_mode=None):
+        # OpenAI 클라이언트는 프로세스 전체에서 공유 (연결 풀/keep-alive 재사용)
+        self.client = client or get_openai_client()
+        # 주문 등록 방식 (ORDER_MODE 환경 변수로 변경 가능, text 는 기존 [ORDER_COMPLETE] 방식)
+        self.order_mode = (order_mode or os.getenv("ORDER_MODE", "tool")).lower()
+        if self.order_mode not in ORDER_MODES:
+            print(f"❌ 알 수 없는 ORDER_MODE: {self.order_mode} - text 방식을 사용합니다.")
+            self.order_mode = "text"
+        self.tool_orders_added = 0  # 이번 턴에 add_order 로 등록한 주문 수
+        self.stream_order_parser = None  # 이번 턴 마지막 스트리밍 응답의 주문 블록 파서 (조각 단위로 파싱)
         self.conversation_history = []
-        self.order_list = []
-        self.db_connection = None
+        self.order_list = OrderList()
+        self.state_version = 0  # 세션 저장소에 저장된 상태 버전 (낙관적 잠금용)
+        self.max_tool_rounds = max_tool_rounds  # 한 턴에서 허용하는 tool 호출 라운드 수
+        self.last_tool_rounds = []  # 직전 턴의 라운드별 소요 시간
+        self.last_order_errors = []  # 직전 턴의 주문 블록 파싱 오류 (order_parser.OrderParseError)
+        self.db_pool = None
+        self.db_path = None
         self.order_formatter = OrderFormatter()
-        self.connect_to_local_db()
+        # 오래된 턴은 백그라운드에서 요약해 요청마다 보내는 토큰 수를 제한
+        self.history_compactor = HistoryCompactor(self.client)
+        self.last_prompt_cache = None  # 직전 요청의 프롬프트 캐시 적중 정보
+        self.last_turn_metrics = None  # 직전 턴의 토큰/지연 정보 (metrics.TurnMetrics)
+        self.connect_to_local_db(db_path)
 
         # Function Calling 도구 정의
         self.tools = [
@@ -57,32 +191,20 @@ class BurgerBotV2:
                 }
             }
         ]
+        if self.order_mode == "tool":
+            self.tools = self.tools + ORDER_TOOLS
 
-        # 간소화된 시스템 프롬프트 (메뉴 정보 제거)
-        order_form = self.get_order_form()
-        sample_data = self.get_few_shot()
-        
-        default_system_prompt = f"""당신은 Burger House(버거하우스)에서 주문을 받는 봇, 이름은 '버거하우스'입니다.
-        당신의 역할은 버거하우스에 온 손님을 친절하게 맞이하고, 그들의 주문을 정확하게 받거나 고객에게 필요한 카페, 메뉴 정보를 제공하는 것입니다.
-        
-        메뉴 정보가 필요할 때는 get_menu_info 함수를 사용하여 데이터베이스에서 조회하세요.
-        - 카테고리 목록 조회: get_menu_info(action="get_categories")
-        - 메뉴 검색: get_menu_info(action="search", query="검색어")
-        - 특정 메뉴 조회: get_menu_info(action="get_by_id", menu_id=메뉴ID)
-        - 카테고리별 메뉴 조회: get_menu_info(action="get_by_category", category="카테고리명")
+        # 간소화된 시스템 프롬프트 (메뉴 정보 제거) - 프로세스 공유 스냅샷에서 한 번만 생성
+        self.menu_snapshot = get_menu_snapshot(self.db_path, self.db_pool)
+        self.default_system_prompt = self.menu_snapshot.get_prompt(f"BurgerBotV2:{self.order_mode}", self._build_default_system_prompt)
         
-        금액은 모든 상품이 등록된 후에 표기가 가능합니다. 그 이전에 가격을 물어본다면, 메뉴 선택이 완료된 후에 가격을 알려줄 수 있다고 답하세요.
+        self.set_system_prompt(system_prompt or self.default_system_prompt)
 
-        [**주문서 양식**]
-        {order_form}
-        [**주문서 양식끝**]
-        
-        [**대화 예시 시작**]
-        {sample_data}
-        [**대화 예시 끝**]
-        """
-        
-        self.set_system_prompt(system_prompt or default_system_prompt)
+    def _build_default_system_prompt(self, snapshot):
+        return SYSTEM_PROMPT_TEMPLATE.format(
+            order_form=snapshot.order_tool_form if self.order_mode == "tool" else snapshot.order_form,
+            sample_data=snapshot.few_shot
+        )
         
     def set_system_prompt(self, system_prompt):
         if system_prompt:
@@ -123,18 +245,14 @@ class BurgerBotV2:
         except Exception as e:
             return f"메뉴 정보 조회 중 오류가 발생했습니다: {e}"
 
+    @property
+    def menu_catalog(self):
+        """공유 메뉴 카탈로그 (메뉴가 바뀌면 스냅샷과 함께 새로 적재됨)"""
+        return get_menu_snapshot(self.db_path, self.db_pool).catalog
+
     def _get_categories(self):
         """카테고리 목록 조회"""
-        cursor = self.db_connection.cursor()
-        cursor.execute("SELECT MENU_ID, MENU_NAME FROM Menu ORDER BY MENU_ID")
-        results = cursor.fetchall()
-        
-        categories = []
-        for row in results:
-            categories.append({
-                "menu_id": row["MENU_ID"],
-                "menu_name": row["MENU_NAME"]
-            })
+        categories = self.menu_catalog.id_name_list
         
         return {
             "action": "get_categories",
@@ -144,26 +262,7 @@ class BurgerBotV2:
 
     def _search_menu(self, query):
         """메뉴 검색"""
-        cursor = self.db_connection.cursor()
-        search_query = """
-        SELECT A.MENU_ID, B.CATEGORY_NAME, A.MENU_NAME, A.PRICE
-        FROM MENU A, MenuCategory B
-        WHERE A.CATEGORY_ID = B.CATEGORY_ID 
-        AND A.MENU_NAME LIKE ?
-        ORDER BY B.CATEGORY_NAME, A.MENU_ID
-        """
-        
-        cursor.execute(search_query, (f"%{query}%",))
-        results = cursor.fetchall()
-        
-        menus = []
-        for row in results:
-            menus.append({
-                "menu_id": row["MENU_ID"],
-                "category": row["CATEGORY_NAME"],
-                "name": row["MENU_NAME"],
-                "price": row["PRICE"] if "PRICE" in row.keys() else "가격 정보 없음"
-            })
+        menus = self.menu_catalog.search(query)
         
         return {
             "action": "search",
@@ -174,24 +273,9 @@ class BurgerBotV2:
 
     def _get_menu_by_id(self, menu_id):
         """특정 메뉴 ID로 조회"""
-        cursor = self.db_connection.cursor()
-        query = """
-        SELECT A.MENU_ID, B.CATEGORY_NAME, A.MENU_NAME, A.PRICE
-        FROM MENU A, MenuCategory B
-        WHERE A.CATEGORY_ID = B.CATEGORY_ID 
-        AND A.MENU_ID = ?
-        """
-        
-        cursor.execute(query, (menu_id,))
-        result = cursor.fetchone()
+        menu = self.menu_catalog.get(menu_id)
         
-        if result:
-            menu = {
-                "menu_id": result["MENU_ID"],
-                "category": result["CATEGORY_NAME"],
-                "name": result["MENU_NAME"],
-                "price": result["PRICE"] if "PRICE" in result.keys() else "가격 정보 없음"
-            }
+        if menu:
             return {
                 "action": "get_by_id",
                 "menu_id": menu_id,
@@ -208,26 +292,7 @@ class BurgerBotV2:
 
     def _get_menu_by_category(self, category):
         """카테고리별 메뉴 조회"""
-        cursor = self.db_connection.cursor()
-        query = """
-        SELECT A.MENU_ID, B.CATEGORY_NAME, A.MENU_NAME, A.PRICE
-        FROM MENU A, MenuCategory B
-        WHERE A.CATEGORY_ID = B.CATEGORY_ID 
-        AND B.CATEGORY_NAME = ?
-        ORDER BY A.MENU_ID
-        """
-        
-        cursor.execute(query, (category,))
-        results = cursor.fetchall()
-        
-        menus = []
-        for row in results:
-            menus.append({
-                "menu_id": row["MENU_ID"],
-                "category": row["CATEGORY_NAME"],
-                "name": row["MENU_NAME"],
-                "price": row["PRICE"] if "PRICE" in row.keys() else "가격 정보 없음"
-            })
+        menus = self.menu_catalog.in_category(category)
         
         return {
             "action": "get_by_category",
@@ -236,49 +301,117 @@ class BurgerBotV2:
             "message": f"'{category}' 카테고리에서 {len(menus)}개의 메뉴를 찾았습니다."
         }
 
-    def _handle_function_calls(self, assistant_message):
-        """GPT의 Function Call 요청 처리"""
+    def _tool_calls_to_dicts(self, tool_calls):
+        """SDK의 tool_call 객체를 대화 기록용 dict 로 변환"""
+        return [
+            {
+                "id": tool_call.id,
+                "type": "function",
+                "function": {
+                    "name": tool_call.function.name,
+                    "arguments": tool_call.function.arguments
+                }
+            } for tool_call in tool_calls
+        ]
+
+    def _run_tool_calls(self, content, tool_calls):
+        """tool_calls 를 실행하고 assistant/tool 메시지를 대화 기록에 추가 (실행 결과 목록 반환)"""
         # assistant 메시지를 대화 기록에 추가 (tool_calls 포함)
         self.conversation_history.append({
             "role": "assistant",
-            "content": assistant_message.content,
-            "tool_calls": [
-                {
-                    "id": tool_call.id,
-                    "type": "function",
-                    "function": {
-                        "name": tool_call.function.name,
-                        "arguments": tool_call.function.arguments
-                    }
-                } for tool_call in assistant_message.tool_calls
-            ]
+            "content": content,
+            "tool_calls": tool_calls
         })
         
         # 각 tool call에 대해 결과 생성
-        for tool_call in assistant_message.tool_calls:
-            function_name = tool_call.function.name
-            function_args = json.loads(tool_call.function.arguments)
+        results = []
+        for tool_call in tool_calls:
+            function_name = tool_call["function"]["name"]
+            function_args = json.loads(tool_call["function"]["arguments"] or "{}")
             
             # 함수명에 따라 실제 메서드 호출
+            self.last_turn_metrics["tool_calls"] += 1
             if function_name == "get_menu_info":
-                result = self.get_menu_info(**function_args)
+                with self.last_turn_metrics.timed("get_menu_info_seconds"):
+                    result = self.get_menu_info(**function_args)
+            elif function_name == "add_order":
+                result = self.add_order(function_args)
+            elif function_name == "remove_order":
+                result = self.remove_order(function_args.get("order_number"))
             else:
                 result = f"알 수 없는 함수: {function_name}"
+            results.append(result)
             
             # 결과를 GPT에게 다시 전달
             self.conversation_history.append({
                 "role": "tool",
-                "tool_call_id": tool_call.id,
+                "tool_call_id": tool_call["id"],
                 "content": json.dumps(result, ensure_ascii=False)
             })
+        return results
+
+    def _handle_function_calls(self, content, tool_calls):
+        """
+        GPT의 Function Call 요청 처리 (generator)
         
-        # GPT가 function 결과를 받고 최종 응답 생성
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=self.conversation_history
-        )
-        
-        final_response = response.choices[0].message.content
+        tool 실행 → 후속 응답 스트리밍을 max_tool_rounds 까지 반복해서
+        검색 후 get_by_id 처럼 조회를 이어갈 수 있게 합니다.
+        후속 응답 본문은 바로 yield 하고, 최종 응답 전체를 반환합니다.
+        """
+        self.last_tool_rounds = []
+        orders_changed = False
+        
+        for round_number in range(1, self.max_tool_rounds + 1):
+            tool_started = time.perf_counter()
+            results = self._run_tool_calls(content, tool_calls)
+            tool_seconds = time.perf_counter() - tool_started
+            succeeded = [
+                tool_call["function"]["name"] in ORDER_TOOL_NAMES and isinstance(result, dict) and bool(result.get("success"))
+                for tool_call, result in zip(tool_calls, results)
+            ]
+            orders_changed = orders_changed or any(succeeded)
+            
+            # 주문 등록/취소만 했고 모두 성공했으며 안내 문장도 이미 보냈다면 후속 요청 없이 턴을 끝냄
+            # (하나라도 실패하면 모델이 오류를 보고 바로잡거나 손님에게 알리도록 후속 요청)
+            if content and all(succeeded):
+                self.last_tool_rounds.append({
+                    "round": round_number,
+                    "tools": [tool_call["function"]["name"] for tool_call in tool_calls],
+                    "tool_seconds": round(tool_seconds, 4),
+                    "completion_seconds": 0.0
+                })
+                # 합계는 모델이 지어내지 않도록 서버가 계산한 금액을 덧붙임
+                notice = self._order_total_notice()
+                yield notice
+                self.conversation_history.append({"role": "assistant", "content": notice.strip()})
+                return content + notice
+            
+            # 마지막 라운드에서는 tool 을 더 부르지 못하게 해서 반드시 답변으로 끝냄
+            tool_choice = "auto" if round_number < self.max_tool_rounds else "none"
+            
+            completion_started = time.perf_counter()
+            splitter = OrderTagSplitter()
+            content, next_tool_calls, finish_reason = yield from self._stream_completion(splitter, tool_choice)
+            remaining = splitter.flush()
+            if remaining:
+                yield remaining
+            
+            self.last_tool_rounds.append({
+                "round": round_number,
+                "tools": [tool_call["function"]["name"] for tool_call in tool_calls],
+                "tool_seconds": round(tool_seconds, 4),
+                "completion_seconds": round(time.perf_counter() - completion_started, 4)
+            })
+            
+            if finish_reason != "tool_calls" or not next_tool_calls:
+                break
+            tool_calls = next_tool_calls
+        
+        final_response = content
+        if orders_changed:
+            notice = self._order_total_notice()
+            yield notice
+            final_response = (content or "") + notice
         self.conversation_history.append({
             "role": "assistant",
             "content": final_response
@@ -286,8 +419,20 @@ class BurgerBotV2:
         
         return final_response
 
+    def _consume(self, generator):
+        """generator 를 끝까지 소비하고 반환값을 돌려줌 (비스트리밍 경로용)"""
+        while True:
+            try:
+                next(generator)
+            except StopIteration as stop:
+                return stop.value
+
     def chat_with_gpt_non_streaming(self, user_input):
         """Function Calling 지원 비스트리밍 채팅"""
+        turn = self.last_turn_metrics = TurnMetrics("gpt-4o-mini")
+        self.tool_orders_added = 0
+        self.stream_order_parser = None
+        self.history_compactor.apply(self.conversation_history, self.order_list)
         self.conversation_history.append({"role": "user", "content": user_input})
         
         response = self.client.chat.completions.create(
@@ -297,185 +442,182 @@ class BurgerBotV2:
             tool_choice="auto"
         )
         
+        turn.first_token()
+        self.last_prompt_cache = prompt_cache_stats.record(response.usage)
+        turn.add_usage(self.last_prompt_cache)
+        
         # Function call이 있는지 확인
-        if response.choices[0].message.tool_calls:
-            gpt_response = self._handle_function_calls(response.choices[0].message)
+        message = response.choices[0].message
+        if message.tool_calls:
+            gpt_response = self._consume(
+                self._handle_function_calls(message.content, self._tool_calls_to_dicts(message.tool_calls))
+            )
         else:
             # 일반 응답 처리
             gpt_response = response.choices[0].message.content
             self.conversation_history.append({"role": "assistant", "content": gpt_response})
         
         # 기존 주문 파싱 로직
-        parsed_orders = self.parse_orders_from_response(gpt_response)
+        with turn.timed("parse_orders_seconds"):
+            parsed_orders = self._parse_text_orders(gpt_response, self.stream_order_parser)
         if parsed_orders:
             print(f"✅ {len(parsed_orders)}개의 주문이 자동으로 등록되었습니다!")
         
+        self.history_compactor.schedule(self.conversation_history, self.order_list)
+        turn.finish()
+        
         # [ORDER_COMPLETE] 태그 제거한 응답 반환
         display_response = gpt_response.split("[ORDER_COMPLETE]")[0].strip()
         return display_response
 
-    def chat_with_gpt(self, user_input):
-        """Function Calling 지원 스트리밍 채팅"""
-        self.conversation_history.append({"role": "user", "content": user_input})
+    def _stream_completion(self, splitter, tool_choice="auto"):
+        """
+        tools 를 포함한 스트리밍 요청 한 번으로 응답을 받습니다.
         
-        # 먼저 non-streaming으로 function call 확인
-        response = self.client.chat.completions.create(
+        본문 조각은 도착하는 즉시 yield 하고, tool_calls 조각은 index 별로 모아서
+        (본문 전체, tool_calls, finish_reason) 을 반환합니다.
+        본문의 주문 블록은 도착하는 대로 stream_order_parser 에 넣어서 턴이 끝날 때 다시 훑지 않게 함
+        (턴의 최종 응답은 항상 마지막 요청의 본문이므로 요청마다 새 파서로 바꿈)
+        """
+        stream_response = self.client.chat.completions.create(
             model="gpt-4o-mini",
             messages=self.conversation_history,
             tools=self.tools,
-            tool_choice="auto"
+            tool_choice=tool_choice,
+            max_tokens=200,
+            temperature=0.7,
+            stream=True,
+            stream_options={"include_usage": True}
         )
         
-        # Function call이 있으면 처리
-        if response.choices[0].message.tool_calls:
-            full_response = self._handle_function_calls(response.choices[0].message)
-        else:
-            # Function call이 없으면 streaming으로 응답
-            stream_response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=self.conversation_history,
-                max_tokens=200,
-                temperature=0.7,
-                stream=True
-            )
+        content_parts = []
+        tool_calls = {}
+        finish_reason = None
+        order_parser = self.stream_order_parser = OrderBlockParser()
+        turn = self.last_turn_metrics
+        
+        for chunk in stream_response:
+            # 마지막 청크에만 usage 가 있음 (choices 는 비어 있음)
+            if chunk.usage:
+                self.last_prompt_cache = prompt_cache_stats.record(chunk.usage)
+                turn.add_usage(self.last_prompt_cache)
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            delta = choice.delta
             
-            full_response = ""
-            for chunk in stream_response:
-                if chunk.choices[0].delta.content:
-                    content = chunk.choices[0].delta.content
-                    full_response += content
+            if delta.content:
+                turn.first_token()
+                content_parts.append(delta.content)
+                with turn.timed("parse_orders_seconds"):
+                    order_parser.feed(delta.content)
+                visible = splitter.feed(delta.content)
+                if visible:
+                    yield visible
             
+            # tool_calls 는 id/이름/인자가 여러 조각으로 나뉘어 도착함
+            for tool_call in delta.tool_calls or []:
+                slot = tool_calls.setdefault(tool_call.index, {
+                    "id": None,
+                    "type": "function",
+                    "function": {"name": "", "arguments": ""}
+                })
+                if tool_call.id:
+                    slot["id"] = tool_call.id
+                if tool_call.function:
+                    if tool_call.function.name:
+                        slot["function"]["name"] += tool_call.function.name
+                    if tool_call.function.arguments:
+                        slot["function"]["arguments"] += tool_call.function.arguments
+            
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+        
+        return "".join(content_parts), [tool_calls[index] for index in sorted(tool_calls)], finish_reason
+
+    def chat_with_gpt(self, user_input):
+        """Function Calling 지원 스트리밍 채팅 (요청 한 번으로 tool 여부 판단 + 본문 스트리밍)"""
+        turn = self.last_turn_metrics = TurnMetrics("gpt-4o-mini")
+        self.tool_orders_added = 0
+        self.stream_order_parser = None
+        self.history_compactor.apply(self.conversation_history, self.order_list)
+        self.conversation_history.append({"role": "user", "content": user_input})
+        
+        splitter = OrderTagSplitter()
+        content, tool_calls, finish_reason = yield from self._stream_completion(splitter)
+        remaining = splitter.flush()
+        if remaining:
+            yield remaining
+        
+        if finish_reason == "tool_calls" and tool_calls:
+            # Function call이 있으면 처리하고, 후속 응답도 그대로 스트리밍
+            full_response = yield from self._handle_function_calls(content or None, tool_calls)
+        else:
+            self.last_tool_rounds = []
+            full_response = content
             # 대화 기록에 추가
             self.conversation_history.append({"role": "assistant", "content": full_response})
         
         # 주문 파싱 및 자동 등록
-        parsed_orders = self.parse_orders_from_response(full_response)
+        with turn.timed("parse_orders_seconds"):
+            parsed_orders = self._parse_text_orders(full_response or "", self.stream_order_parser)
         if parsed_orders:
             print(f"✅ {len(parsed_orders)}개의 주문이 자동으로 등록되었습니다!")
         
-        # 사용자에게 보여줄 부분만 스트리밍
-        display_response = full_response.split("[ORDER_COMPLETE]")[0].strip()
+        self.history_compactor.schedule(self.conversation_history, self.order_list)
+        turn.finish()
+
+    def _parse_text_orders(self, response, order_parser=None):
+        """
+        응답 본문의 [ORDER_COMPLETE] 블록을 주문으로 등록
         
-        # 단어 단위로 스트리밍 효과 생성
-        import time
-        words = display_response.split(' ')
-        for i, word in enumerate(words):
-            if i == 0:
-                yield word
-            else:
-                yield ' ' + word
-            time.sleep(0.05)
+        - order_parser: 스트리밍 중에 조각 단위로 파싱해 둔 파서 (없으면 응답 전체를 파싱)
+        - tool 모드에서는 모델이 add_order 대신 예시처럼 블록을 쓴 경우에만 예비로 파싱합니다.
+        """
+        if self.order_mode == "tool" and (self.tool_orders_added or ORDER_COMPLETE_TAG not in response):
+            self.last_order_errors = []
+            return []
+        if order_parser is None:
+            return self.parse_orders_from_response(response)
+        return register_orders(self, order_parser)
+
+    def add_order(self, arguments):
+        """add_order 도구 - 인자를 메뉴 카탈로그와 대조해 검증한 뒤 add_* 메서드로 주문 등록"""
+        try:
+            order = register_order(self, order_from_tool_arguments(arguments, self.menu_catalog))
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        self.tool_orders_added += 1
+        print("✅ add_order 로 주문이 등록되었습니다!")
+        total, unpriced = self.get_order_total()
+        # 금액은 모델이 계산하지 않고 이 값을 그대로 안내하도록 함께 돌려줌
+        return {
+            "success": True,
+            "order_number": len(self.order_list),
+            "order": order.to_dict(),
+            "line_total": self.menu_snapshot.price_table.line_total(order),
+            "order_total": total if not unpriced else None
+        }
+
+    def remove_order(self, order_number):
+        """remove_order 도구 - 주문 번호(1부터)로 주문 취소"""
+        if not isinstance(order_number, int) or not 1 <= order_number <= len(self.order_list):
+            return {"success": False, "error": f"주문 번호가 올바르지 않습니다: {order_number!r} (현재 주문 {len(self.order_list)}개)"}
+        removed = self.order_list.pop(order_number - 1)
+        total, unpriced = self.get_order_total()
+        return {
+            "success": True,
+            "removed": removed.to_dict(),
+            "remaining": len(self.order_list),
+            "order_total": total if not unpriced else None
+        }
 
     # 기존 BurgerBot 메서드들 그대로 유지
     def parse_orders_from_response(self, response):
-        if "[ORDER_COMPLETE]" not in response:
-            return []
-        
-        orders_added = []
-        
-        # 모든 [ORDER_COMPLETE] 섹션을 찾기
-        parts = response.split("[ORDER_COMPLETE]")
-        
-        for i in range(1, len(parts)):  # 첫 번째는 일반 텍스트이므로 제외
-            try:
-                order_section = parts[i].strip()
-                lines = [line.strip() for line in order_section.split('\n') if line.strip()]
-                
-                order_data = {}
-                for line in lines:
-                    if ':' in line:
-                        key, value = line.split(':', 1)
-                        order_data[key.strip()] = value.strip()
-                
-                order_type = order_data.get('TYPE')
-                if not order_type:
-                    continue
-                    
-                quantity = int(order_data.get('QUANTITY', 1))
-                
-                if order_type == 'set':
-                    set_type = order_data.get('SET_TYPE', 'burger_set')
-                    order = None
-                    
-                    if set_type == 'burger_set':
-                        burger_id = order_data.get('BURGER')
-                        if not burger_id:
-                            continue
-                        
-                        # 토핑 처리
-                        burger_toppings = None
-                        if 'TOPPINGS' in order_data:
-                            toppings_str = order_data['TOPPINGS']
-                            burger_toppings = [int(t.strip()) for t in toppings_str.split(',') if t.strip().isdigit()]
-                        
-                        # 사이드 처리
-                        side_id = int(order_data.get('SIDE', 10))
-                        
-                        # 음료 처리
-                        drink_id = int(order_data.get('DRINK', 15))
-                        
-                        order = self.add_burger_set_order(int(burger_id), side_id, drink_id, quantity, burger_toppings)
-                        
-                    elif set_type == 'burger_combo':
-                        burger_id = order_data.get('BURGER')
-                        if not burger_id:
-                            continue
-                        
-                        # 토핑 처리
-                        burger_toppings = None
-                        if 'TOPPINGS' in order_data:
-                            toppings_str = order_data['TOPPINGS']
-                            burger_toppings = [int(t.strip()) for t in toppings_str.split(',') if t.strip().isdigit()]
-                        
-                        drink_id = int(order_data.get('DRINK', 15))
-                        order = self.add_burger_combo_order(int(burger_id), drink_id, quantity, burger_toppings)
-                        
-                    elif set_type == 'chicken_full_pack':
-                        chicken_id = order_data.get('CHICKEN')
-                        if not chicken_id:
-                            continue
-                        sauce_id = int(order_data.get('SAUCE', 40))
-                        order = self.add_chicken_full_pack_order(int(chicken_id), sauce_id, quantity)
-                        
-                    elif set_type == 'chicken_half_pack':
-                        chicken_id = order_data.get('CHICKEN')
-                        if not chicken_id:
-                            continue
-                        sauce_id = int(order_data.get('SAUCE', 40))
-                        order = self.add_chicken_half_pack_order(int(chicken_id), sauce_id, quantity)
-                    
-                    if order:
-                        orders_added.append(order)
-                        
-                elif order_type == 'single':
-                    order = None
-                    if 'BURGER' in order_data:
-                        # 토핑 처리
-                        toppings = None
-                        if 'TOPPINGS' in order_data:
-                            toppings_str = order_data['TOPPINGS']
-                            toppings = [int(t.strip()) for t in toppings_str.split(',') if t.strip().isdigit()]
-                        order = self.add_single_order(int(order_data['BURGER']), 'burger', quantity, toppings)
-                    elif 'CHICKEN' in order_data:
-                        order = self.add_single_order(int(order_data['CHICKEN']), 'chicken', quantity)
-                    elif 'SIDE' in order_data:
-                        side_id = int(order_data['SIDE'])
-                        order = self.add_single_order(side_id, 'side', quantity)
-                    elif 'DRINK' in order_data:
-                        drink_id = int(order_data['DRINK'])
-                        order = self.add_single_order(drink_id, 'drink', quantity)
-                    elif 'SAUCE' in order_data:
-                        sauce_id = int(order_data['SAUCE'])
-                        order = self.add_single_order(sauce_id, 'sauce', quantity)
-                    
-                    if order:
-                        orders_added.append(order)
-                        
-            except Exception as e:
-                print(f"주문 파싱 중 오류: {e}")
-                continue
-        
-        return orders_added
+        """응답의 [ORDER_COMPLETE] 블록을 주문으로 등록 (order_parser.OrderBlockParser 로 한 번에 파싱)"""
+        parser = OrderBlockParser()
+        parser.feed(response)
+        return register_orders(self, parser)
     
     def clear_history(self):
         system_prompt = None
@@ -487,139 +629,67 @@ class BurgerBotV2:
             self.conversation_history = [{"role": "system", "content": system_prompt}]
     
     def add_burger_set_order(self, burger_id, side_id=None, drink_id=None, quantity=1, burger_toppings=None):
-        """버거 세트 주문 (버거 + 사이드 + 음료)"""
-        if not side_id:
-            side_id = 10  # 기본 후렌치 후라이
-        if not drink_id:
-            drink_id = 15  # 기본 코카 콜라
-            
-        burger_data = {"menu_id": burger_id}
-        if burger_toppings:
-            burger_data["toppings"] = burger_toppings
-            
-        order = {
-            "order_type": "set",
-            "set_type": "burger_set",
-            "quantity": quantity,
-            "burger": burger_data,
-            "side": {
-                "menu_id": side_id
-            },
-            "drink": {
-                "menu_id": drink_id
-            }
-        }
-        self.order_list.append(order)
-        return order
+        """버거 세트 주문 (버거 + 사이드 + 음료, 기본 후렌치 후라이 / 코카 콜라)"""
+        return self.order_list.append(BurgerSetOrder(burger_id, side_id, drink_id, quantity, burger_toppings))
     
     def add_burger_combo_order(self, burger_id, drink_id=None, quantity=1, burger_toppings=None):
-        """버거 콤보 주문 (버거 + 음료)"""
-        if not drink_id:
-            drink_id = 15  # 기본 코카 콜라
-            
-        burger_data = {"menu_id": burger_id}
-        if burger_toppings:
-            burger_data["toppings"] = burger_toppings
-            
-        order = {
-            "order_type": "set",
-            "set_type": "burger_combo",
-            "quantity": quantity,
-            "burger": burger_data,
-            "drink": {
-                "menu_id": drink_id
-            }
-        }
-        self.order_list.append(order)
-        return order
+        """버거 콤보 주문 (버거 + 음료, 기본 코카 콜라)"""
+        return self.order_list.append(BurgerComboOrder(burger_id, drink_id, quantity, burger_toppings))
     
     def add_chicken_full_pack_order(self, chicken_id, sauce_id=None, quantity=1):
-        """치킨 풀팩 주문 (치킨 + 소스 2개)"""
-        if not sauce_id:
-            sauce_id = 40  # 기본 치킨 소스
-            
-        order = {
-            "order_type": "set",
-            "set_type": "chicken_full_pack",
-            "quantity": quantity,
-            "chicken": {
-                "menu_id": chicken_id
-            },
-            "sauce": {
-                "menu_id": sauce_id,
-                "quantity": 2
-            }
-        }
-        self.order_list.append(order)
-        return order
+        """치킨 풀팩 주문 (치킨 + 소스 2개, 기본 치킨 소스)"""
+        return self.order_list.append(ChickenPackOrder("chicken_full_pack", chicken_id, sauce_id, quantity))
     
     def add_chicken_half_pack_order(self, chicken_id, sauce_id=None, quantity=1):
-        """치킨 하프팩 주문 (치킨 + 소스 1개)"""
-        if not sauce_id:
-            sauce_id = 40  # 기본 치킨 소스
-            
-        order = {
-            "order_type": "set",
-            "set_type": "chicken_half_pack",
-            "quantity": quantity,
-            "chicken": {
-                "menu_id": chicken_id
-            },
-            "sauce": {
-                "menu_id": sauce_id,
-                "quantity": 1
-            }
-        }
-        self.order_list.append(order)
-        return order
+        """치킨 하프팩 주문 (치킨 + 소스 1개, 기본 치킨 소스)"""
+        return self.order_list.append(ChickenPackOrder("chicken_half_pack", chicken_id, sauce_id, quantity))
     
     def add_single_order(self, item_id, item_type, quantity=1, toppings=None):
         """단품 주문"""
-        order = {
-            "order_type": "single",
-            "quantity": quantity
-        }
-        
-        if item_type == "burger":
-            burger_data = {"menu_id": item_id}
-            if toppings:
-                burger_data["toppings"] = toppings
-            order["burger"] = burger_data
-        elif item_type == "chicken":
-            order["chicken"] = {"menu_id": item_id}
-        elif item_type == "side":
-            order["side"] = {"menu_id": item_id}
-        elif item_type == "drink":
-            order["drink"] = {"menu_id": item_id}
-        elif item_type == "sauce":
-            order["sauce"] = {"menu_id": item_id}
-        
-        self.order_list.append(order)
-        return order
+        return self.order_list.append(SingleOrder(item_type, item_id, quantity, toppings))
     
     def get_orders_json(self):
-        return json.dumps(self.order_list, ensure_ascii=False, indent=2)
+        """주문 목록 JSON (주문이 바뀌지 않았으면 캐시된 문자열 재사용)"""
+        return self.order_list.to_json()
     
     def clear_orders(self):
-        self.order_list = []
+        self.order_list.clear()
+
+    def export_state(self):
+        """세션 저장소에 저장할 상태 (공유 system prompt 는 저장하지 않음)"""
+        history = self.conversation_history
+        system_prompt = None
+        if history and history[0]["role"] == "system":
+            if history[0]["content"] != self.default_system_prompt:
+                system_prompt = history[0]["content"]
+            history = history[1:]
+        return {
+            "system_prompt": system_prompt,
+            "history": history,
+            "orders": self.order_list.to_dicts(),
+            "order_version": self.order_list.version
+        }
+
+    def load_state(self, state):
+        """export_state() 로 저장한 상태를 복원 (기본 프롬프트는 현재 메뉴 버전 사용)"""
+        self.set_system_prompt(state.get("system_prompt") or self.default_system_prompt)
+        self.conversation_history.extend(state.get("history", []))
+        self.order_list = OrderList.from_dicts(state.get("orders"), state.get("order_version", 0))
     
-    def connect_to_local_db(self):
-        """로컬 데이터베이스에 연결하는 함수"""
+    def close(self):
+        """
+        세션이 제거될 때 호출 (SessionRegistry 제거 훅)
+        
+        OpenAI 클라이언트와 DB 커넥션 풀은 프로세스 공유 자원이므로 여기서 닫지 않습니다.
+        종료 시에는 openai_client.close_openai_client() 를 사용하세요.
+        """
+    
+    def connect_to_local_db(self, db_path=None):
+        """로컬 데이터베이스 커넥션 풀에 연결하는 함수 (프로세스 전체에서 공유)"""
         try:
-            # C:\data\BurgerDB.db 경로 설정
-            db_directory = r"C:\data"
-            db_path = os.path.join(db_directory, "BurgerDB.db")
-            
-            # 디렉토리가 없으면 생성
-            if not os.path.exists(db_directory):
-                os.makedirs(db_directory)
-                print(f"✅ 디렉토리 생성: {db_directory}")
-            
-            # SQLite 데이터베이스 연결
-            self.db_connection = sqlite3.connect(db_path)
-            self.db_connection.row_factory = sqlite3.Row  # 딕셔너리 형태로 결과 반환
-            
-            print(f"✅ SQLite 데이터베이스 연결 성공! (경로: {db_path})")
+            # 기본 경로: C:\data\BurgerDB.db (환경 변수 BURGER_DB_PATH 로 변경 가능)
+            self.db_path = db_path or get_db_path()
+            self.db_pool = get_menu_db_pool(self.db_path)
             return True
             
         except Exception as e:
@@ -628,44 +698,61 @@ class BurgerBotV2:
     
     def get_order_form(self):
         """주문서 양식을 반환하는 함수"""
-        try:
-            # PROMPT\ORDER_FORM 파일 읽기
-            order_form_path = os.path.join(os.path.dirname(__file__), "PROMPT", "ORDER_FORM.txt")
-            
-            with open(order_form_path, 'r', encoding='utf-8') as file:
-                order_form_content = file.read()
-            
-            return order_form_content
-            
-        except Exception as e:
-            print(f"❌ 주문서 양식 파일 읽기 실패: {e}")
-            return "주문서 양식을 불러올 수 없습니다."
+        return read_prompt_file(ORDER_FORM_PATH, "주문서 양식을 불러올 수 없습니다.")
         
     def get_few_shot(self):
         """Few-shot 예시를 반환하는 함수"""
-        try:
-            # PROMPT\FEW_SHOT 파일 읽기
-            few_shot_path = os.path.join(os.path.dirname(__file__), "PROMPT", "FEW_SHOT.txt")
-            
-            with open(few_shot_path, 'r', encoding='utf-8') as file:
-                few_shot_content = file.read()
-            
-            return few_shot_content
-            
-        except Exception as e:
-            print(f"❌ Few-shot 예시 파일 읽기 실패: {e}")
-            return "대화 예시를 불러올 수 없습니다."
+        return read_prompt_file(FEW_SHOT_PATH, "대화 예시를 불러올 수 없습니다.")
     
+    def get_order_total(self):
+        """
+        (합계 금액, 가격을 알 수 없는 주문 수) - 세션을 시작할 때의 메뉴 스냅샷 가격 기준
+
+        주문이 바뀌지 않았으면 이전 계산을 재사용합니다.
+        """
+        return self.order_list.memo("total", lambda: self.menu_snapshot.price_table.order_total(self.order_list))
+
+    def _build_order_summary(self):
+        summary = self.order_formatter.format_order_lines(self.order_list)
+        if not self.order_list:
+            return summary
+        return f"{summary}\n{self._order_total_line()}"
+
+    def _order_total_line(self):
+        total, unpriced = self.get_order_total()
+        line = f"합계: {format_price(total)}"
+        if unpriced:
+            line += f" (가격 확인 필요 {unpriced}건)"
+        return line
+
+    def _order_total_notice(self):
+        """주문을 등록/취소한 턴의 응답 끝에 붙이는 현재 합계 안내"""
+        return f"\n\n현재 주문 {self._order_total_line()}"
+
     def get_order_summary(self):
-        return self.order_formatter.format_order_summary(self.order_list)
+        started = time.perf_counter()
+        # 주문이 바뀌지 않았으면 이전 요약 재사용, 바뀌었으면 새로 추가/변경된 주문만 렌더링
+        summary = self.order_list.memo("summary", self._build_order_summary)
+        if self.last_turn_metrics is not None:
+            self.last_turn_metrics["format_summary_seconds"] = time.perf_counter() - started
+        return summary
     
-    def start_greeting(self):
+    def start_greeting(self, echo=True):
         greeting = "안녕하세요! Burger House에 오신 걸 환영합니다! 저는 버거하우스이에요. 무엇을 도와드릴까요? 오늘 맛있는 버거 주문하고 싶으시죠?"
-        print(f"Bot: {greeting}")
+        if echo:
+            print(f"Bot: {greeting}")
         self.conversation_history.append({"role": "assistant", "content": greeting})
         return greeting
 
 def main():
+    parser = argparse.ArgumentParser(description="Burger House 주문 시스템")
+    add_batch_arguments(parser)
+    args = parser.parse_args()
+    if args.batch:
+        # 대본 일괄 실행 모드 (batch_runner.py 참고)
+        run_batch_cli(BurgerBotV2, args.batch, args.workers, args.report)
+        return
+
     bot = BurgerBotV2()
     print("=== Burger House 주문 시스템 V2 (Function Calling 지원) ===")
     
@@ -682,7 +769,7 @@ def main():
             print(bot.get_order_summary())
         elif user_input.lower() == "json":
             print("=== 주문 JSON ===")
-            print(bot.get_orders_json())
+            print(json.dumps(bot.order_list.to_dicts(), ensure_ascii=False, indent=2))
         elif user_input.lower() == "clear":
             bot.clear_orders()
             print("주문 내역을 초기화했습니다.")
@@ -1,7 +1,8 @@
 import sqlite3
-import os
-from openai import OpenAI
 from dotenv import load_dotenv
+from openai_client import get_openai_client
+from history_compactor import HistoryCompactor
+from prompt_cache import prompt_cache_stats
 
 load_dotenv()
 
@@ -66,9 +67,10 @@ def get_menu_data():
             print("데이터베이스 연결 종료")
 
 class OrderBot:
-    def __init__(self, system_prompt=None):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    def __init__(self, system_prompt=None, client=None):
+        self.client = client or get_openai_client()
         self.conversation_history = []
+        self.history_compactor = HistoryCompactor(self.client)
         
         default_system_prompt = """당신은 juno-cafe(주노 카페)에서 주문을 받는 봇, 이름은 '마크'입니다.
 당신의 역할은 카페에 온 손님을 친절하고 상냥하게 맞이하고, 그들의 주문을 정확하게 받거나 고객에게 필요한 카페, 메뉴 정보를 제공하는 것입니다. 그 이외의 질문에는 "죄송합니다. 전 알바생이라 그건 답해드릴 수가 없어요."라고 단호하게 거절하며 대답하세요.
@@ -92,6 +94,7 @@ class OrderBot:
             self.conversation_history.insert(0, {"role": "system", "content": prompt})
         
     def chat_with_gpt(self, user_input):
+        self.history_compactor.apply(self.conversation_history)
         self.conversation_history.append({"role": "user", "content": user_input})
         
         response = self.client.chat.completions.create(
@@ -101,8 +104,10 @@ class OrderBot:
             temperature=0.7
         )
         
+        prompt_cache_stats.record(response.usage)
         gpt_response = response.choices[0].message.content.strip()
         self.conversation_history.append({"role": "assistant", "content": gpt_response})
+        self.history_compactor.schedule(self.conversation_history)
         
         return gpt_response
     
@@ -1,9 +1,17 @@
 # -*- coding: utf-8 -*-
 import os
 import sys
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 import json
 from BurgerBot import BurgerBot
+from order_formatter import OrderFormatter
+from order_polling import (
+    EMPTY_ORDERS_BODY, ORDERS_CACHE_CONTROL, orders_body, orders_delta_body, orders_etag, parse_since
+)
+from session_registry import SessionRegistry
+from session_store import create_session_store, restore_bot_state, save_bot_state
+from prompt_cache import prompt_cache_stats
+from metrics import metrics
 
 # Windows에서 UTF-8 출력 설정
 if sys.platform == "win32":
@@ -13,11 +21,31 @@ if sys.platform == "win32":
 
 app = Flask(__name__)
 
-# 글로벌 봇 인스턴스 관리를 위한 딕셔너리
+# 글로벌 봇 인스턴스 관리를 위한 세션 레지스트리
 # - 각 세션 ID별로 별도의 BurgerBot 인스턴스를 저장
 # - 사용자가 브라우저를 새로고침해도 대화 히스토리와 주문 내역이 유지됨
-# - 서버가 재시작되면 모든 세션 데이터가 초기화됨
-bot_instances = {}
+# - LRU 순서로 관리되며, 오래 사용하지 않은 세션 / 개수·메모리 상한 초과 시 제거됨
+# - 레지스트리는 워커별 캐시일 뿐이고, 세션 상태의 원본은 session_store 에 있음
+bot_instances = SessionRegistry(
+    max_sessions=int(os.getenv('SESSION_MAX_COUNT', '1000')),
+    idle_ttl=int(os.getenv('SESSION_IDLE_TTL', '1800')),
+    max_bytes=int(os.getenv('SESSION_MAX_BYTES', str(256 * 1024 * 1024)))
+)
+
+# 세션 상태 저장소 (SESSION_STORE=memory | sqlite)
+# - sqlite 를 사용하면 여러 워커 프로세스가 같은 세션을 이어서 처리할 수 있고 재시작 후에도 유지됨
+session_store = create_session_store()
+
+# 주방 화면(/kitchen_board)용 포맷터 - 룰셋 컴파일 결과는 봇들의 포맷터와 공유
+kitchen_formatter = OrderFormatter()
+
+def create_bot_instance(session_id):
+    """저장된 세션이 있으면 복원하고, 없으면 새 BurgerBot 인스턴스로 인사말부터 시작"""
+    bot = BurgerBot()
+    if not restore_bot_state(session_store, session_id, bot):
+        bot.start_greeting()
+        save_bot_state(session_store, session_id, bot)
+    return bot
 
 def get_bot_instance(session_id):
     """
@@ -32,11 +60,22 @@ def get_bot_instance(session_id):
     동작:
         - 새 세션 ID인 경우: 새 BurgerBot 인스턴스 생성 및 인사말 시작
         - 기존 세션 ID인 경우: 저장된 인스턴스 반환 (대화 히스토리 유지)
+        - 이 워커에 없는 세션 ID는 세션 저장소에서 복원 (없으면 새 세션으로 시작)
+        - 다른 워커가 더 최신 상태를 저장했다면 요청마다 확인해서 불러옴
     """
-    if session_id not in bot_instances:
-        bot_instances[session_id] = BurgerBot()
-        bot_instances[session_id].start_greeting()
-    return bot_instances[session_id]
+    bot = bot_instances.get_or_create(session_id, lambda: create_bot_instance(session_id))
+    restore_bot_state(session_store, session_id, bot)
+    return bot
+
+def find_bot_instance(session_id):
+    """이미 존재하는 세션의 봇만 반환 (워커 캐시 → 세션 저장소 순, 없으면 None)"""
+    bot = bot_instances.get(session_id)
+    if bot is not None:
+        restore_bot_state(session_store, session_id, bot)
+        return bot
+    if not session_store.version(session_id):
+        return None
+    return get_bot_instance(session_id)
 
 
 @app.route('/')
@@ -79,16 +118,21 @@ def chat():
                     for chunk in bot.chat_with_gpt(user_message):
                         if chunk:
                             yield f"data: {json.dumps({'chunk': chunk}, ensure_ascii=False)}\n\n"
+                    save_bot_state(session_store, session_id, bot)
+                    bot_instances.update_size(session_id)
                     
                     # 주문 정보 전송
                     yield f"data: {json.dumps({'orders': bot.get_orders_json(), 'order_summary': bot.get_order_summary(), 'complete': True}, ensure_ascii=False)}\n\n"
+                    metrics.record_turn(bot.last_turn_metrics, endpoint='chat_stream')
                     
                 except Exception as e:
                     print(f"Streaming error: {e}")
                     # 스트리밍 실패 시 non-streaming으로 폴백
                     try:
                         response = bot.chat_with_gpt_non_streaming(user_message)
+                        save_bot_state(session_store, session_id, bot)
                         yield f"data: {json.dumps({'chunk': response, 'complete': True, 'orders': bot.get_orders_json(), 'order_summary': bot.get_order_summary()}, ensure_ascii=False)}\n\n"
+                        metrics.record_turn(bot.last_turn_metrics, endpoint='chat_stream_fallback')
                     except Exception as fallback_error:
                         yield f"data: {json.dumps({'error': f'오류가 발생했습니다: {str(fallback_error)}'}, ensure_ascii=False)}\n\n"
             
@@ -96,38 +140,50 @@ def chat():
         else:
             # Non-streaming 모드
             bot_response = bot.chat_with_gpt_non_streaming(user_message)
-            return jsonify({
+            save_bot_state(session_store, session_id, bot)
+            bot_instances.update_size(session_id)
+            response = jsonify({
                 'response': bot_response,
                 'orders': bot.get_orders_json(),
                 'order_summary': bot.get_order_summary()
             })
+            metrics.record_turn(bot.last_turn_metrics, endpoint='chat')
+            return response
         
     except Exception as e:
         return jsonify({'error': f'오류가 발생했습니다: {str(e)}'}), 500
 
 @app.route('/orders/<session_id>')
 def get_orders(session_id):
+    """
+    세션의 주문 목록과 요약
+
+    - ETag(주문 버전) 가 If-None-Match 와 같으면 304
+    - ?since=<버전>: 그 이후 추가/삭제된 주문만 반환 (order_polling.orders_delta_body 참고)
+    """
     try:
-        if session_id in bot_instances:
-            bot = bot_instances[session_id]
-            return jsonify({
-                'orders': bot.get_orders_json(),
-                'order_summary': bot.get_order_summary()
-            })
-        else:
-            return jsonify({
-                'orders': '[]',
-                'order_summary': '주문 내역이 없습니다.'
-            })
+        bot = find_bot_instance(session_id)
+        if bot is None:
+            return app.response_class(EMPTY_ORDERS_BODY, mimetype='application/json')
+
+        etag = orders_etag(bot)
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': ORDERS_CACHE_CONTROL}
+        if request.if_none_match.contains(etag):
+            return '', 304, headers
+
+        since = parse_since(request.args.get('since'))
+        body = orders_body(bot) if since is None else orders_delta_body(bot, since)
+        return app.response_class(body, mimetype='application/json', headers=headers)
     except Exception as e:
         return jsonify({'error': f'주문 조회 중 오류가 발생했습니다: {str(e)}'}), 500
 
 @app.route('/clear_orders/<session_id>', methods=['POST'])
 def clear_orders(session_id):
     try:
-        if session_id in bot_instances:
-            bot = bot_instances[session_id]
+        bot = find_bot_instance(session_id)
+        if bot is not None:
             bot.clear_orders()
+            save_bot_state(session_store, session_id, bot)
             return jsonify({'message': '주문 내역을 초기화했습니다.'})
         else:
             return jsonify({'message': '주문 내역이 없습니다.'})
@@ -154,8 +210,15 @@ def new_session():
         
         # 기존 세션 데이터 완전 삭제하고 새 세션 생성
         # 이전 대화 히스토리와 주문 내역이 모두 초기화됨
-        bot_instances[session_id] = BurgerBot()
-        greeting = bot_instances[session_id].start_greeting()
+        previous = find_bot_instance(session_id)
+        bot = bot_instances.put(session_id, BurgerBot())
+        if previous is not None:
+            # 주문 버전도 이어서 증가시켜야 이전 세션의 ETag/since 가 새 주문에 맞지 않음
+            bot.order_list.continue_after(previous.order_list.version)
+        greeting = bot.start_greeting()
+        # 버전은 계속 증가시켜야 다른 워커가 캐시한 이전 대화를 새 세션으로 교체함
+        bot.state_version = session_store.version(session_id)
+        save_bot_state(session_store, session_id, bot)
         
         return jsonify({
             'message': '새 세션이 시작되었습니다.',
@@ -164,5 +227,39 @@ def new_session():
     except Exception as e:
         return jsonify({'error': f'세션 생성 중 오류가 발생했습니다: {str(e)}'}), 500
 
+@app.route('/sessions/stats')
+def session_stats():
+    """세션 레지스트리 상태 (세션 수, 추정 메모리, hit/miss/eviction 통계)"""
+    bot_instances.evict_expired()
+    return jsonify(bot_instances.stats())
+
+@app.route('/kitchen_board')
+def kitchen_board():
+    """
+    이 워커의 모든 활성 세션 주문을 주방 화면용으로 스트리밍
+
+    - 기본: text/plain, 세션별 "[세션 ID] 주문 N건" 줄 + 주문 요약 형식의 줄
+    - ?format=json: 주문 하나당 JSON 한 줄 (application/x-ndjson)
+    - 세션 저장소에서 다시 읽지 않고 워커 캐시(bot_instances)에 있는 주문만 사용
+    - 스트리밍은 핸들러가 끝난 뒤에 진행되므로, 세션별 주문 줄을 레지스트리 락 안에서 먼저 복사해 둠
+    """
+    sessions = bot_instances.snapshot(lambda bot: list(bot.order_list))
+    if request.args.get('format') == 'json':
+        tickets = kitchen_formatter.iter_kitchen_tickets(sessions)
+        return Response((json.dumps(ticket, ensure_ascii=False) + "\n" for ticket in tickets),
+                        mimetype='application/x-ndjson')
+    lines = kitchen_formatter.iter_kitchen_board(sessions)
+    return Response((line + "\n" for line in lines), mimetype='text/plain; charset=utf-8')
+
+@app.route('/metrics')
+def metrics_route():
+    """턴별 토큰/지연 지표 (Prometheus text 형식, model/endpoint 별 p50/p95/p99)"""
+    return app.response_class(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/prompt_cache/stats')
+def prompt_cache_stats_route():
+    """OpenAI 프롬프트 캐시 적중률 (cached_tokens / prompt_tokens 누적)"""
+    return jsonify(prompt_cache_stats.stats())
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
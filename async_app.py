@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# asyncio(ASGI) 서빙 모드 - app.py 와 같은 API 를 Quart + AsyncOpenAI 로 제공
+# - 스트리밍 중에 OS 스레드를 붙잡지 않으므로 프로세스 하나로 많은 /chat 스트림을 동시에 유지할 수 있음
+# - 실행: hypercorn async_app:app --bind 0.0.0.0:5000
+import asyncio
+import json
+import os
+import sys
+
+from quart import Quart, jsonify, render_template, request
+
+from BurgerBot import BurgerBot
+from metrics import metrics
+from openai_client import aclose_async_openai_client, get_async_openai_client
+from order_polling import (
+    EMPTY_ORDERS_BODY, ORDERS_CACHE_CONTROL, orders_body, orders_delta_body, orders_etag, parse_since
+)
+from session_registry import SessionRegistry
+from session_store import create_session_store, restore_bot_state, save_bot_state
+
+# Windows에서 UTF-8 출력 설정
+if sys.platform == "win32":
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(encoding='utf-8')
+
+app = Quart(__name__)
+
+# 세션 관리는 app.py 와 동일 (레지스트리 = 워커별 캐시, session_store = 원본)
+bot_instances = SessionRegistry(
+    max_sessions=int(os.getenv('SESSION_MAX_COUNT', '1000')),
+    idle_ttl=int(os.getenv('SESSION_IDLE_TTL', '1800')),
+    max_bytes=int(os.getenv('SESSION_MAX_BYTES', str(256 * 1024 * 1024)))
+)
+session_store = create_session_store()
+
+# 모든 세션이 공유하는 비동기 OpenAI 클라이언트 (연결 풀 공유)
+async_client = get_async_openai_client()
+
+
+# 아래 함수들은 DB/세션 저장소 I/O 가 있으므로 asyncio.to_thread 로 이벤트 루프 밖에서 실행
+def create_bot_instance(session_id):
+    """저장된 세션이 있으면 복원하고, 없으면 새 BurgerBot 인스턴스로 인사말부터 시작"""
+    bot = BurgerBot(async_client=async_client)
+    if not restore_bot_state(session_store, session_id, bot):
+        bot.start_greeting()
+        save_bot_state(session_store, session_id, bot)
+    return bot
+
+def get_bot_instance(session_id):
+    """세션 ID에 해당하는 봇 인스턴스를 반환 (없으면 저장소에서 복원하거나 새로 생성)"""
+    bot = bot_instances.get_or_create(session_id, lambda: create_bot_instance(session_id))
+    restore_bot_state(session_store, session_id, bot)
+    return bot
+
+def find_bot_instance(session_id):
+    """이미 존재하는 세션의 봇만 반환 (워커 캐시 → 세션 저장소 순, 없으면 None)"""
+    bot = bot_instances.get(session_id)
+    if bot is not None:
+        restore_bot_state(session_store, session_id, bot)
+        return bot
+    if not session_store.version(session_id):
+        return None
+    return get_bot_instance(session_id)
+
+def reset_bot_instance(session_id):
+    previous = find_bot_instance(session_id)
+    bot = bot_instances.put(session_id, BurgerBot(async_client=async_client))
+    if previous is not None:
+        # 주문 버전도 이어서 증가시켜야 이전 세션의 ETag/since 가 새 주문에 맞지 않음
+        bot.order_list.continue_after(previous.order_list.version)
+    greeting = bot.start_greeting()
+    # 버전은 계속 증가시켜야 다른 워커가 캐시한 이전 대화를 새 세션으로 교체함
+    bot.state_version = session_store.version(session_id)
+    save_bot_state(session_store, session_id, bot)
+    return greeting
+
+def finish_turn(session_id, bot):
+    save_bot_state(session_store, session_id, bot)
+    bot_instances.update_size(session_id)
+
+
+@app.route('/')
+async def claude_chat():
+    return await render_template('claude-chat.html')
+
+@app.route('/chat', methods=['POST'])
+async def chat():
+    """
+    채팅 메시지를 처리하는 메인 엔드포인트 (app.py 의 /chat 과 같은 요청/응답 형식)
+
+    봇의 achat_with_gpt async generator 를 그대로 SSE 로 흘려보냅니다.
+    """
+    try:
+        data = await request.get_json()
+        user_message = data.get('message', '')
+        session_id = data.get('session_id', 'default')
+        use_streaming = data.get('streaming', True)
+
+        if not user_message.strip():
+            return jsonify({'error': '메시지를 입력해주세요.'}), 400
+
+        bot = await asyncio.to_thread(get_bot_instance, session_id)
+
+        if use_streaming:
+            async def generate():
+                try:
+                    async for chunk in bot.achat_with_gpt(user_message):
+                        if chunk:
+                            yield f"data: {json.dumps({'chunk': chunk}, ensure_ascii=False)}\n\n"
+                    await asyncio.to_thread(finish_turn, session_id, bot)
+
+                    # 주문 정보 전송
+                    yield f"data: {json.dumps({'orders': bot.get_orders_json(), 'order_summary': bot.get_order_summary(), 'complete': True}, ensure_ascii=False)}\n\n"
+                    metrics.record_turn(bot.last_turn_metrics, endpoint='chat_stream')
+
+                except Exception as e:
+                    print(f"Streaming error: {e}")
+                    yield f"data: {json.dumps({'error': f'오류가 발생했습니다: {str(e)}'}, ensure_ascii=False)}\n\n"
+
+            return app.response_class(generate(), mimetype='text/plain; charset=utf-8')
+        else:
+            # Non-streaming 모드: 같은 async 경로를 끝까지 모아서 한 번에 응답
+            bot_response = "".join([chunk async for chunk in bot.achat_with_gpt(user_message)])
+            await asyncio.to_thread(finish_turn, session_id, bot)
+            response = jsonify({
+                'response': bot_response,
+                'orders': bot.get_orders_json(),
+                'order_summary': bot.get_order_summary()
+            })
+            metrics.record_turn(bot.last_turn_metrics, endpoint='chat')
+            return response
+
+    except Exception as e:
+        return jsonify({'error': f'오류가 발생했습니다: {str(e)}'}), 500
+
+@app.route('/orders/<session_id>')
+async def get_orders(session_id):
+    """세션의 주문 목록과 요약 (ETag/If-None-Match → 304, ?since=<버전> 변경분 응답은 app.py 와 동일)"""
+    try:
+        bot = await asyncio.to_thread(find_bot_instance, session_id)
+        if bot is None:
+            return app.response_class(EMPTY_ORDERS_BODY, mimetype='application/json')
+
+        etag = orders_etag(bot)
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': ORDERS_CACHE_CONTROL}
+        if request.if_none_match.contains(etag):
+            return '', 304, headers
+
+        since = parse_since(request.args.get('since'))
+        body = orders_body(bot) if since is None else orders_delta_body(bot, since)
+        return app.response_class(body, mimetype='application/json', headers=headers)
+    except Exception as e:
+        return jsonify({'error': f'주문 조회 중 오류가 발생했습니다: {str(e)}'}), 500
+
+@app.route('/clear_orders/<session_id>', methods=['POST'])
+async def clear_orders(session_id):
+    try:
+        bot = await asyncio.to_thread(find_bot_instance, session_id)
+        if bot is not None:
+            bot.clear_orders()
+            await asyncio.to_thread(save_bot_state, session_store, session_id, bot)
+            return jsonify({'message': '주문 내역을 초기화했습니다.'})
+        else:
+            return jsonify({'message': '주문 내역이 없습니다.'})
+    except Exception as e:
+        return jsonify({'error': f'주문 초기화 중 오류가 발생했습니다: {str(e)}'}), 500
+
+@app.route('/new_session', methods=['POST'])
+async def new_session():
+    """새로운 채팅 세션을 시작 (기존 대화 히스토리 + 주문 내역 삭제)"""
+    try:
+        data = await request.get_json()
+        session_id = data.get('session_id', 'default')
+
+        greeting = await asyncio.to_thread(reset_bot_instance, session_id)
+
+        return jsonify({
+            'message': '새 세션이 시작되었습니다.',
+            'greeting': greeting
+        })
+    except Exception as e:
+        return jsonify({'error': f'세션 생성 중 오류가 발생했습니다: {str(e)}'}), 500
+
+@app.route('/metrics')
+async def metrics_route():
+    """턴별 토큰/지연 지표 (Prometheus text 형식, model/endpoint 별 p50/p95/p99)"""
+    return app.response_class(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.after_serving
+async def close_async_client():
+    await aclose_async_openai_client()
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5000)
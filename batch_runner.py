@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# 대본(스크립트) 대화 일괄 실행기 - 프롬프트/메뉴 변경을 오프라인으로 평가
+# - 대본 파일의 손님 대화를 대본마다 새 봇 인스턴스로 실행 (스레드 풀 크기 = --workers)
+# - 대본별 최종 주문(order_list), 합계, 토큰 수, 턴 지연을 모아 요약 리포트(JSON) 작성
+# - expected_orders 가 있는 대본은 최종 주문과 일치하는지도 확인
+#
+# 대본 파일: JSON 배열 또는 JSONL (한 줄에 대본 하나)
+#   {"id": "set-1", "turns": ["불고기버거 세트 하나 주세요", "네 그걸로 주세요"], "expected_orders": [...]}
+#
+# 예)
+#   python stub_openai_server.py --port 8001 &
+#   OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=stub \
+#     python batch_runner.py config/sample_transcripts.jsonl --bot v2 --workers 8 --report batch_report.json
+#   (python BurgerBotV2.py --batch <대본 파일> 도 같음)
+# 스텁 서버는 손님 말과 관계없이 주문을 무작위로 고르므로, expected_orders 검사는 실제 모델로 실행할 때만 의미가 있음
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from percentiles import percentile
+
+# 대본별로 합산하는 턴 지표 (metrics.TurnMetrics 키)
+SUMMED_TURN_FIELDS = ("prompt_tokens", "cached_tokens", "completion_tokens", "llm_calls", "tool_calls")
+
+DEFAULT_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+
+
+def load_transcripts(path):
+    """
+    대본 파일 → 대본 dict 목록
+
+    - JSON 배열, {"transcripts": [...]} 또는 JSONL 모두 지원
+    - id 가 없으면 파일 안의 순서(1부터)를 사용
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(data, dict):
+        data = data.get("transcripts", [data])
+
+    transcripts = []
+    for index, transcript in enumerate(data, 1):
+        turns = transcript.get("turns")
+        if not isinstance(turns, list) or not all(isinstance(turn, str) for turn in turns):
+            raise ValueError(f"대본 {index}: turns 는 문자열 목록이어야 합니다.")
+        transcripts.append({**transcript, "id": str(transcript.get("id") or index)})
+    return transcripts
+
+
+def run_transcript(bot_factory, transcript):
+    """
+    새 봇으로 대본 하나를 실행하고 결과 dict 를 반환합니다.
+
+    실행 중 예외가 나면 그때까지의 결과와 error 를 함께 반환합니다 (다른 대본은 계속 실행).
+    """
+    result = {"id": transcript["id"], "turns": [], "error": None}
+    started = time.perf_counter()
+    bot = None
+    try:
+        bot = bot_factory()
+        bot.start_greeting(echo=False)
+        for user_input in transcript["turns"]:
+            response = bot.chat_with_gpt_non_streaming(user_input)
+            result["turns"].append({
+                "user": user_input,
+                "bot": response,
+                "metrics": dict(bot.last_turn_metrics or {}),
+                "order_errors": [str(error) for error in bot.last_order_errors]
+            })
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        result["seconds"] = round(time.perf_counter() - started, 4)
+        if bot is not None:
+            orders = bot.order_list.to_dicts()
+            total, unpriced = bot.get_order_total()
+            result.update(orders=orders, order_total=total, order_unpriced=unpriced)
+            if "expected_orders" in transcript:
+                result["orders_match"] = orders == transcript["expected_orders"]
+            bot.close()
+
+    for key in SUMMED_TURN_FIELDS:
+        result[key] = sum(turn["metrics"].get(key) or 0 for turn in result["turns"])
+    return result
+
+
+def _quantiles(values):
+    return {
+        "p50": round(percentile(values, 0.5), 4),
+        "p95": round(percentile(values, 0.95), 4),
+        "p99": round(percentile(values, 0.99), 4),
+    }
+
+
+def summarize(results, elapsed, workers):
+    """대본별 결과 → 요약 리포트"""
+    turn_metrics = [turn["metrics"] for result in results for turn in result["turns"]]
+    turn_seconds = [metrics["turn_seconds"] for metrics in turn_metrics if metrics.get("turn_seconds") is not None]
+    ttft_seconds = [metrics["ttft_seconds"] for metrics in turn_metrics if metrics.get("ttft_seconds") is not None]
+    checked = [result["orders_match"] for result in results if "orders_match" in result]
+    summary = {
+        "transcripts": len(results),
+        "workers": workers,
+        "elapsed_seconds": round(elapsed, 3),
+        "turns": len(turn_metrics),
+        "errors": sum(1 for result in results if result["error"]),
+        "throughput_turns_per_second": round(len(turn_metrics) / elapsed, 2) if elapsed else 0.0,
+        "turn_seconds": _quantiles(turn_seconds),
+        "ttft_seconds": _quantiles(ttft_seconds),
+        "transcript_seconds": _quantiles([result["seconds"] for result in results]),
+        "orders": sum(len(result.get("orders") or ()) for result in results),
+        "order_errors": sum(len(turn["order_errors"]) for result in results for turn in result["turns"]),
+        "orders_checked": len(checked),
+        "orders_matched": sum(checked),
+    }
+    for key in SUMMED_TURN_FIELDS:
+        summary[key] = sum(result[key] for result in results)
+    return summary
+
+
+def run_batch(bot_factory, transcripts, workers=DEFAULT_WORKERS):
+    """
+    대본들을 최대 workers 개 스레드에서 동시에 실행
+
+    - 대본마다 bot_factory() 로 만든 독립된 봇 사용 (OpenAI 클라이언트/메뉴 스냅샷은 프로세스 공유)
+    - 반환: {"summary": 요약, "transcripts": 대본 순서대로의 결과}
+    """
+    workers = max(1, workers)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+        results = list(executor.map(lambda transcript: run_transcript(bot_factory, transcript), transcripts))
+    elapsed = time.perf_counter() - started
+    return {"summary": summarize(results, elapsed, workers), "transcripts": results}
+
+
+def write_report(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def print_report(report):
+    summary = report["summary"]
+    print("\n=== 대본 일괄 실행 결과 ===")
+    print(f"대본: {summary['transcripts']}개 (동시 {summary['workers']}), 소요 시간: {summary['elapsed_seconds']}초")
+    print(f"턴: {summary['turns']}, 오류: {summary['errors']}, 처리량: {summary['throughput_turns_per_second']} 턴/초")
+    turn = summary["turn_seconds"]
+    print(f"턴 지연: p50 {turn['p50']}s, p95 {turn['p95']}s, p99 {turn['p99']}s")
+    ttft = summary["ttft_seconds"]
+    print(f"첫 응답: p50 {ttft['p50']}s, p95 {ttft['p95']}s, p99 {ttft['p99']}s")
+    print(
+        f"토큰: 프롬프트 {summary['prompt_tokens']} (캐시 {summary['cached_tokens']}), "
+        f"응답 {summary['completion_tokens']}, LLM 호출 {summary['llm_calls']}, 도구 호출 {summary['tool_calls']}"
+    )
+    print(f"주문: {summary['orders']}건, 주문 블록 오류: {summary['order_errors']}건")
+    if summary["orders_checked"]:
+        print(f"예상 주문 일치: {summary['orders_matched']}/{summary['orders_checked']}")
+    for result in report["transcripts"]:
+        if result["error"]:
+            print(f"❌ {result['id']}: {result['error']}")
+        elif result.get("orders_match") is False:
+            print(f"❌ {result['id']}: 예상 주문과 다릅니다.")
+
+
+def run_batch_cli(bot_factory, path, workers=DEFAULT_WORKERS, report_path=None):
+    """봇 main() 의 --batch 모드: 대본 실행 → 리포트 출력/저장"""
+    transcripts = load_transcripts(path)
+    report = run_batch(bot_factory, transcripts, workers)
+    print_report(report)
+    if report_path:
+        write_report(report, report_path)
+        print(f"✅ 리포트 저장: {report_path}")
+    return report
+
+
+def add_batch_arguments(parser):
+    """봇 main() 들이 같이 쓰는 일괄 실행 옵션"""
+    parser.add_argument("--batch", metavar="FILE", help="대본 파일(JSON/JSONL)을 일괄 실행 (없으면 대화 모드)")
+    _add_run_arguments(parser)
+
+
+def _add_run_arguments(parser):
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="동시에 실행할 대본 수")
+    parser.add_argument("--report", default=None, help="리포트 JSON 저장 경로")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="버거하우스 챗봇 대본 일괄 실행")
+    parser.add_argument("transcripts", help="대본 파일 (JSON/JSONL)")
+    parser.add_argument("--bot", choices=("v1", "v2"), default="v2", help="v1: BurgerBot, v2: BurgerBotV2")
+    _add_run_arguments(parser)
+    args = parser.parse_args()
+
+    if args.bot == "v1":
+        from BurgerBot import BurgerBot as bot_class
+    else:
+        from BurgerBotV2 import BurgerBotV2 as bot_class
+    run_batch_cli(bot_class, args.transcripts, args.workers, args.report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+# 주문 블록 파서 마이크로벤치마크: 기존 split 기반 parse_orders_from_response vs order_parser.OrderBlockParser
+# - 실행: python bench_order_parser.py --orders 1 4 8 16 --repeat 500
+# - 두 구현이 같은 add_* 호출을 만드는지 먼저 확인한 뒤 시간을 비교
+# - 전체: 응답 전체를 한 번에 파싱/등록하는 시간 (비스트리밍 경로) - 배율은 이 두 값의 비교
+# - 스트리밍: 조각마다 feed() 하는 비용까지 모두 더한 신규 파서의 총 시간
+# - 종료 후: 그중 마지막 조각 이후 턴 종료까지 남는 close() + 등록 시간 (턴 종료 지연에만 영향)
+# 배율은 전체 대 전체로만 보고합니다. 신규 파서는 줄마다 값의 공백을 지우지 않고 숫자 변환표(_NUMBERS)로
+# 바로 변환하므로 주문이 여러 개(4개 이상)인 응답에서 기존보다 빠르고, 블록이 하나뿐이면
+# 파서 생성/마무리 고정 비용 때문에 기존이 조금 더 빠릅니다.
+import argparse
+import random
+import time
+import timeit
+
+from order_parser import OrderBlockParser, register_orders
+
+ORDER_BLOCK_TEMPLATES = [
+    "TYPE: set\nSET_TYPE: burger_set\nBURGER: {burger}\nSIDE: 60\nDRINK: 78\nQUANTITY: {quantity}",
+    "TYPE: set\nSET_TYPE: burger_combo\nBURGER: {burger}\nTOPPINGS: 101, 102\nDRINK: 15\nQUANTITY: {quantity}",
+    "TYPE: set\nSET_TYPE: chicken_full_pack\nCHICKEN: 31\nSAUCE: 41\nQUANTITY: {quantity}",
+    "TYPE: single\nBURGER: {burger}\nTOPPINGS: 103\nQUANTITY: {quantity}",
+    "TYPE: single\nDRINK: 15\nQUANTITY: {quantity}",
+    "TYPE: single\nSIDE: 60\nQUANTITY: {quantity}",
+]
+
+
+class RecordingSink:
+    """봇 대신 add_* 호출만 기록하는 객체 (DB/OpenAI 없이 비교하기 위해)"""
+
+    def __init__(self):
+        self.order_list = []
+
+    def add_burger_set_order(self, burger_id, side_id=None, drink_id=None, quantity=1, burger_toppings=None):
+        self.order_list.append(("burger_set", burger_id, side_id, drink_id, quantity, burger_toppings))
+        return self.order_list[-1]
+
+    def add_burger_combo_order(self, burger_id, drink_id=None, quantity=1, burger_toppings=None):
+        self.order_list.append(("burger_combo", burger_id, drink_id, quantity, burger_toppings))
+        return self.order_list[-1]
+
+    def add_chicken_full_pack_order(self, chicken_id, sauce_id=None, quantity=1):
+        self.order_list.append(("chicken_full_pack", chicken_id, sauce_id, quantity))
+        return self.order_list[-1]
+
+    def add_chicken_half_pack_order(self, chicken_id, sauce_id=None, quantity=1):
+        self.order_list.append(("chicken_half_pack", chicken_id, sauce_id, quantity))
+        return self.order_list[-1]
+
+    def add_single_order(self, item_id, item_type, quantity=1, toppings=None):
+        self.order_list.append(("single", item_type, item_id, quantity, toppings))
+        return self.order_list[-1]
+
+
+def legacy_parse_orders(bot, response):
+    """기존 BurgerBotV2.parse_orders_from_response 구현 (비교 기준)"""
+    if "[ORDER_COMPLETE]" not in response:
+        return []
+
+    orders_added = []
+    parts = response.split("[ORDER_COMPLETE]")
+
+    for i in range(1, len(parts)):
+        try:
+            order_section = parts[i].strip()
+            lines = [line.strip() for line in order_section.split('\n') if line.strip()]
+
+            order_data = {}
+            for line in lines:
+                if ':' in line:
+                    key, value = line.split(':', 1)
+                    order_data[key.strip()] = value.strip()
+
+            order_type = order_data.get('TYPE')
+            if not order_type:
+                continue
+
+            quantity = int(order_data.get('QUANTITY', 1))
+
+            if order_type == 'set':
+                set_type = order_data.get('SET_TYPE', 'burger_set')
+                order = None
+
+                if set_type == 'burger_set':
+                    burger_id = order_data.get('BURGER')
+                    if not burger_id:
+                        continue
+                    burger_toppings = None
+                    if 'TOPPINGS' in order_data:
+                        toppings_str = order_data['TOPPINGS']
+                        burger_toppings = [int(t.strip()) for t in toppings_str.split(',') if t.strip().isdigit()]
+                    side_id = int(order_data.get('SIDE', 10))
+                    drink_id = int(order_data.get('DRINK', 15))
+                    order = bot.add_burger_set_order(int(burger_id), side_id, drink_id, quantity, burger_toppings)
+
+                elif set_type == 'burger_combo':
+                    burger_id = order_data.get('BURGER')
+                    if not burger_id:
+                        continue
+                    burger_toppings = None
+                    if 'TOPPINGS' in order_data:
+                        toppings_str = order_data['TOPPINGS']
+                        burger_toppings = [int(t.strip()) for t in toppings_str.split(',') if t.strip().isdigit()]
+                    drink_id = int(order_data.get('DRINK', 15))
+                    order = bot.add_burger_combo_order(int(burger_id), drink_id, quantity, burger_toppings)
+
+                elif set_type == 'chicken_full_pack':
+                    chicken_id = order_data.get('CHICKEN')
+                    if not chicken_id:
+                        continue
+                    sauce_id = int(order_data.get('SAUCE', 40))
+                    order = bot.add_chicken_full_pack_order(int(chicken_id), sauce_id, quantity)
+
+                elif set_type == 'chicken_half_pack':
+                    chicken_id = order_data.get('CHICKEN')
+                    if not chicken_id:
+                        continue
+                    sauce_id = int(order_data.get('SAUCE', 40))
+                    order = bot.add_chicken_half_pack_order(int(chicken_id), sauce_id, quantity)
+
+                if order:
+                    orders_added.append(order)
+
+            elif order_type == 'single':
+                order = None
+                if 'BURGER' in order_data:
+                    toppings = None
+                    if 'TOPPINGS' in order_data:
+                        toppings_str = order_data['TOPPINGS']
+                        toppings = [int(t.strip()) for t in toppings_str.split(',') if t.strip().isdigit()]
+                    order = bot.add_single_order(int(order_data['BURGER']), 'burger', quantity, toppings)
+                elif 'CHICKEN' in order_data:
+                    order = bot.add_single_order(int(order_data['CHICKEN']), 'chicken', quantity)
+                elif 'SIDE' in order_data:
+                    order = bot.add_single_order(int(order_data['SIDE']), 'side', quantity)
+                elif 'DRINK' in order_data:
+                    order = bot.add_single_order(int(order_data['DRINK']), 'drink', quantity)
+                elif 'SAUCE' in order_data:
+                    order = bot.add_single_order(int(order_data['SAUCE']), 'sauce', quantity)
+
+                if order:
+                    orders_added.append(order)
+
+        except Exception as e:
+            print(f"주문 파싱 중 오류: {e}")
+            continue
+
+    return orders_added
+
+
+def build_response(order_count, seed=0):
+    """안내 문장 뒤에 주문 블록이 order_count 개 붙은 응답"""
+    rng = random.Random(seed)
+    blocks = [
+        rng.choice(ORDER_BLOCK_TEMPLATES).format(burger=rng.randint(1, 30), quantity=rng.randint(1, 3))
+        for _ in range(order_count)
+    ]
+    intro = "주문 확인해드리겠습니다. 1) 데리버거 세트 (양념감자 (어니언), 펩시 제로슈거 콜라 (라지))\n확인 부탁드립니다.\n\n"
+    return intro + "".join(f"[ORDER_COMPLETE]\n{block}\n\n" for block in blocks)
+
+
+def split_chunks(text, size):
+    return [text[index:index + size] for index in range(0, len(text), size)]
+
+
+def parse_new(response):
+    sink = RecordingSink()
+    parser = OrderBlockParser()
+    parser.feed(response)
+    register_orders(sink, parser)
+    return sink.order_list
+
+
+def parse_new_streaming(chunks):
+    sink = RecordingSink()
+    parser = OrderBlockParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    register_orders(sink, parser)
+    return sink.order_list
+
+
+def time_interleaved(functions, repeat, rounds=15):
+    """
+    함수들을 한 라운드씩 번갈아 재서 각각의 최소 평균 시간을 반환
+    (한 구현을 연달아 재면 그동안의 부하가 한쪽에만 몰리므로 번갈아 측정)
+    """
+    best = [float("inf")] * len(functions)
+    for _ in range(rounds):
+        for index, function in enumerate(functions):
+            best[index] = min(best[index], timeit.timeit(function, number=repeat) / repeat)
+    return best
+
+
+def time_stream_end(chunks, repeat):
+    """스트리밍 조각을 모두 넣은 파서에서 close() + 등록에 걸리는 평균 시간"""
+    best = None
+    for _ in range(5):
+        parsers = []
+        for _ in range(repeat):
+            parser = OrderBlockParser()
+            for chunk in chunks:
+                parser.feed(chunk)
+            parsers.append(parser)
+        started = time.perf_counter()
+        for parser in parsers:
+            register_orders(RecordingSink(), parser)
+        elapsed = (time.perf_counter() - started) / repeat
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def parse_legacy(response):
+    sink = RecordingSink()
+    legacy_parse_orders(sink, response)
+    return sink.order_list
+
+
+def main():
+    parser = argparse.ArgumentParser(description="주문 블록 파서 마이크로벤치마크")
+    parser.add_argument("--orders", type=int, nargs="+", default=[1, 4, 8, 16], help="응답 하나에 들어가는 주문 블록 수")
+    parser.add_argument("--repeat", type=int, default=500, help="라운드마다 반복 횟수 (라운드 15번을 번갈아 측정)")
+    parser.add_argument("--chunk-size", type=int, default=4, help="스트리밍 비교 시 조각 크기(글자)")
+    args = parser.parse_args()
+
+    print(
+        f"{'주문 수':>6} {'기존 전체(µs)':>13} {'신규 전체(µs)':>13} {'전체 배율':>9}"
+        f" {'신규 스트리밍(µs)':>17} {'그중 종료 후(µs)':>16}"
+    )
+    for order_count in args.orders:
+        response = build_response(order_count)
+        chunks = split_chunks(response, args.chunk_size)
+        expected = parse_legacy(response)
+        if parse_new(response) != expected or parse_new_streaming(chunks) != expected:
+            print(f"❌ 주문 {order_count}개: 두 구현의 결과가 다릅니다.")
+            continue
+
+        # 스트리밍 총 비용: 조각을 하나씩 feed() 한 뒤 close() + 등록까지
+        legacy, new, stream_total = time_interleaved(
+            [lambda: parse_legacy(response), lambda: parse_new(response), lambda: parse_new_streaming(chunks)],
+            args.repeat
+        )
+        stream_end = time_stream_end(chunks, args.repeat)
+        # 배율 > 1 이면 신규 파서가 빠름 (기존 전체 / 신규 전체)
+        print(
+            f"{order_count:>6} {legacy * 1e6:>13.1f} {new * 1e6:>13.1f} {legacy / new:>8.2f}x"
+            f" {stream_total * 1e6:>17.1f} {stream_end * 1e6:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
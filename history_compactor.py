@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import threading
+
+SUMMARY_HEADER = "[이전 대화 요약]"
+ORDER_STATE_HEADER = "[현재 주문 상태]"
+
+SUMMARY_PROMPT = """아래는 매장 주문 챗봇과 손님의 이전 대화입니다.
+다음 응답에 필요한 정보만 한국어로 간결하게 요약하세요.
+- 손님이 고른 메뉴, 수량, 옵션(토핑/사이드/음료/소스/사이즈 등)과 변경·취소 내역
+- 아직 확인하지 않은 항목, 손님의 요청사항
+- 인사말이나 메뉴 설명 같은 반복 내용은 제외"""
+
+# 메시지 하나당 role/구분자 토큰 (대략적인 값)
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+def estimate_tokens(text):
+    """
+    토큰 수 근사치 (tiktoken 없이)
+
+    한글은 대략 1글자(UTF-8 3바이트)당 1토큰, 영어는 4글자당 1토큰 정도이므로
+    UTF-8 바이트 수 / 3 으로 계산합니다.
+    """
+    if not text:
+        return 0
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def _orders_json(order_list):
+    # OrderList 는 캐시된 compact JSON 을 그대로 사용
+    to_json = getattr(order_list, "to_json", None)
+    if to_json is not None:
+        return to_json()
+    return json.dumps(order_list, ensure_ascii=False, separators=(",", ":"))
+
+
+def estimate_message_tokens(message):
+    tokens = MESSAGE_TOKEN_OVERHEAD + estimate_tokens(message.get("content"))
+    for tool_call in message.get("tool_calls") or []:
+        tokens += MESSAGE_TOKEN_OVERHEAD + estimate_tokens(tool_call["function"]["arguments"])
+    return tokens
+
+
+def is_summary_message(message):
+    return message.get("role") == "system" and (message.get("content") or "").startswith(SUMMARY_HEADER)
+
+
+class HistoryCompactor:
+    """
+    conversation_history 토큰 예산 관리
+
+    - system prompt 와 최근 keep_turns 턴은 항상 그대로 유지
+    - 예산(token_budget, system prompt 제외)을 넘으면 오래된 턴을 요약 메시지 하나로 교체
+    - 요약은 턴이 끝난 뒤 백그라운드 스레드에서 만들고(schedule),
+      다음 요청이 시작될 때 완성된 요약만 끼워 넣음(apply) - 응답 경로에서 기다리지 않음
+    - 턴 경계는 user 메시지 기준이라 tool_calls 와 tool 결과가 분리되지 않음
+    """
+
+    def __init__(self, client, token_budget=None, keep_turns=None,
+                 model="gpt-4o-mini", summary_max_tokens=300):
+        self.client = client
+        self.token_budget = token_budget or int(os.getenv("HISTORY_TOKEN_BUDGET", "2000"))
+        self.keep_turns = keep_turns or int(os.getenv("HISTORY_KEEP_TURNS", "4"))
+        self.model = model
+        self.summary_max_tokens = summary_max_tokens
+        self.compactions = 0
+
+        self._lock = threading.Lock()
+        self._worker = None
+        self._pending = None  # (history 리스트, 잘라낼 마지막 메시지, 요약문)
+
+    def history_tokens(self, history):
+        """system prompt 를 제외한 대화 토큰 추정치"""
+        start = 1 if history and history[0]["role"] == "system" else 0
+        return sum(estimate_message_tokens(message) for message in history[start:])
+
+    def _cut_index(self, history):
+        """최근 keep_turns 턴이 시작되는 위치 (user 메시지 위치). 요약할 것이 없으면 None"""
+        start = 1 if history and history[0]["role"] == "system" else 0
+        user_positions = [
+            index for index in range(start, len(history))
+            if history[index]["role"] == "user"
+        ]
+        if len(user_positions) <= self.keep_turns:
+            return None
+
+        cut = user_positions[-self.keep_turns]
+        # 요약할 내용이 기존 요약 하나뿐이면 다시 요약하지 않음
+        if cut - start <= 1 and is_summary_message(history[start]):
+            return None
+        return cut
+
+    def schedule(self, history, order_list=None):
+        """턴이 끝난 뒤 호출 - 예산을 넘었으면 오래된 턴 요약을 백그라운드로 시작"""
+        if self.history_tokens(history) <= self.token_budget:
+            return False
+
+        cut = self._cut_index(history)
+        if cut is None:
+            return False
+
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return False
+            start = 1 if history[0]["role"] == "system" else 0
+            old_messages = list(history[start:cut])
+            orders = _orders_json(order_list) if order_list else None
+            self._pending = None
+            self._worker = threading.Thread(
+                target=self._summarize,
+                args=(history, old_messages, orders),
+                daemon=True
+            )
+            self._worker.start()
+        return True
+
+    def apply(self, history, order_list=None):
+        """
+        요청 시작 시 호출 - 완성된 요약이 있으면 오래된 턴을 요약 메시지로 교체
+
+        요약하는 동안 대화가 초기화(clear_history, load_state 등)되었다면 버립니다.
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = None
+        if pending is None:
+            return False
+
+        source, last_old_message, summary = pending
+        if source is not history:
+            return False
+
+        start = 1 if history and history[0]["role"] == "system" else 0
+        cut = None
+        for index in range(start, len(history)):
+            if history[index] is last_old_message:
+                cut = index + 1
+                break
+        if cut is None:
+            return False
+
+        content = f"{SUMMARY_HEADER}\n{summary}"
+        if order_list:
+            orders = _orders_json(order_list)
+            content += f"\n{ORDER_STATE_HEADER}\n{orders}"
+
+        history[start:cut] = [{"role": "system", "content": content}]
+        self.compactions += 1
+        return True
+
+    def wait(self, timeout=None):
+        """백그라운드 요약이 끝날 때까지 대기 (종료 시/배치 실행용)"""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    def _summarize(self, history, old_messages, orders):
+        try:
+            transcript = []
+            for message in old_messages:
+                if is_summary_message(message):
+                    transcript.append(message["content"])
+                elif message["role"] in ("user", "assistant") and message.get("content"):
+                    transcript.append(f"{message['role']}: {message['content']}")
+            if orders:
+                transcript.append(f"{ORDER_STATE_HEADER}\n{orders}")
+
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": "\n".join(transcript)}
+                ],
+                max_tokens=self.summary_max_tokens,
+                temperature=0
+            )
+            summary = (response.choices[0].message.content or "").strip()
+            if not summary:
+                return
+
+            with self._lock:
+                self._pending = (history, old_messages[-1], summary)
+
+        except Exception as e:
+            print(f"❌ 대화 요약 실패: {e}")
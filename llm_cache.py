@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+# chat.completions 응답 record/replay 캐시 (회귀 테스트, 데모 키오스크용)
+# - 키: model, messages, tools, 샘플링 파라미터 등 요청 인자 전체를 정렬된 JSON 으로 만든 sha256
+# - 모드: record (있으면 재생, 없으면 호출 후 기록) | replay (기록만 사용, 없으면 LLMCacheMiss) | passthrough
+# - 저장: SQLite 파일 (zlib 압축 JSON) + 메모리 LRU
+# - 사용: LLM_CACHE_MODE=record python app.py  (openai_client.py 가 공유 클라이언트를 감쌈)
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+CACHE_MODES = ("record", "replay", "passthrough")
+
+# 응답 내용에 영향을 주지 않는 요청 인자 (키에서 제외)
+IGNORED_REQUEST_KEYS = ("timeout", "extra_headers", "extra_query")
+
+
+class LLMCacheMiss(Exception):
+    """replay 모드에서 기록되지 않은 요청을 받았을 때 발생"""
+
+    def __init__(self, key, model):
+        super().__init__(f"기록된 응답이 없습니다 (model: {model}, key: {key[:12]})")
+        self.key = key
+        self.model = model
+
+
+def _json_default(value):
+    # conversation_history 에 SDK 객체(pydantic)가 섞여 있어도 같은 키가 나오도록 dict 로 변환
+    if hasattr(value, "model_dump"):
+        return value.model_dump(exclude_unset=True)
+    raise TypeError(f"JSON 으로 변환할 수 없는 값: {type(value).__name__}")
+
+
+def request_key(request):
+    """요청 인자의 안정적인 해시 (dict 순서, 공백과 무관)"""
+    normalized = {key: value for key, value in request.items() if key not in IGNORED_REQUEST_KEYS}
+    payload = json.dumps(normalized, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=_json_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    요청 해시 → 기록된 응답 저장소
+
+    - 비스트리밍: {"stream": False, "response": ChatCompletion dict}
+    - 스트리밍: {"stream": True, "chunks": [[요청 후 경과 시간(초), ChatCompletionChunk dict], ...]}
+    - realtime=True 이면 스트리밍 재생 시 기록된 청크 간격을 그대로 재현 (기본값: 지연 없이 재생)
+    """
+
+    def __init__(self, db_path, mode="record", memory_entries=256, realtime=False):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"알 수 없는 캐시 모드: {mode} ({', '.join(CACHE_MODES)})")
+        self.db_path = db_path
+        self.mode = mode
+        self.memory_entries = memory_entries
+        self.realtime = realtime
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+        db_directory = os.path.dirname(db_path)
+        if db_directory and not os.path.exists(db_directory):
+            os.makedirs(db_directory)
+
+        connection = self._connection()
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                request_key TEXT PRIMARY KEY,
+                model TEXT,
+                stream INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        connection.commit()
+
+    def _connection(self):
+        # sqlite3 연결은 스레드 간에 공유하지 않음
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """기록된 응답 (없으면 None) - 메모리 LRU → 파일 순으로 찾음"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        row = self._connection().execute(
+            "SELECT payload FROM llm_responses WHERE request_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        entry = json.loads(zlib.decompress(row[0]).decode("utf-8"))
+        self._remember(key, entry)
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key, model, entry):
+        payload = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO llm_responses (request_key, model, stream, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, 1 if entry["stream"] else 0, zlib.compress(payload.encode("utf-8")), time.time())
+            )
+        self._remember(key, entry)
+        with self._lock:
+            self.stores += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "mode": self.mode,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory)
+            }
+
+
+def _replay_response(entry):
+    return ChatCompletion.construct(**entry["response"])
+
+
+def _replay_chunks(entry, realtime):
+    started = time.perf_counter()
+    for offset, data in entry["chunks"]:
+        if realtime:
+            wait = offset - (time.perf_counter() - started)
+            if wait > 0:
+                time.sleep(wait)
+        yield ChatCompletionChunk.construct(**data)
+
+
+async def _areplay_chunks(entry, realtime):
+    started = time.perf_counter()
+    for offset, data in entry["chunks"]:
+        if realtime:
+            wait = offset - (time.perf_counter() - started)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        yield ChatCompletionChunk.construct(**data)
+
+
+class CachedCompletions:
+    """client.chat.completions 대신 사용하는 래퍼 (create 만 가로채고 나머지는 원본으로 전달)"""
+
+    def __init__(self, completions, cache):
+        self._completions = completions
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._completions, name)
+
+    def _lookup(self, request):
+        """(key, 기록된 응답) - passthrough 모드는 (None, None)"""
+        if self.cache.mode == "passthrough":
+            return None, None
+        key = request_key(request)
+        entry = self.cache.get(key)
+        if entry is None and self.cache.mode == "replay":
+            raise LLMCacheMiss(key, request.get("model"))
+        return key, entry
+
+    def create(self, **request):
+        key, entry = self._lookup(request)
+        if entry is not None:
+            if entry["stream"]:
+                return _replay_chunks(entry, self.cache.realtime)
+            return _replay_response(entry)
+
+        started = time.perf_counter()
+        response = self._completions.create(**request)
+        if key is None:
+            return response
+        if request.get("stream"):
+            return self._record_stream(key, request.get("model"), response, started)
+        self.cache.put(key, request.get("model"), {"stream": False, "response": response.to_dict()})
+        return response
+
+    def _record_stream(self, key, model, response, started):
+        # 스트림을 끝까지 받은 경우에만 기록 (중간에 끊긴 응답은 저장하지 않음)
+        chunks = []
+        for chunk in response:
+            chunks.append([round(time.perf_counter() - started, 4), chunk.to_dict()])
+            yield chunk
+        self.cache.put(key, model, {"stream": True, "chunks": chunks})
+
+
+class AsyncCachedCompletions(CachedCompletions):
+    """AsyncOpenAI 용 래퍼 - 파일 조회/저장은 asyncio.to_thread 로 이벤트 루프 밖에서 실행"""
+
+    async def create(self, **request):
+        key, entry = await asyncio.to_thread(self._lookup, request)
+        if entry is not None:
+            if entry["stream"]:
+                return _areplay_chunks(entry, self.cache.realtime)
+            return _replay_response(entry)
+
+        started = time.perf_counter()
+        response = await self._completions.create(**request)
+        if key is None:
+            return response
+        if request.get("stream"):
+            return self._arecord_stream(key, request.get("model"), response, started)
+        await asyncio.to_thread(
+            self.cache.put, key, request.get("model"), {"stream": False, "response": response.to_dict()}
+        )
+        return response
+
+    async def _arecord_stream(self, key, model, response, started):
+        chunks = []
+        async for chunk in response:
+            chunks.append([round(time.perf_counter() - started, 4), chunk.to_dict()])
+            yield chunk
+        await asyncio.to_thread(self.cache.put, key, model, {"stream": True, "chunks": chunks})
+
+
+class _CachedChat:
+    def __init__(self, chat, completions):
+        self._chat = chat
+        self.completions = completions
+
+    def __getattr__(self, name):
+        return getattr(self._chat, name)
+
+
+class CachedOpenAIClient:
+    """OpenAI / AsyncOpenAI 클라이언트를 감싸 chat.completions.create 만 캐시를 거치게 함"""
+
+    def __init__(self, client, cache, completions_class=CachedCompletions):
+        self._client = client
+        self.cache = cache
+        self.chat = _CachedChat(client.chat, completions_class(client.chat.completions, cache))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """
+    환경 변수로 설정한 프로세스 공유 캐시 (LLM_CACHE_MODE 가 없거나 passthrough 면 None)
+
+    - LLM_CACHE_MODE: record | replay | passthrough
+    - LLM_CACHE_PATH: 저장 파일 경로 (기본값: data/llm_cache.db)
+    - LLM_CACHE_MEMORY_ENTRIES: 메모리 LRU 크기 (기본값 256)
+    - LLM_CACHE_REALTIME=1: 스트리밍 재생 시 기록된 청크 간격 재현
+    """
+    global _cache
+    mode = os.getenv("LLM_CACHE_MODE", "passthrough").lower()
+    if mode == "passthrough":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                db_path = os.getenv("LLM_CACHE_PATH") or os.path.join(os.path.dirname(__file__), "data", "llm_cache.db")
+                _cache = LLMResponseCache(
+                    db_path,
+                    mode=mode,
+                    memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256")),
+                    realtime=os.getenv("LLM_CACHE_REALTIME", "0").lower() in ("1", "true", "on", "yes")
+                )
+                print(f"✅ LLM 응답 캐시 사용 (모드: {mode}, 경로: {db_path})")
+    return _cache
+
+
+def wrap_openai_client(client, async_client=False):
+    """캐시가 설정되어 있으면 클라이언트를 감싸서 반환 (없으면 그대로 반환)"""
+    cache = get_llm_cache()
+    if cache is None:
+        return client
+    return CachedOpenAIClient(client, cache, AsyncCachedCompletions if async_client else CachedCompletions)
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+# app.py / async_app.py 부하 테스트 도구 (표준 라이브러리만 사용)
+# - 가상 손님 여러 명이 동시에 /new_session → /chat (스트리밍/비스트리밍) → /orders 를 반복
+# - 처리량, SSE 첫 바이트 시간(TTFB), 턴 지연 p50/p95/p99, 서버 RSS 변화를 보고
+#
+# 예)
+#   python stub_openai_server.py --port 8001 &
+#   OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=stub python app.py &
+#   python load_test.py --base-url http://127.0.0.1:5000 --customers 50 --turns 5 --server-pid <앱 PID>
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.request
+import uuid
+
+from percentiles import percentile
+
+CUSTOMER_MESSAGES = [
+    "안녕하세요, 메뉴 추천해 주세요",
+    "불고기버거 세트 하나 주세요",
+    "음료는 콜라로 해주세요",
+    "새우버거 단품도 하나 추가요",
+    "토핑으로 치즈 추가할 수 있나요?",
+    "주문 확인해 주세요",
+]
+
+
+def read_rss_kib(pid):
+    """/proc/<pid>/status 의 VmRSS (KiB). 읽을 수 없으면 None"""
+    try:
+        with open(f"/proc/{pid}/status", "r") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+class LoadStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.turn_seconds = {"stream": [], "non_stream": []}
+        self.ttfb_seconds = []
+        self.order_seconds = []
+        self.turns = 0
+        self.errors = 0
+        self.error_samples = []
+
+    def add_turn(self, mode, seconds, ttfb=None):
+        with self.lock:
+            self.turns += 1
+            self.turn_seconds[mode].append(seconds)
+            if ttfb is not None:
+                self.ttfb_seconds.append(ttfb)
+
+    def add_orders(self, seconds):
+        with self.lock:
+            self.order_seconds.append(seconds)
+
+    def add_error(self, message):
+        with self.lock:
+            self.errors += 1
+            if len(self.error_samples) < 5:
+                self.error_samples.append(message)
+
+
+class Customer:
+    """가상 손님 한 명 - 세션 하나로 turns 번 대화하고 주문 내역을 조회"""
+
+    def __init__(self, base_url, stats, turns, stream_ratio, timeout, rng):
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats
+        self.turns = turns
+        self.stream_ratio = stream_ratio
+        self.timeout = timeout
+        self.random = rng
+        self.session_id = f"load-{uuid.uuid4().hex[:12]}"
+
+    def _request(self, path, payload=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(
+            f"{self.base_url}{path}",
+            data=data,
+            headers={"Content-Type": "application/json"} if data is not None else {}
+        )
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def run(self):
+        try:
+            with self._request("/new_session", {"session_id": self.session_id}) as response:
+                response.read()
+        except Exception as e:
+            self.stats.add_error(f"new_session: {e}")
+            return
+
+        for turn in range(self.turns):
+            message = CUSTOMER_MESSAGES[turn % len(CUSTOMER_MESSAGES)]
+            try:
+                if self.random.random() < self.stream_ratio:
+                    self._chat_stream(message)
+                else:
+                    self._chat(message)
+                self._orders()
+            except Exception as e:
+                self.stats.add_error(f"turn {turn}: {e}")
+
+    def _chat_stream(self, message):
+        started = time.perf_counter()
+        ttfb = None
+        completed = False
+        payload = {"message": message, "session_id": self.session_id, "streaming": True}
+        with self._request("/chat", payload) as response:
+            for raw_line in response:
+                if ttfb is None:
+                    ttfb = time.perf_counter() - started
+                line = raw_line.decode("utf-8").strip()
+                if not line.startswith("data: "):
+                    continue
+                event = json.loads(line[6:])
+                if "error" in event:
+                    raise RuntimeError(event["error"])
+                if event.get("complete"):
+                    completed = True
+        if not completed:
+            raise RuntimeError("스트림이 complete 이벤트 없이 끝났습니다.")
+        self.stats.add_turn("stream", time.perf_counter() - started, ttfb)
+
+    def _chat(self, message):
+        started = time.perf_counter()
+        payload = {"message": message, "session_id": self.session_id, "streaming": False}
+        with self._request("/chat", payload) as response:
+            body = json.loads(response.read())
+        if "error" in body:
+            raise RuntimeError(body["error"])
+        self.stats.add_turn("non_stream", time.perf_counter() - started)
+
+    def _orders(self):
+        started = time.perf_counter()
+        with self._request(f"/orders/{self.session_id}") as response:
+            body = json.loads(response.read())
+        if "error" in body:
+            raise RuntimeError(body["error"])
+        self.stats.add_orders(time.perf_counter() - started)
+
+
+def monitor(stats, server_pid, interval, stop_event, started, samples):
+    """주기적으로 진행 상황과 서버 RSS 출력"""
+    while not stop_event.wait(interval):
+        elapsed = time.perf_counter() - started
+        rss = read_rss_kib(server_pid) if server_pid else None
+        if rss is not None:
+            samples.append((elapsed, rss))
+        with stats.lock:
+            turns, errors = stats.turns, stats.errors
+        rss_text = f", 서버 RSS {rss / 1024:.1f} MiB" if rss is not None else ""
+        print(f"[{elapsed:6.1f}s] 턴 {turns} ({turns / elapsed:.1f}/s), 오류 {errors}{rss_text}")
+
+
+def run_load_test(base_url, customers=20, turns=4, stream_ratio=0.8, ramp_up=1.0,
+                  timeout=120.0, server_pid=None, interval=2.0, seed=None):
+    """가상 손님들을 동시에 실행하고 결과 dict 를 반환합니다."""
+    stats = LoadStats()
+    rng = random.Random(seed)
+    rss_samples = []
+    rss_start = read_rss_kib(server_pid) if server_pid else None
+
+    started = time.perf_counter()
+    stop_event = threading.Event()
+    monitor_thread = threading.Thread(
+        target=monitor, args=(stats, server_pid, interval, stop_event, started, rss_samples), daemon=True
+    )
+    monitor_thread.start()
+
+    threads = []
+    for index in range(customers):
+        customer = Customer(base_url, stats, turns, stream_ratio, timeout, random.Random(rng.random()))
+        thread = threading.Thread(target=customer.run, daemon=True)
+        threads.append(thread)
+        thread.start()
+        if ramp_up and customers > 1:
+            time.sleep(ramp_up / customers)
+
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop_event.set()
+    monitor_thread.join()
+
+    rss_end = read_rss_kib(server_pid) if server_pid else None
+    all_turns = stats.turn_seconds["stream"] + stats.turn_seconds["non_stream"]
+    report = {
+        "customers": customers,
+        "elapsed_seconds": round(elapsed, 3),
+        "turns": stats.turns,
+        "errors": stats.errors,
+        "error_samples": stats.error_samples,
+        "throughput_turns_per_second": round(stats.turns / elapsed, 2) if elapsed else 0.0,
+        "turn_seconds": {
+            "p50": round(percentile(all_turns, 0.5), 4),
+            "p95": round(percentile(all_turns, 0.95), 4),
+            "p99": round(percentile(all_turns, 0.99), 4),
+        },
+        "stream_ttfb_seconds": {
+            "p50": round(percentile(stats.ttfb_seconds, 0.5), 4),
+            "p95": round(percentile(stats.ttfb_seconds, 0.95), 4),
+            "p99": round(percentile(stats.ttfb_seconds, 0.99), 4),
+        },
+        "orders_seconds_p99": round(percentile(stats.order_seconds, 0.99), 4),
+        "stream_turns": len(stats.turn_seconds["stream"]),
+        "non_stream_turns": len(stats.turn_seconds["non_stream"]),
+    }
+    if server_pid:
+        peak = max([rss for _, rss in rss_samples] + [rss for rss in (rss_start, rss_end) if rss is not None] or [0])
+        report["server_rss_kib"] = {"start": rss_start, "end": rss_end, "peak": peak}
+    return report
+
+
+def print_report(report):
+    print("\n=== 부하 테스트 결과 ===")
+    print(f"가상 손님: {report['customers']}명, 소요 시간: {report['elapsed_seconds']}초")
+    print(f"턴: {report['turns']} (스트리밍 {report['stream_turns']} / 비스트리밍 {report['non_stream_turns']}), 오류: {report['errors']}")
+    print(f"처리량: {report['throughput_turns_per_second']} 턴/초")
+    turn = report["turn_seconds"]
+    print(f"턴 지연: p50 {turn['p50']}s, p95 {turn['p95']}s, p99 {turn['p99']}s")
+    ttfb = report["stream_ttfb_seconds"]
+    print(f"SSE TTFB: p50 {ttfb['p50']}s, p95 {ttfb['p95']}s, p99 {ttfb['p99']}s")
+    print(f"/orders p99: {report['orders_seconds_p99']}s")
+    if "server_rss_kib" in report:
+        rss = report["server_rss_kib"]
+        to_mib = lambda value: f"{value / 1024:.1f} MiB" if value else "-"
+        print(f"서버 RSS: 시작 {to_mib(rss['start'])}, 최대 {to_mib(rss['peak'])}, 종료 {to_mib(rss['end'])}")
+    for sample in report["error_samples"]:
+        print(f"❌ {sample}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="버거하우스 챗봇 부하 테스트")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--customers", type=int, default=20, help="동시 가상 손님 수")
+    parser.add_argument("--turns", type=int, default=4, help="손님 한 명당 대화 턴 수")
+    parser.add_argument("--stream-ratio", type=float, default=0.8, help="스트리밍 요청 비율")
+    parser.add_argument("--ramp-up", type=float, default=1.0, help="손님을 모두 투입하는 데 걸리는 시간(초)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--server-pid", type=int, default=None, help="RSS 를 관찰할 서버 프로세스 PID (Linux)")
+    parser.add_argument("--interval", type=float, default=2.0, help="진행 상황 출력 간격(초)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON 으로 출력")
+    args = parser.parse_args()
+
+    report = run_load_test(
+        args.base_url,
+        customers=args.customers,
+        turns=args.turns,
+        stream_ratio=args.stream_ratio,
+        ramp_up=args.ramp_up,
+        timeout=args.timeout,
+        server_pid=args.server_pid,
+        interval=args.interval,
+        seed=args.seed
+    )
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+from menu_search import MenuSearchIndex, normalize_search_text
+
+CATALOG_QUERY = """
+SELECT
+    A.MENU_ID,
+    B.CATEGORY_NAME,
+    A.MENU_NAME,
+    A.MENU_PRICE
+FROM MENU A, MenuCategory B
+WHERE A.CATEGORY_ID = B.CATEGORY_ID
+ORDER BY A.MENU_ID
+"""
+
+
+def normalize_menu_name(name):
+    """이름 비교용 정규화 (공백/기호 제거, 소문자, 로마 숫자 → 숫자)"""
+    return normalize_search_text(name)
+
+
+class MenuCatalog:
+    """
+    메뉴 전체를 메모리에 올려두고 인덱스로 조회하는 카탈로그
+
+    - 메뉴 ID / 카테고리명 / 정규화된 메뉴명 별 dict 인덱스
+    - get_menu_info 도구 호출은 SQL 없이 O(1) 또는 O(k) 로 응답
+    - 메뉴가 바뀌면 reload() 또는 menu_snapshot.invalidate_menu_snapshot() 으로 다시 적재
+    """
+
+    def __init__(self, rows=()):
+        self.loaded = False
+        self._build(rows)
+
+    @classmethod
+    def from_pool(cls, db_pool):
+        catalog = cls()
+        catalog.reload(db_pool)
+        return catalog
+
+    def reload(self, db_pool):
+        """DB에서 메뉴를 다시 읽어 인덱스를 새로 만듭니다."""
+        try:
+            if not db_pool:
+                print("❌ 데이터베이스 연결이 없습니다.")
+                return False
+
+            with db_pool.connection() as connection:
+                rows = connection.execute(CATALOG_QUERY).fetchall()
+
+            self._build(
+                (row["MENU_ID"], row["CATEGORY_NAME"], row["MENU_NAME"], row["MENU_PRICE"])
+                for row in rows
+            )
+            self.loaded = True
+            return True
+
+        except Exception as e:
+            print(f"❌ 메뉴 카탈로그 로드 실패: {e}")
+            return False
+
+    def _build(self, rows):
+        items = []
+        by_id = {}
+        by_category = {}
+        by_name = {}
+
+        for menu_id, category, name, price in rows:
+            item = {
+                "menu_id": menu_id,
+                "category": category,
+                "name": name,
+                "price": price
+            }
+            items.append(item)
+            by_id[menu_id] = item
+            by_category.setdefault(category, []).append(item)
+            by_name.setdefault(normalize_menu_name(name), []).append(item)
+
+        # 교체는 한 번에 (다른 스레드가 읽는 중이어도 일관된 인덱스를 보게 함)
+        self.items = items
+        self.by_id = by_id
+        self.by_category = by_category
+        self.by_name = by_name
+        # 카테고리명 → 메뉴ID 순서 (기존 ORDER BY CATEGORY_NAME, MENU_ID 와 동일)
+        self.sorted_items = sorted(items, key=lambda item: (item["category"], item["menu_id"]))
+        self.id_name_list = [{"menu_id": item["menu_id"], "menu_name": item["name"]} for item in items]
+        self.search_index = MenuSearchIndex(self.sorted_items)
+
+    def get(self, menu_id):
+        """메뉴 ID로 조회 (없으면 None)"""
+        try:
+            return self.by_id.get(int(menu_id))
+        except (TypeError, ValueError):
+            return None
+
+    def in_category(self, category):
+        """카테고리에 속한 메뉴 목록 (메뉴 ID 순)"""
+        return self.by_category.get(category, [])
+
+    def find_by_name(self, name):
+        """공백/대소문자를 무시하고 이름이 정확히 같은 메뉴 목록"""
+        return self.by_name.get(normalize_menu_name(name), [])
+
+    def search(self, query, limit=None):
+        """띄어쓰기/초성/오타를 허용하는 메뉴 검색 (점수 순)"""
+        return self.search_index.search(query, limit)
+
+    def menu_section(self):
+        """system prompt 용 [CATEGORY_NAME]\\nMENU_ID:MENU_NAME 형태의 메뉴 정보"""
+        if not self.loaded:
+            return None
+
+        lines = []
+        current_category = None
+
+        for item in self.sorted_items:
+            # 카테고리가 바뀌면 새로운 카테고리 헤더 추가
+            if item["category"] != current_category:
+                if lines:  # 첫 번째가 아니면 줄바꿈 추가
+                    lines.append("")
+                lines.append(f"[{item['category']}]")
+                current_category = item["category"]
+
+            lines.append(f"{item['menu_id']}:{item['name']}")
+
+        return "\n".join(lines).strip()
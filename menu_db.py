@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# 환경 변수 BURGER_DB_PATH 로 변경 가능 (기본값: C:\data\BurgerDB.db)
+DEFAULT_DB_PATH = os.path.join(r"C:\data", "BurgerDB.db")
+
+
+def get_db_path():
+    """메뉴 데이터베이스 경로를 반환합니다."""
+    return os.getenv("BURGER_DB_PATH") or DEFAULT_DB_PATH
+
+
+class SQLiteConnectionPool:
+    """
+    메뉴 조회 전용 SQLite 커넥션 풀
+
+    - 봇 인스턴스마다 연결을 새로 열지 않고 프로세스 전체에서 공유
+    - connection() 으로 빌려 쓰고 돌려주므로 여러 스레드에서 동시에 사용해도 안전
+    - 읽기 전용(query_only) + WAL + mmap I/O + 넉넉한 page cache 로 설정
+    """
+
+    def __init__(self, db_path, max_idle=4, cache_size_kib=8192, mmap_size=64 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self._idle = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # 디렉토리가 없으면 생성
+        db_directory = os.path.dirname(db_path)
+        if db_directory and not os.path.exists(db_directory):
+            os.makedirs(db_directory)
+            print(f"✅ 디렉토리 생성: {db_directory}")
+
+        self._enable_wal()
+        print(f"✅ SQLite 커넥션 풀 준비 완료! (경로: {db_path})")
+
+    def _enable_wal(self):
+        """WAL 모드는 DB 파일에 기록되므로 쓰기 가능한 연결로 한 번만 설정"""
+        try:
+            connection = sqlite3.connect(self.db_path)
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"❌ WAL 모드 설정 실패 (읽기 전용으로 계속 진행): {e}")
+
+    def _open(self):
+        # 풀에서 꺼낸 연결은 다른 스레드로 넘어갈 수 있음 (한 번에 한 스레드만 사용)
+        connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        connection.row_factory = sqlite3.Row  # 딕셔너리 형태로 결과 반환
+        connection.execute("PRAGMA query_only=ON")
+        connection.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+        connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        connection.execute("PRAGMA temp_store=MEMORY")
+        return connection
+
+    @contextmanager
+    def connection(self):
+        """풀에서 연결을 빌려주고, 사용이 끝나면 돌려받습니다."""
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        if connection is None:
+            connection = self._open()
+
+        try:
+            yield connection
+        finally:
+            with self._lock:
+                if not self._closed and len(self._idle) < self.max_idle:
+                    self._idle.append(connection)
+                    connection = None
+            if connection is not None:
+                connection.close()
+
+    def close_all(self):
+        """풀에 남아있는 연결을 모두 닫습니다."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_menu_db_pool(db_path=None):
+    """경로별로 하나씩 만들어 공유하는 커넥션 풀을 반환합니다."""
+    db_path = db_path or get_db_path()
+    pool = _pools.get(db_path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(db_path)
+            if pool is None:
+                pool = SQLiteConnectionPool(db_path)
+                _pools[db_path] = pool
+    return pool
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+import os
+from array import array
+from itertools import chain
+
+from order_models import DEFAULT_DRINK_ID, DEFAULT_SIDE_ID, BurgerComboOrder, BurgerSetOrder, ChickenPackOrder
+from order_parser import TOOL_MENU_CATEGORIES
+
+try:
+    import numpy as np
+except ImportError:  # numpy 가 없으면 일괄 계산도 파이썬 루프로 처리
+    np = None
+
+# 가격표에 없는 메뉴 (menu_id 0 은 항상 비워 둠)
+MISSING_PRICE = -1
+
+# 세트/콤보에 기본 포함된 사이드/음료 - 이보다 비싼 메뉴로 바꾸면 차액을 추가 (환경 변수로 변경 가능)
+# 가격표를 만들 때 카탈로그에서 사이드/드링크 메뉴인지 확인 (아니면 ValueError)
+BASE_SIDE_ID = int(os.getenv("PRICE_BASE_SIDE_ID", str(DEFAULT_SIDE_ID)))
+BASE_DRINK_ID = int(os.getenv("PRICE_BASE_DRINK_ID", str(DEFAULT_DRINK_ID)))
+
+
+def format_price(amount):
+    return f"{amount:,}원"
+
+
+def _price_ids(line):
+    """
+    주문 줄 → (기본 메뉴 ID, 사이드 ID, 음료 ID) - 사이드/음료는 업그레이드 대상만 (없으면 0)
+
+    - 세트/콤보: BURGER 로 받은 세트/콤보 메뉴 가격 + 사이드/음료 업그레이드 차액 + 토핑
+    - 치킨팩: 팩 메뉴 가격 (포함 소스는 무료)
+    - 단품: 메뉴 가격 + 토핑(버거)
+    """
+    if isinstance(line, BurgerSetOrder):
+        return line.burger_id, line.side_id, line.drink_id
+    if isinstance(line, BurgerComboOrder):
+        return line.burger_id, 0, line.drink_id
+    if isinstance(line, ChickenPackOrder):
+        return line.chicken_id, 0, 0
+    return line.item_id, 0, 0
+
+
+def _toppings(line):
+    return getattr(line, "toppings", None) or ()
+
+
+def _check_base_item(catalog, menu_id, kind, setting):
+    # 메뉴를 불러오지 못했으면 가격표도 비어 있으므로 확인할 대상이 없음
+    if not catalog.items:
+        return
+    category = TOOL_MENU_CATEGORIES[kind]
+    item = catalog.get(menu_id)
+    if item is None:
+        raise ValueError(f"{setting}={menu_id}: 메뉴에 없는 ID 입니다 ({category} 메뉴 ID 여야 합니다).")
+    if item["category"] != category or item["price"] is None:
+        raise ValueError(
+            f"{setting}={menu_id}: {item['name']}({item['category']}) 는 가격이 있는 {category} 메뉴가 아닙니다."
+        )
+
+
+class PriceTable:
+    """
+    메뉴 ID 로 바로 인덱싱하는 가격표
+
+    - prices: menu_id 위치에 가격을 넣은 연속 배열 (array('q'), 없는 메뉴는 MISSING_PRICE)
+    - line_total / order_total: 주문 줄 하나 / 주문 목록 하나의 금액 (파이썬 루프)
+    - batch_order_totals: 여러 주문 목록을 한 번에 계산 (numpy 가 있으면 배열 연산)
+    - 가격을 알 수 없는 메뉴가 섞인 줄은 금액 None, 합계에서는 빼고 unpriced 로 셈
+    """
+
+    def __init__(self, menu_prices=(), base_side_id=BASE_SIDE_ID, base_drink_id=BASE_DRINK_ID):
+        menu_prices = [(int(menu_id), int(price)) for menu_id, price in menu_prices if int(menu_id) > 0]
+        size = max((menu_id for menu_id, _ in menu_prices), default=0) + 1
+        self.prices = array("q", [MISSING_PRICE]) * size
+        for menu_id, price in menu_prices:
+            self.prices[menu_id] = price
+        self.base_side_price = self.price(base_side_id) or 0
+        self.base_drink_price = self.price(base_drink_id) or 0
+
+    @classmethod
+    def from_catalog(cls, catalog, base_side_id=BASE_SIDE_ID, base_drink_id=BASE_DRINK_ID):
+        """
+        메뉴 카탈로그로 가격표를 만듭니다.
+
+        기본 포함 사이드/음료 ID 가 카탈로그의 사이드/드링크 메뉴가 아니면 ValueError
+        (버거 ID 가 들어가면 업그레이드 차액이 늘 0 이 되어 조용히 덜 받게 되므로)
+        """
+        _check_base_item(catalog, base_side_id, "side", "PRICE_BASE_SIDE_ID")
+        _check_base_item(catalog, base_drink_id, "drink", "PRICE_BASE_DRINK_ID")
+        menu_prices = ((item["menu_id"], item["price"]) for item in catalog.items if item["price"] is not None)
+        return cls(menu_prices, base_side_id, base_drink_id)
+
+    def price(self, menu_id):
+        """메뉴 가격 (없으면 None)"""
+        if isinstance(menu_id, int) and 0 < menu_id < len(self.prices):
+            price = self.prices[menu_id]
+            if price != MISSING_PRICE:
+                return price
+        return None
+
+    def unit_price(self, line):
+        """주문 줄 1개 가격 (모르는 메뉴가 있으면 None)"""
+        base_id, side_id, drink_id = _price_ids(line)
+        total = self.price(base_id)
+        if total is None:
+            return None
+        for item_id, base_price in ((side_id, self.base_side_price), (drink_id, self.base_drink_price)):
+            if item_id:
+                price = self.price(item_id)
+                if price is None:
+                    return None
+                total += max(price - base_price, 0)
+        for topping_id in _toppings(line):
+            price = self.price(topping_id)
+            if price is None:
+                return None
+            total += price
+        return total
+
+    def line_total(self, line):
+        unit_price = self.unit_price(line)
+        return None if unit_price is None else unit_price * line.quantity
+
+    def order_total(self, lines):
+        """(합계, 가격을 알 수 없는 줄 수)"""
+        total = 0
+        unpriced = 0
+        for line in lines:
+            line_total = self.line_total(line)
+            if line_total is None:
+                unpriced += 1
+            else:
+                total += line_total
+        return total, unpriced
+
+    def batch_order_totals(self, order_lists):
+        """
+        여러 주문 목록의 (합계, 가격을 알 수 없는 줄 수) 목록
+
+        모든 주문 줄을 배열 몇 개로 펼친 뒤 가격표 인덱싱/합산을 한 번에 처리합니다.
+        """
+        order_lists = list(order_lists)
+        if np is None:
+            return [self.order_total(lines) for lines in order_lists]
+
+        lines = [line for order_lines in order_lists for line in order_lines]
+        line_count = len(lines)
+        if not line_count:
+            return [(0, 0) for _ in order_lists]
+
+        # 주문 줄 → 주문 목록 번호, 토핑 → 주문 줄 번호
+        owners = np.repeat(np.arange(len(order_lists)), [len(order_lines) for order_lines in order_lists])
+        ids = np.fromiter(chain.from_iterable(map(_price_ids, lines)), np.int64, count=3 * line_count).reshape(-1, 3)
+        quantities = np.fromiter((line.quantity for line in lines), np.int64, count=line_count)
+        toppings = list(map(_toppings, lines))
+        topping_owners = np.repeat(np.arange(line_count), [len(line_toppings) for line_toppings in toppings])
+        topping_ids = list(chain.from_iterable(toppings))
+
+        prices = np.frombuffer(self.prices, dtype=np.int64)  # 복사 없이 같은 메모리를 사용
+
+        def lookup(ids):
+            ids = np.asarray(ids, dtype=np.int64)
+            # 범위 밖 ID 는 항상 비어 있는 0번 칸으로
+            return prices[np.where((ids > 0) & (ids < len(prices)), ids, 0)]
+
+        base = lookup(ids[:, 0])
+        missing = base == MISSING_PRICE
+        unit = np.where(missing, 0, base)
+        for column, base_price in ((1, self.base_side_price), (2, self.base_drink_price)):
+            item_ids = ids[:, column]
+            selected = item_ids != 0
+            item_prices = lookup(item_ids)
+            missing |= selected & (item_prices == MISSING_PRICE)
+            unit += np.where(selected, np.maximum(item_prices - base_price, 0), 0)
+        if topping_ids:
+            topping_prices = lookup(topping_ids)
+            topping_missing = topping_prices == MISSING_PRICE
+            missing |= np.bincount(topping_owners[topping_missing], minlength=line_count) > 0
+            unit += np.bincount(
+                topping_owners, weights=np.where(topping_missing, 0, topping_prices), minlength=line_count
+            ).astype(np.int64)
+
+        line_totals = np.where(missing, 0, unit * quantities)
+        totals = np.bincount(owners, weights=line_totals, minlength=len(order_lists)).astype(np.int64)
+        unpriced = np.bincount(owners, weights=missing, minlength=len(order_lists)).astype(np.int64)
+        return list(zip(totals.tolist(), unpriced.tolist()))
+
+
+def check_price_table(catalog, price_table):
+    """
+    가격표 점검 - 문제 설명 목록을 반환 (비어 있으면 정상)
+
+    - 사이드/음료를 고르지 않은 세트와 기본 사이드/음료를 적은 세트는 세트 메뉴 가격 그대로
+    - 가장 비싼 사이드/음료로 바꾸면 세트 가격이 올라감 (업그레이드 차액이 실제로 붙는지)
+    - 일괄 계산(batch_order_totals)과 줄 단위 계산(order_total)의 합계가 같음
+    """
+    problems = []
+    set_item = next((item for item in catalog.in_category("버거") if item["price"] is not None), None)
+    if set_item is None:
+        return ["가격이 있는 버거 메뉴가 없습니다."]
+    set_id, set_price = set_item["menu_id"], set_item["price"]
+
+    lines = [BurgerSetOrder(set_id), BurgerSetOrder(set_id, DEFAULT_SIDE_ID, DEFAULT_DRINK_ID)]
+    for line in lines:
+        if price_table.line_total(line) != set_price:
+            problems.append(f"기본 세트 {line.to_dict()} 가 세트 가격 {set_price} 가 아니라 {price_table.line_total(line)} 입니다.")
+
+    for kind in ("side", "drink"):
+        priced = [item for item in catalog.in_category(TOOL_MENU_CATEGORIES[kind]) if item["price"] is not None]
+        if not priced:
+            continue
+        upgrade = max(priced, key=lambda item: item["price"])
+        line = BurgerSetOrder(set_id, **{f"{kind}_id": upgrade["menu_id"]})
+        lines.append(line)
+        if not price_table.line_total(line) > set_price:
+            problems.append(f"{upgrade['name']}({upgrade['menu_id']}) 로 바꾼 세트가 기본 세트보다 비싸지 않습니다: {price_table.line_total(line)}")
+
+    batch = price_table.batch_order_totals([lines[:2], lines[2:]])
+    loop = [price_table.order_total(lines[:2]), price_table.order_total(lines[2:])]
+    if batch != loop:
+        problems.append(f"일괄 계산 {batch} 와 줄 단위 계산 {loop} 이 다릅니다.")
+    return problems
+
+
+def main():
+    """python menu_pricing.py - 메뉴 DB 로 가격표를 만들어 점검"""
+    from menu_catalog import MenuCatalog
+    from menu_db import get_menu_db_pool
+
+    catalog = MenuCatalog.from_pool(get_menu_db_pool())
+    if not catalog.loaded:
+        raise SystemExit(1)
+    price_table = PriceTable.from_catalog(catalog)
+    print(f"기본 포함 사이드 {BASE_SIDE_ID}: {price_table.base_side_price}원, 음료 {BASE_DRINK_ID}: {price_table.base_drink_price}원")
+    problems = check_price_table(catalog, price_table)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        raise SystemExit(1)
+    print("✅ 가격표 점검 통과")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+import heapq
+import re
+import unicodedata
+
+# 한글 음절의 초성 (유니코드 음절 순서)
+CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_CHOSUNG_SET = frozenset(CHOSUNG)
+_HANGUL_FIRST = 0xAC00
+_HANGUL_LAST = 0xD7A3
+_SYLLABLES_PER_CHOSUNG = 21 * 28
+
+# NFKC 는 호환용 자모(ㄱ)를 조합용 자모(U+1100)로 바꾸므로 다시 되돌림
+_CONJOINING_TO_COMPAT = {0x1100 + index: ch for index, ch in enumerate(CHOSUNG)}
+
+# 리아미라클Ⅱ 처럼 로마 숫자가 들어간 메뉴를 "2"로도 찾을 수 있게 함
+_ROMAN_NUMERALS = str.maketrans({
+    "Ⅰ": "1", "Ⅱ": "2", "Ⅲ": "3", "Ⅳ": "4", "Ⅴ": "5",
+    "Ⅵ": "6", "Ⅶ": "7", "Ⅷ": "8", "Ⅸ": "9", "Ⅹ": "10",
+    "ⅰ": "1", "ⅱ": "2", "ⅲ": "3", "ⅳ": "4", "ⅴ": "5",
+    "ⅵ": "6", "ⅶ": "7", "ⅷ": "8", "ⅸ": "9", "ⅹ": "10",
+})
+
+# 한글 음절/호환 자모/영숫자만 남기고 공백과 기호는 모두 제거
+_NON_WORD = re.compile(r"[^0-9a-z가-힣ㄱ-ㆎ]+")
+
+# 점수 (높을수록 우선)
+SCORE_EXACT = 1.0
+SCORE_PREFIX = 0.9
+SCORE_SUBSTRING = 0.8
+SCORE_CHOSUNG_EXACT = 0.85
+SCORE_CHOSUNG_PREFIX = 0.75
+SCORE_CHOSUNG_SUBSTRING = 0.7
+SCORE_TYPO = 0.6
+TYPO_PENALTY = 0.1
+
+
+def normalize_search_text(text):
+    """검색용 정규화: 로마 숫자 → 숫자, NFKC, 소문자, 공백/기호 제거"""
+    text = unicodedata.normalize("NFKC", str(text).translate(_ROMAN_NUMERALS))
+    text = text.translate(_CONJOINING_TO_COMPAT).lower()
+    return _NON_WORD.sub("", text)
+
+
+def to_chosung(text):
+    """한글 음절을 초성으로 바꾼 문자열 (그 외 문자는 그대로)"""
+    chars = []
+    for ch in text:
+        code = ord(ch)
+        if _HANGUL_FIRST <= code <= _HANGUL_LAST:
+            chars.append(CHOSUNG[(code - _HANGUL_FIRST) // _SYLLABLES_PER_CHOSUNG])
+        else:
+            chars.append(ch)
+    return "".join(chars)
+
+
+def _bigrams(text):
+    return {text[index:index + 2] for index in range(len(text) - 1)}
+
+
+def _substring_edit_distance(pattern, text):
+    """pattern 과 text 의 임의 부분 문자열 사이의 최소 편집 거리"""
+    previous = [0] * (len(text) + 1)
+    for row, pattern_char in enumerate(pattern, 1):
+        current = [row] + [0] * len(text)
+        for column, text_char in enumerate(text, 1):
+            current[column] = min(
+                previous[column] + 1,
+                current[column - 1] + 1,
+                previous[column - 1] + (pattern_char != text_char)
+            )
+        previous = current
+    return min(previous)
+
+
+def _split_pieces(text, count):
+    size, extra = divmod(len(text), count)
+    pieces = []
+    start = 0
+    for index in range(count):
+        end = start + size + (1 if index < extra else 0)
+        pieces.append(text[start:end])
+        start = end
+    return [piece for piece in pieces if piece]
+
+
+class MenuSearchIndex:
+    """
+    메뉴명 검색 인덱스
+
+    - 정규화된(공백 제거) 이름과 초성 문자열을 미리 계산
+    - 글자/2-gram 역색인으로 후보를 좁힌 뒤 점수화 (정확 > 접두 > 포함 > 초성 > 오타 허용)
+    - "불고기 버거" ↔ "불고기버거", "ㅎㅇㅂㄱ", "리아미라클2", 한 글자 오타까지 찾음
+    """
+
+    def __init__(self, items, limit=20):
+        self.limit = limit
+        self._entries = []
+        self._grams = {}
+        self._chosung_grams = {}
+
+        for position, item in enumerate(items):
+            normalized = normalize_search_text(item["name"])
+            chosung = to_chosung(normalized)
+            self._entries.append((item, normalized, chosung))
+
+            for gram in set(normalized) | _bigrams(normalized):
+                self._grams.setdefault(gram, set()).add(position)
+            for gram in set(chosung) | _bigrams(chosung):
+                self._chosung_grams.setdefault(gram, set()).add(position)
+
+    def search(self, query, limit=None):
+        """점수 순으로 정렬된 메뉴 목록을 반환합니다."""
+        limit = limit or self.limit
+        needle = normalize_search_text(query)
+        if not needle:
+            return []
+
+        chosung_mode = any(ch in _CHOSUNG_SET for ch in needle)
+        if chosung_mode:
+            needle = to_chosung(needle)
+            grams, field = self._chosung_grams, 2
+        else:
+            grams, field = self._grams, 1
+
+        query_grams = _bigrams(needle) or {needle}
+        scores = {}
+
+        # 1) 모든 2-gram 을 가진 항목만 부분 문자열 비교
+        postings = [grams.get(gram) for gram in query_grams]
+        if all(postings):
+            for position in set.intersection(*sorted(postings, key=len)):
+                text = self._entries[position][field]
+                found = text.find(needle)
+                if found == -1:
+                    continue
+                if chosung_mode:
+                    score = SCORE_CHOSUNG_EXACT if text == needle else (
+                        SCORE_CHOSUNG_PREFIX if found == 0 else SCORE_CHOSUNG_SUBSTRING)
+                else:
+                    score = SCORE_EXACT if text == needle else (
+                        SCORE_PREFIX if found == 0 else SCORE_SUBSTRING)
+                scores[position] = score
+
+        # 2) 결과가 부족하면 오타(편집 거리)를 허용해서 추가 검색
+        if not chosung_mode and len(scores) < limit and len(needle) >= 3:
+            self._add_typo_matches(needle, scores, limit)
+
+        ranked = heapq.nsmallest(
+            limit,
+            scores.items(),
+            key=lambda pair: (-pair[1], len(self._entries[pair[0]][1]), pair[0])
+        )
+        return [self._entries[position][0] for position, _ in ranked]
+
+    def _add_typo_matches(self, needle, scores, limit):
+        max_typos = 1 if len(needle) <= 6 else 2
+
+        # 오타가 k개면 검색어를 k+1 조각으로 나눴을 때 적어도 한 조각은 그대로 들어 있음
+        # (조각은 역색인 목록이 가장 짧아지도록 선택)
+        pieces = self._rarest_split(needle, max_typos + 1)
+        candidates = set()
+        for piece in pieces:
+            candidates |= self._piece_candidates(piece)
+        candidates.difference_update(scores)
+
+        # 편집 1번은 2-gram 을 최대 2개까지만 깨뜨림 (q-gram 개수 필터)
+        query_grams = _bigrams(needle)
+        required_grams = len(query_grams) - 2 * max_typos
+
+        matches = []
+        for position in candidates:
+            text = self._entries[position][1]
+            if required_grams > 0 and sum(gram in text for gram in query_grams) < required_grams:
+                continue
+            matches.append((len(text), position))
+        matches.sort()
+
+        found = len(scores)
+        for _, position in matches:
+            distance = _substring_edit_distance(needle, self._entries[position][1])
+            if distance <= max_typos:
+                scores[position] = SCORE_TYPO - TYPO_PENALTY * distance
+                found += 1
+                if found >= limit:
+                    break
+
+    def _piece_candidates(self, piece):
+        postings = [self._grams.get(gram) for gram in (_bigrams(piece) or {piece})]
+        if not all(postings):
+            return set()
+        return set.intersection(*postings)
+
+    def _piece_cost(self, piece):
+        return min(len(self._grams.get(gram, ())) for gram in (_bigrams(piece) or {piece}))
+
+    def _rarest_split(self, text, count):
+        if count != 2:
+            return _split_pieces(text, count)
+        splits = [(text[:index], text[index:]) for index in range(1, len(text))]
+        return min(splits, key=lambda pieces: sum(self._piece_cost(piece) for piece in pieces))
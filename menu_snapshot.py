@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import threading
+
+from menu_catalog import MenuCatalog
+from menu_pricing import PriceTable
+
+PROMPT_DIR = os.path.join(os.path.dirname(__file__), "PROMPT")
+ORDER_FORM_PATH = os.path.join(PROMPT_DIR, "ORDER_FORM.txt")
+FEW_SHOT_PATH = os.path.join(PROMPT_DIR, "FEW_SHOT.txt")
+ORDER_TOOL_PATH = os.path.join(PROMPT_DIR, "ORDER_TOOL.txt")  # BurgerBotV2 add_order 도구 모드용 주문서 안내
+
+
+class MenuSnapshot:
+    """
+    한 시점의 메뉴/프롬프트 자료 묶음
+
+    - 프로세스 전체에서 하나만 만들어 모든 BurgerBot/BurgerBotV2 인스턴스가 공유
+    - 만들어진 뒤에는 읽기 전용 (DB나 프롬프트 파일이 바뀌면 새 스냅샷으로 교체)
+    """
+
+    def __init__(self, version, signature, catalog, order_form, few_shot, order_tool_form=""):
+        self.version = version
+        self.signature = signature
+        self.catalog = catalog
+        self.menu_section = catalog.menu_section()
+        self.price_table = PriceTable.from_catalog(catalog)
+        self.order_form = order_form
+        self.few_shot = few_shot
+        self.order_tool_form = order_tool_form
+        self._prompts = {}
+        self._lock = threading.Lock()
+
+    def get_prompt(self, key, builder):
+        """
+        key(봇 종류)별 시스템 프롬프트를 한 번만 만들어 재사용합니다.
+
+        intern 해 두므로 내용이 같으면 스냅샷이 다시 만들어져도 같은 문자열 객체를 공유합니다.
+        """
+        prompt = self._prompts.get(key)
+        if prompt is None:
+            with self._lock:
+                prompt = self._prompts.get(key)
+                if prompt is None:
+                    prompt = sys.intern(builder(self))
+                    self._prompts[key] = prompt
+        return prompt
+
+
+_snapshot = None
+_snapshot_version = 0
+_snapshot_lock = threading.Lock()
+
+
+def get_menu_snapshot(db_path, db_pool):
+    """
+    현재 메뉴 스냅샷을 반환합니다.
+
+    DB 파일(WAL 포함)과 프롬프트 파일의 mtime/크기만 확인하므로 캐시 적중 시 I/O가 없고,
+    변경이 감지되었을 때만 메뉴 카탈로그 적재와 파일 읽기를 다시 수행합니다.
+    """
+    global _snapshot, _snapshot_version
+
+    signature = _current_signature(db_path)
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.signature == signature:
+        return snapshot
+
+    with _snapshot_lock:
+        if _snapshot is not None and _snapshot.signature == signature:
+            return _snapshot
+
+        catalog = MenuCatalog.from_pool(db_pool)
+        order_form = read_prompt_file(ORDER_FORM_PATH, "주문서 양식을 불러올 수 없습니다.")
+        few_shot = read_prompt_file(FEW_SHOT_PATH, "대화 예시를 불러올 수 없습니다.")
+        order_tool_form = read_prompt_file(ORDER_TOOL_PATH, "주문이 확정되면 add_order 함수로 주문을 등록하세요.")
+
+        _snapshot_version += 1
+        _snapshot = MenuSnapshot(
+            version=_snapshot_version,
+            # 첫 조회 때 -wal 파일이 생기므로 읽은 뒤의 상태를 기준으로 기록
+            signature=_current_signature(db_path),
+            catalog=catalog,
+            order_form=order_form,
+            few_shot=few_shot,
+            order_tool_form=order_tool_form
+        )
+        print(f"✅ 메뉴 스냅샷 생성 (버전: {_snapshot_version})")
+        return _snapshot
+
+
+def invalidate_menu_snapshot():
+    """메뉴를 직접 수정한 뒤 다음 요청에서 스냅샷(메뉴 카탈로그 포함)을 다시 만들도록 합니다."""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+
+def read_prompt_file(path, fallback):
+    """프롬프트 파일을 읽습니다. 실패하면 fallback 문구를 반환합니다."""
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return file.read()
+    except Exception as e:
+        print(f"❌ 프롬프트 파일 읽기 실패 ({os.path.basename(path)}): {e}")
+        return fallback
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except (OSError, TypeError):
+        return None
+
+
+def _current_signature(db_path):
+    # WAL 모드에서는 체크포인트 전까지 변경 내용이 -wal 파일에만 기록됨
+    return (
+        db_path,
+        _file_signature(db_path),
+        _file_signature(f"{db_path}-wal") if db_path else None,
+        _file_signature(ORDER_FORM_PATH),
+        _file_signature(FEW_SHOT_PATH),
+        _file_signature(ORDER_TOOL_PATH)
+    )
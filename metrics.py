@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from percentiles import percentile_of_sorted
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# 턴 지표 이름 → (Prometheus 메트릭 이름, 설명)
+TURN_METRICS = {
+    "turn_seconds": ("chatbot_turn_seconds", "한 턴 전체 처리 시간(초)"),
+    "ttft_seconds": ("chatbot_ttft_seconds", "요청 후 첫 토큰까지 걸린 시간(초)"),
+    "prompt_tokens": ("chatbot_prompt_tokens", "한 턴의 입력 토큰 수"),
+    "cached_tokens": ("chatbot_cached_tokens", "한 턴의 입력 토큰 중 프롬프트 캐시 적중 토큰 수"),
+    "completion_tokens": ("chatbot_completion_tokens", "한 턴의 출력 토큰 수"),
+    "llm_calls": ("chatbot_llm_calls", "한 턴의 chat.completions 호출 수"),
+    "tool_calls": ("chatbot_tool_calls", "한 턴의 tool 호출 수"),
+    "get_menu_info_seconds": ("chatbot_get_menu_info_seconds", "get_menu_info 실행 시간 합계(초)"),
+    "parse_orders_seconds": ("chatbot_parse_orders_seconds", "parse_orders_from_response 실행 시간(초)"),
+    "format_summary_seconds": ("chatbot_format_summary_seconds", "OrderFormatter.format_order_summary 실행 시간(초)"),
+}
+
+
+class Histogram:
+    """
+    최근 window 개 관측값으로 분위수를 계산하는 히스토그램
+
+    count/sum 은 전체 누적, 분위수는 최근 값 기준 (오래된 지연은 자연스럽게 빠짐)
+    """
+
+    def __init__(self, window=1024):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    def quantiles(self, quantiles=QUANTILES):
+        ordered = sorted(self.samples)
+        return {q: percentile_of_sorted(ordered, q) for q in quantiles}
+
+
+class MetricsRegistry:
+    """프로세스 내부 지표 저장소 (이름 + 라벨 조합별 히스토그램)"""
+
+    def __init__(self, window=1024):
+        self.window = window
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, help_text="", **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.window)
+                self._help.setdefault(name, help_text)
+            histogram.observe(value)
+
+    def record_turn(self, turn, endpoint):
+        """봇의 last_turn_metrics 를 endpoint/model 라벨로 기록합니다."""
+        if not turn:
+            return
+        labels = {"endpoint": endpoint, "model": turn.get("model") or "unknown"}
+        for key, (name, help_text) in TURN_METRICS.items():
+            value = turn.get(key)
+            if value is not None:
+                self.observe(name, value, help_text, **labels)
+
+    def render_prometheus(self):
+        """Prometheus text exposition 형식 (summary 타입, p50/p95/p99)"""
+        with self._lock:
+            snapshot = [
+                (name, labels, histogram.quantiles(), histogram.sum, histogram.count)
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+            help_texts = dict(self._help)
+
+        lines = []
+        current_name = None
+        for name, labels, quantiles, total, count in snapshot:
+            if name != current_name:
+                lines.append(f"# HELP {name} {help_texts.get(name, '')}")
+                lines.append(f"# TYPE {name} summary")
+                current_name = name
+            label_text = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels)
+            for quantile, value in quantiles.items():
+                lines.append(f'{name}{{{label_text},quantile="{quantile}"}} {_format_value(value)}')
+            lines.append(f"{name}_sum{{{label_text}}} {_format_value(total)}")
+            lines.append(f"{name}_count{{{label_text}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    return f"{value:.6g}" if isinstance(value, float) else str(value)
+
+
+class TurnMetrics(dict):
+    """
+    한 턴 동안의 토큰/지연 정보를 모으는 dict
+
+    봇이 턴을 시작할 때 만들고(last_turn_metrics), 끝나면 finish() 로 전체 시간을 기록합니다.
+    """
+
+    def __init__(self, model):
+        super().__init__(
+            model=model,
+            ttft_seconds=None,
+            turn_seconds=None,
+            prompt_tokens=0,
+            cached_tokens=0,
+            completion_tokens=0,
+            llm_calls=0,
+            tool_calls=0
+        )
+        self._started = time.perf_counter()
+
+    def first_token(self):
+        if self["ttft_seconds"] is None:
+            self["ttft_seconds"] = time.perf_counter() - self._started
+
+    def add_usage(self, info):
+        """prompt_cache.usage_cache_info() 결과를 더합니다."""
+        self["llm_calls"] += 1
+        if info:
+            self["prompt_tokens"] += info["prompt_tokens"]
+            self["cached_tokens"] += info["cached_tokens"]
+            self["completion_tokens"] += info["completion_tokens"]
+
+    @contextmanager
+    def timed(self, key):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self[key] = self.get(key, 0.0) + (time.perf_counter() - started)
+
+    def finish(self):
+        self["turn_seconds"] = time.perf_counter() - self._started
+        return self
+
+
+metrics = MetricsRegistry()
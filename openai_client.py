@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+
+from dotenv import load_dotenv
+from httpx2 import Limits, Timeout
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from llm_cache import wrap_openai_client
+
+load_dotenv()
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def _http2_enabled():
+    """OPENAI_HTTP2=auto(기본값)이면 h2 패키지가 설치된 경우에만 HTTP/2 사용"""
+    setting = os.getenv("OPENAI_HTTP2", "auto").lower()
+    if setting in ("0", "false", "off", "no"):
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        if setting != "auto":
+            print("❌ h2 패키지가 없어 HTTP/1.1 keep-alive 로 연결합니다. (pip install h2)")
+        return False
+
+
+def http_client_options():
+    """
+    공유 HTTP 클라이언트 설정 (SDK 의 Default*HttpxClient 에 전달) (환경 변수로 변경 가능)
+
+    - OPENAI_MAX_CONNECTIONS: 동시에 열 수 있는 최대 연결 수 (기본값 100)
+    - OPENAI_MAX_KEEPALIVE: 재사용을 위해 열어 두는 유휴 연결 수 (기본값 20)
+    - OPENAI_KEEPALIVE_EXPIRY: 유휴 연결 유지 시간(초) (기본값 60)
+    - OPENAI_TIMEOUT / OPENAI_CONNECT_TIMEOUT: 요청/연결 타임아웃(초) (기본값 60 / 5)
+    - OPENAI_HTTP2: auto | on | off
+    """
+    return {
+        "limits": Limits(
+            max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+        ),
+        "timeout": Timeout(
+            float(os.getenv("OPENAI_TIMEOUT", "60")),
+            connect=float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+        ),
+        "http2": _http2_enabled()
+    }
+
+
+def _client_options():
+    # base_url 은 OPENAI_BASE_URL 환경 변수를 SDK 가 그대로 사용
+    return {
+        "api_key": os.getenv("OPENAI_API_KEY"),
+        "max_retries": int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+    }
+
+
+def get_openai_client():
+    """
+    프로세스 전체에서 공유하는 OpenAI 클라이언트
+
+    모든 봇/세션이 하나의 연결 풀을 사용하므로 턴마다 TLS 핸드셰이크를 다시 하지 않고,
+    세션이 늘어나도 소켓 수는 OPENAI_MAX_CONNECTIONS 이하로 유지됩니다.
+    LLM_CACHE_MODE 가 설정되어 있으면 응답 record/replay 캐시를 거칩니다 (llm_cache.py).
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = wrap_openai_client(OpenAI(
+                    http_client=DefaultHttpxClient(**http_client_options()),
+                    **_client_options()
+                ))
+    return _client
+
+
+def get_async_openai_client():
+    """프로세스 전체에서 공유하는 AsyncOpenAI 클라이언트 (async_app.py 용)"""
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                _async_client = wrap_openai_client(AsyncOpenAI(
+                    http_client=DefaultAsyncHttpxClient(**http_client_options()),
+                    **_client_options()
+                ), async_client=True)
+    return _async_client
+
+
+def close_openai_client():
+    """프로세스 종료 시 공유 클라이언트의 연결을 정리합니다."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+
+
+async def aclose_async_openai_client():
+    global _async_client
+    with _client_lock:
+        client, _async_client = _async_client, None
+    if client is not None:
+        await client.close()
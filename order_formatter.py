@@ -1,21 +1,205 @@
 # -*- coding: utf-8 -*-
 import json
 import os
-from typing import Dict, List, Any
+import threading
+from typing import Any, Dict, Iterable, Iterator, List
+
+SINGLE_ITEM_KEYS = ("burger", "chicken", "side", "drink", "sauce")
+TOPPING_LINE = "      + 토핑: 메뉴ID {}"
+
+# 룰셋 파일 경로 → 컴파일된 렌더러 (모든 OrderFormatter 인스턴스가 공유)
+_compiled_rules = {}
+_compiled_rules_lock = threading.Lock()
+
+
+def _extract_variables(order: Dict, order_number: int) -> Dict:
+    """주문에서 템플릿 변수를 추출합니다."""
+    quantity = order.get("quantity", 1)
+    variables = {
+        "order_number": order_number,
+        "quantity": quantity,
+        "quantity_suffix": f" x{quantity}" if quantity > 1 else ""
+    }
+
+    # 각 아이템에서 ID 추출
+    if "burger" in order:
+        variables["burger_id"] = order["burger"].get("menu_id")
+        toppings = order["burger"].get("toppings")
+        if toppings:
+            variables["toppings"] = toppings
+            variables["toppings_suffix"] = f" + 토핑: {toppings}"
+        else:
+            variables["toppings"] = None
+            variables["toppings_suffix"] = ""
+
+    if "chicken" in order:
+        variables["chicken_id"] = order["chicken"].get("menu_id")
+
+    if "side" in order:
+        variables["side_id"] = order["side"].get("menu_id")
+
+    if "drink" in order:
+        variables["drink_id"] = order["drink"].get("menu_id")
+
+    if "sauce" in order:
+        variables["sauce_id"] = order["sauce"].get("menu_id")
+        variables["sauce_quantity"] = order["sauce"].get("quantity", 1)
+
+    return variables
+
+
+def _topping_lines(toppings) -> List[str]:
+    """토핑은 각각 별도 라인으로"""
+    if isinstance(toppings, list):
+        return [TOPPING_LINE.format(topping_id) for topping_id in toppings]
+    return [TOPPING_LINE.format(toppings)]
+
+
+def _compile_template(template: str):
+    """
+    템플릿 → render(variables) 함수
+
+    - 변수가 없는 템플릿은 미리 만든 문자열을 그대로 반환
+    - 누락된 변수가 있으면 템플릿 원문을 반환 (기존 _format_template 과 동일)
+    """
+    if "{" not in template:
+        return lambda variables: template
+
+    format_map = template.format_map
+
+    def render(variables):
+        try:
+            return format_map(variables)
+        except KeyError:
+            return template
+
+    return render
+
+
+def _compile_set_format(format_rules: Dict):
+    """세트 룰 하나를 render(order, order_number) 함수로 컴파일합니다."""
+    render_header = _compile_template(format_rules.get("header", ""))
+
+    # 아이템 템플릿을 미리 분류: 토핑(토핑별 라인) / 사이드(side_id 있을 때만) / 일반
+    steps = []
+    for item_template in format_rules.get("items", []):
+        if "토핑" in item_template:
+            steps.append(("toppings", None))
+        elif "사이드" in item_template:
+            steps.append(("side", _compile_template(item_template)))
+        else:
+            steps.append(("item", _compile_template(item_template)))
+    steps = tuple(steps)
+
+    def render(order, order_number):
+        variables = _extract_variables(order, order_number)
+        lines = [render_header(variables)]
+        for kind, render_item in steps:
+            if kind == "toppings":
+                toppings = variables.get("toppings")
+                if toppings:
+                    lines.extend(_topping_lines(toppings))
+                continue
+            if kind == "side" and variables.get("side_id") is None:
+                continue
+            formatted_item = render_item(variables)
+            if formatted_item.strip():  # 빈 문자열이 아닌 경우만 추가
+                lines.append(formatted_item)
+        return "\n".join(lines)
+
+    return render
+
+
+def _compile_single_format(item_type: str, format_rules: Dict):
+    """단품 룰 하나를 render(order, order_number) 함수로 컴파일합니다."""
+    # 헤더의 토핑 접미사는 제거하고, 버거 단품 토핑은 별도 라인으로 추가
+    format_header = format_rules.get("header", "").replace("{toppings_suffix}", "").format_map
+    with_toppings = item_type == "burger"
+
+    def render(order, order_number):
+        variables = _extract_variables(order, order_number)
+        header = format_header(variables)
+        if with_toppings and variables.get("toppings"):
+            return "\n".join([header] + _topping_lines(variables["toppings"]))
+        return header
+
+    return render
+
+
+class CompiledRules:
+    """
+    룰셋을 한 번만 해석해서 만든 렌더 함수 모음
+
+    - set: set_type → render(order, order_number)
+    - single: 단품 아이템 타입 → render(order, order_number)
+    """
+
+    def __init__(self, rules: Dict):
+        order_formats = rules.get("order_formats", {})
+        self.set_renderers = {
+            set_type: _compile_set_format(format_rules)
+            for set_type, format_rules in order_formats.get("set", {}).items() if format_rules
+        }
+        self.single_renderers = {
+            item_type: _compile_single_format(item_type, format_rules)
+            for item_type, format_rules in order_formats.get("single", {}).items() if format_rules
+        }
+        self.summary_header = rules.get("summary_header", "=== 주문 내역 ===")
+        self.empty_order_message = rules.get("empty_order_message", "주문 내역이 없습니다.")
+
+    def render_order(self, order: Dict, order_number: int) -> str:
+        """단일 주문을 포맷팅합니다."""
+        order_type = order.get("order_type")
+
+        if order_type == "set":
+            set_type = order.get("set_type", "burger_set")
+            render = self.set_renderers.get(set_type)
+            if render is None:
+                return f"{order_number}. 알 수 없는 세트 타입: {set_type}"
+            return render(order, order_number)
+
+        if order_type == "single":
+            item_type = next((key for key in SINGLE_ITEM_KEYS if key in order), None)
+            if not item_type:
+                return f"{order_number}. 알 수 없는 단품 주문"
+            render = self.single_renderers.get(item_type)
+            if render is None:
+                return f"{order_number}. 알 수 없는 단품 타입: {item_type}"
+            return render(order, order_number)
+
+        return f"{order_number}. 알 수 없는 주문 타입"
+
+    def join(self, order_texts: List[str]) -> str:
+        return "\n".join([self.summary_header] + order_texts).strip()
+
 
 class OrderFormatter:
     def __init__(self, rules_file_path=None):
         """
         주문 포맷터 초기화
-        
+
         Args:
             rules_file_path: 룰셋 JSON 파일 경로 (기본값: config/order_format_rules.json)
         """
         if rules_file_path is None:
             rules_file_path = os.path.join(os.path.dirname(__file__), "config", "order_format_rules.json")
-        
-        self.rules = self._load_rules(rules_file_path)
-    
+
+        self.rules, self.compiled = self._get_compiled_rules(rules_file_path)
+        # format_order_lines() 용: 직전 호출의 [(주문 줄, 렌더링된 텍스트), ...]
+        self._rendered_lines = []
+
+    def _get_compiled_rules(self, file_path: str):
+        """룰셋을 파일 경로당 한 번만 읽고 컴파일합니다. (rules, CompiledRules) 반환"""
+        key = os.path.abspath(file_path)
+        compiled = _compiled_rules.get(key)
+        if compiled is None:
+            with _compiled_rules_lock:
+                compiled = _compiled_rules.get(key)
+                if compiled is None:
+                    rules = self._load_rules(file_path)
+                    compiled = _compiled_rules[key] = (rules, CompiledRules(rules))
+        return compiled
+
     def _load_rules(self, file_path: str) -> Dict:
         """룰셋 JSON 파일을 로드합니다."""
         try:
@@ -24,7 +208,7 @@ class OrderFormatter:
         except Exception as e:
             print(f"❌ 룰셋 파일 로드 실패: {e}")
             return self._get_default_rules()
-    
+
     def _get_default_rules(self) -> Dict:
         """기본 룰셋을 반환합니다 (백업용)."""
         return {
@@ -34,171 +218,83 @@ class OrderFormatter:
             "summary_header": "=== 주문 내역 ===",
             "empty_order_message": "주문 내역이 없습니다."
         }
-    
+
     def format_order_summary(self, order_list: List[Dict]) -> str:
         """
         주문 리스트를 포맷팅된 요약으로 변환합니다.
-        
+
         Args:
             order_list: 주문 데이터 리스트
-            
+
         Returns:
             포맷팅된 주문 요약 문자열
         """
         if not order_list:
-            return self.rules.get("empty_order_message", "주문 내역이 없습니다.")
-        
-        summary = self.rules.get("summary_header", "=== 주문 내역 ===") + "\n"
-        
-        for i, order in enumerate(order_list, 1):
-            order_text = self._format_single_order(order, i)
-            summary += order_text + "\n"
-        
-        return summary.strip()
-    
-    def _format_single_order(self, order: Dict, order_number: int) -> str:
-        """단일 주문을 포맷팅합니다."""
-        order_type = order.get("order_type")
-        
-        if order_type == "set":
-            return self._format_set_order(order, order_number)
-        elif order_type == "single":
-            return self._format_single_item_order(order, order_number)
-        else:
-            return f"{order_number}. 알 수 없는 주문 타입"
-    
-    def _format_set_order(self, order: Dict, order_number: int) -> str:
-        """세트 주문을 포맷팅합니다."""
-        set_type = order.get("set_type", "burger_set")
-        format_rules = self.rules.get("order_formats", {}).get("set", {}).get(set_type)
-        
-        if not format_rules:
-            return f"{order_number}. 알 수 없는 세트 타입: {set_type}"
-        
-        # 변수 추출
-        variables = self._extract_variables_from_order(order, order_number)
-        
-        # 헤더 포맷팅
-        header = self._format_template(format_rules.get("header", ""), variables)
-        
-        # 아이템 포맷팅
-        items = []
-        for item_template in format_rules.get("items", []):
-            # 토핑 처리 - 각 토핑을 별도 라인으로
-            if "토핑" in item_template and variables.get("toppings"):
-                toppings_list = variables["toppings"]
-                if isinstance(toppings_list, list):
-                    for topping_id in toppings_list:
-                        topping_line = f"      + 토핑: 메뉴ID {topping_id}"
-                        items.append(topping_line)
-                else:
-                    # 단일 토핑인 경우
-                    topping_line = f"      + 토핑: 메뉴ID {toppings_list}"
-                    items.append(topping_line)
-            # 조건부 아이템 체크 (토핑이 아닌 경우)
-            elif self._should_include_item(item_template, variables):
-                formatted_item = self._format_template(item_template, variables)
-                if formatted_item.strip():  # 빈 문자열이 아닌 경우만 추가
-                    items.append(formatted_item)
-        
-        # 결합
-        result = header
-        if items:
-            result += "\n" + "\n".join(items)
-        
-        return result
-    
-    def _format_single_item_order(self, order: Dict, order_number: int) -> str:
-        """단품 주문을 포맷팅합니다."""
-        # 주문에서 아이템 타입 찾기
-        item_type = None
-        for key in ["burger", "chicken", "side", "drink", "sauce"]:
-            if key in order:
-                item_type = key
-                break
-        
-        if not item_type:
-            return f"{order_number}. 알 수 없는 단품 주문"
-        
-        format_rules = self.rules.get("order_formats", {}).get("single", {}).get(item_type)
-        
-        if not format_rules:
-            return f"{order_number}. 알 수 없는 단품 타입: {item_type}"
-        
-        # 변수 추출
-        variables = self._extract_variables_from_order(order, order_number)
-        
-        # 헤더 포맷팅 (토핑 접미사 제거)
-        header_template = format_rules.get("header", "")
-        header = header_template.replace("{toppings_suffix}", "").format(**variables)
-        
-        # 버거 단품의 경우 토핑을 별도 라인으로 추가
-        result = header
-        if item_type == "burger" and variables.get("toppings"):
-            toppings_list = variables["toppings"]
-            if isinstance(toppings_list, list):
-                for topping_id in toppings_list:
-                    result += f"\n      + 토핑: 메뉴ID {topping_id}"
-            else:
-                result += f"\n      + 토핑: 메뉴ID {toppings_list}"
-        
-        return result
-    
-    def _extract_variables_from_order(self, order: Dict, order_number: int) -> Dict:
-        """주문에서 템플릿 변수를 추출합니다."""
-        variables = {
-            "order_number": order_number,
-            "quantity": order.get("quantity", 1)
-        }
-        
-        # 수량 접미사
-        if variables["quantity"] > 1:
-            variables["quantity_suffix"] = f" x{variables['quantity']}"
-        else:
-            variables["quantity_suffix"] = ""
-        
-        # 각 아이템에서 ID 추출
-        if "burger" in order:
-            variables["burger_id"] = order["burger"].get("menu_id")
-            toppings = order["burger"].get("toppings")
-            if toppings:
-                variables["toppings"] = toppings
-                variables["toppings_suffix"] = f" + 토핑: {toppings}"
+            return self.compiled.empty_order_message
+
+        render_order = self.compiled.render_order
+        return self.compiled.join([render_order(order, i) for i, order in enumerate(order_list, 1)])
+
+    def format_order_lines(self, order_lines: Any) -> str:
+        """
+        OrderList(주문 줄 객체)를 요약으로 변환합니다. (증분 렌더링)
+
+        주문 줄 객체는 만든 뒤 바뀌지 않으므로, 직전 호출과 같은 자리에 같은 객체가 있으면
+        렌더링된 텍스트를 재사용하고 새로 추가/교체된 주문(또는 번호가 당겨진 주문)만 렌더링합니다.
+        결과는 format_order_summary(order_list.to_dicts()) 와 같습니다.
+        """
+        previous = self._rendered_lines
+        rendered = []
+        render_order = self.compiled.render_order
+        for index, line in enumerate(order_lines):
+            if index < len(previous) and previous[index][0] is line:
+                rendered.append(previous[index])
             else:
-                variables["toppings"] = None
-                variables["toppings_suffix"] = ""
-        
-        if "chicken" in order:
-            variables["chicken_id"] = order["chicken"].get("menu_id")
-        
-        if "side" in order:
-            variables["side_id"] = order["side"].get("menu_id")
-        
-        if "drink" in order:
-            variables["drink_id"] = order["drink"].get("menu_id")
-        
-        if "sauce" in order:
-            variables["sauce_id"] = order["sauce"].get("menu_id")
-            variables["sauce_quantity"] = order["sauce"].get("quantity", 1)
-        
-        return variables
-    
-    def _format_template(self, template: str, variables: Dict) -> str:
-        """템플릿 문자열에 변수를 적용합니다."""
-        try:
-            return template.format(**variables)
-        except KeyError as e:
-            # 누락된 변수가 있으면 그 부분을 빈 문자열로 처리
-            return template
-    
-    def _should_include_item(self, item_template: str, variables: Dict) -> bool:
-        """조건부 아이템을 포함할지 결정합니다."""
-        # 토핑 관련 조건 체크
-        if "토핑" in item_template and variables.get("toppings") is None:
-            return False
-        
-        # 사이드 관련 조건 체크  
-        if "사이드" in item_template and variables.get("side_id") is None:
-            return False
-        
-        return True
\ No newline at end of file
+                rendered.append((line, render_order(line.to_dict(), index + 1)))
+        self._rendered_lines = rendered
+
+        if not rendered:
+            return self.compiled.empty_order_message
+        return self.compiled.join([text for _, text in rendered])
+
+    def iter_kitchen_tickets(self, sessions: Iterable) -> Iterator[Dict]:
+        """
+        여러 세션의 주문을 주문 하나씩 구조화된 티켓으로 반환합니다. (generator)
+
+        Args:
+            sessions: (세션 ID, 주문 리스트) 쌍의 iterable - 주문 리스트는 OrderList 또는 dict 리스트
+
+        Yields:
+            {"session_id", "order_number", "title", "items", "order"}
+            - title: 주문 헤더 줄, items: 나머지 줄(구성품/토핑), order: 주문 dict
+        """
+        render_order = self.compiled.render_order
+        for session_id, order_list in sessions:
+            for order_number, order in enumerate(order_list, 1):
+                if not isinstance(order, dict):
+                    order = order.to_dict()
+                title, *items = render_order(order, order_number).split("\n")
+                yield {
+                    "session_id": session_id,
+                    "order_number": order_number,
+                    "title": title,
+                    "items": items,
+                    "order": order
+                }
+
+    def iter_kitchen_board(self, sessions: Iterable) -> Iterator[str]:
+        """
+        여러 세션의 주문을 주방 화면용 텍스트 줄로 하나씩 반환합니다. (generator)
+
+        세션마다 "[세션 ID] 주문 N건" 줄 뒤에 주문 요약과 같은 형식의 줄이 이어지고,
+        주문이 없는 세션은 건너뜁니다. 전체 결과를 메모리에 모으지 않습니다.
+        """
+        render_order = self.compiled.render_order
+        for session_id, order_list in sessions:
+            if not order_list:
+                continue
+            yield f"[{session_id}] 주문 {len(order_list)}건"
+            for order_number, order in enumerate(order_list, 1):
+                if not isinstance(order, dict):
+                    order = order.to_dict()
+                yield from render_order(order, order_number).split("\n")
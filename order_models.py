@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+import json
+from collections import deque
+
+# 값이 없을 때 쓰는 기본 메뉴 ID (세트에 기본 포함된 메뉴 - burger.sql 기준)
+DEFAULT_SIDE_ID = 60  # 포테이토 미디움
+DEFAULT_DRINK_ID = 75  # 펩시 콜라 (미디움)
+DEFAULT_SAUCE_ID = 101  # 크리미 마늘소스 (무료)
+
+# 치킨팩 종류별 소스 개수
+CHICKEN_PACK_SAUCE_QUANTITY = {"chicken_full_pack": 2, "chicken_half_pack": 1}
+
+SINGLE_ITEM_TYPES = ("burger", "chicken", "side", "drink", "sauce")
+
+# changes_since() 로 돌려줄 수 있는 최근 변경 수 (그보다 오래된 버전은 전체 응답)
+ORDER_JOURNAL_SIZE = 64
+
+
+def _burger_dict(burger_id, toppings):
+    burger = {"menu_id": burger_id}
+    if toppings:
+        burger["toppings"] = list(toppings)
+    return burger
+
+
+class OrderLine:
+    """
+    주문 한 줄 (세트/콤보/치킨팩/단품 공통)
+
+    - __slots__ 로 인스턴스 dict 없이 필요한 값만 보관
+    - 한 번 만든 뒤에는 바꾸지 않음 (변경은 OrderList 에서 교체/삭제로 처리해야 캐시가 맞음)
+    - to_dict() 는 기존 order_list 의 dict 모양을 그대로 만듦 (API/세션 저장 호환)
+    """
+
+    __slots__ = ("quantity",)
+    order_type = "set"
+
+    def to_dict(self):
+        raise NotImplementedError
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class BurgerSetOrder(OrderLine):
+    """버거 세트 (버거 + 사이드 + 음료)"""
+
+    __slots__ = ("burger_id", "side_id", "drink_id", "toppings")
+    set_type = "burger_set"
+
+    def __init__(self, burger_id, side_id=None, drink_id=None, quantity=1, toppings=None):
+        self.burger_id = burger_id
+        self.side_id = side_id or DEFAULT_SIDE_ID
+        self.drink_id = drink_id or DEFAULT_DRINK_ID
+        self.quantity = quantity
+        self.toppings = tuple(toppings) if toppings else None
+
+    def to_dict(self):
+        return {
+            "order_type": "set",
+            "set_type": "burger_set",
+            "quantity": self.quantity,
+            "burger": _burger_dict(self.burger_id, self.toppings),
+            "side": {"menu_id": self.side_id},
+            "drink": {"menu_id": self.drink_id}
+        }
+
+
+class BurgerComboOrder(OrderLine):
+    """버거 콤보 (버거 + 음료)"""
+
+    __slots__ = ("burger_id", "drink_id", "toppings")
+    set_type = "burger_combo"
+
+    def __init__(self, burger_id, drink_id=None, quantity=1, toppings=None):
+        self.burger_id = burger_id
+        self.drink_id = drink_id or DEFAULT_DRINK_ID
+        self.quantity = quantity
+        self.toppings = tuple(toppings) if toppings else None
+
+    def to_dict(self):
+        return {
+            "order_type": "set",
+            "set_type": "burger_combo",
+            "quantity": self.quantity,
+            "burger": _burger_dict(self.burger_id, self.toppings),
+            "drink": {"menu_id": self.drink_id}
+        }
+
+
+class ChickenPackOrder(OrderLine):
+    """치킨 풀팩(소스 2개) / 하프팩(소스 1개)"""
+
+    __slots__ = ("set_type", "chicken_id", "sauce_id")
+
+    def __init__(self, set_type, chicken_id, sauce_id=None, quantity=1):
+        if set_type not in CHICKEN_PACK_SAUCE_QUANTITY:
+            raise ValueError(f"알 수 없는 치킨팩 종류: {set_type!r}")
+        self.set_type = set_type
+        self.chicken_id = chicken_id
+        self.sauce_id = sauce_id or DEFAULT_SAUCE_ID
+        self.quantity = quantity
+
+    def to_dict(self):
+        return {
+            "order_type": "set",
+            "set_type": self.set_type,
+            "quantity": self.quantity,
+            "chicken": {"menu_id": self.chicken_id},
+            "sauce": {"menu_id": self.sauce_id, "quantity": CHICKEN_PACK_SAUCE_QUANTITY[self.set_type]}
+        }
+
+
+class SingleOrder(OrderLine):
+    """단품 (버거는 토핑 가능)"""
+
+    __slots__ = ("item_type", "item_id", "toppings")
+    order_type = "single"
+
+    def __init__(self, item_type, item_id, quantity=1, toppings=None):
+        self.item_type = item_type
+        self.item_id = item_id
+        self.quantity = quantity
+        self.toppings = tuple(toppings) if toppings and item_type == "burger" else None
+
+    def to_dict(self):
+        order = {"order_type": "single", "quantity": self.quantity}
+        if self.item_type == "burger":
+            order["burger"] = _burger_dict(self.item_id, self.toppings)
+        elif self.item_type in SINGLE_ITEM_TYPES:
+            order[self.item_type] = {"menu_id": self.item_id}
+        return order
+
+
+def order_line_from_dict(order):
+    """기존 dict 모양(to_dict 결과, 세션 저장소에 저장된 주문)을 OrderLine 으로 변환"""
+    quantity = order.get("quantity", 1)
+    if order.get("order_type") == "single":
+        for item_type in SINGLE_ITEM_TYPES:
+            item = order.get(item_type)
+            if item:
+                return SingleOrder(item_type, item["menu_id"], quantity, item.get("toppings"))
+        raise ValueError(f"단품 메뉴 항목이 없는 주문: {order!r}")
+
+    set_type = order.get("set_type")
+    if set_type == "burger_set":
+        burger = order["burger"]
+        return BurgerSetOrder(burger["menu_id"], order["side"]["menu_id"], order["drink"]["menu_id"], quantity, burger.get("toppings"))
+    if set_type == "burger_combo":
+        burger = order["burger"]
+        return BurgerComboOrder(burger["menu_id"], order["drink"]["menu_id"], quantity, burger.get("toppings"))
+    return ChickenPackOrder(set_type, order["chicken"]["menu_id"], order["sauce"]["menu_id"], quantity)
+
+
+class OrderList:
+    """
+    세션의 주문 목록
+
+    - 변경(append/pop/clear)될 때마다 version 증가 (세션 상태와 함께 저장되어 워커/재시작 후에도 이어짐)
+    - dict 목록, compact JSON, 주문 요약 등 파생 값은 memo() 로 version 당 한 번만 계산
+      → 주문이 바뀌지 않았다면 /orders 를 반복 호출해도 다시 직렬화하지 않음
+    - 최근 변경은 journal 에 남겨 changes_since(버전) 으로 추가/삭제분만 돌려줌
+    """
+
+    __slots__ = ("_lines", "version", "_memo", "_memo_version", "_journal")
+
+    def __init__(self, lines=(), version=0):
+        self._lines = list(lines)
+        self.version = version
+        self._memo = {}
+        self._memo_version = version
+        # (변경 후 version, 변경 내용) - version 이 1씩 연속으로 증가한 최근 변경만 보관
+        self._journal = deque(maxlen=ORDER_JOURNAL_SIZE)
+
+    @classmethod
+    def from_dicts(cls, orders, version=0):
+        return cls((order_line_from_dict(order) for order in orders or []), version)
+
+    def _changed(self, change):
+        self.version += 1
+        self._journal.append((self.version, change))
+
+    def continue_after(self, version):
+        """
+        새 세션의 버전을 이전 세션 버전 다음부터 시작
+
+        이전 세션의 버전(ETag, since)이 새 세션의 주문과 섞이지 않게 하고, 변경 기록은 비웁니다.
+        """
+        self.version = max(self.version, version + 1)
+        self._journal.clear()
+
+    def append(self, line):
+        self._lines.append(line)
+        self._changed(("add", len(self._lines) - 1, line))
+        return line
+
+    def pop(self, index=-1):
+        line = self._lines.pop(index)
+        self._changed(("remove", index if index >= 0 else len(self._lines) + 1 + index))
+        return line
+
+    def clear(self):
+        if self._lines:
+            self._lines.clear()
+            self._changed(("clear",))
+
+    def changes_since(self, version):
+        """
+        version 이후의 변경 목록 (기록이 없어 알 수 없으면 None)
+
+        [{"op": "add", "order_number": n, "order": {...}} | {"op": "remove", "order_number": n} | {"op": "clear"}]
+        순서대로 적용하면 현재 주문 목록이 됩니다.
+        """
+        if version == self.version:
+            return []
+        if version > self.version or version < self.version - len(self._journal):
+            return None
+        changes = []
+        for changed_version, change in self._journal:
+            if changed_version <= version:
+                continue
+            if change[0] == "add":
+                changes.append({"op": "add", "order_number": change[1] + 1, "order": change[2].to_dict()})
+            elif change[0] == "remove":
+                changes.append({"op": "remove", "order_number": change[1] + 1})
+            else:
+                changes.append({"op": "clear"})
+        return changes
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        return iter(self._lines)
+
+    def __getitem__(self, index):
+        return self._lines[index]
+
+    def memo(self, key, builder):
+        """현재 version 에 대한 파생 값 (처음 요청될 때만 builder() 실행)"""
+        if self._memo_version != self.version:
+            self._memo = {}
+            self._memo_version = self.version
+        value = self._memo.get(key)
+        if value is None:
+            value = self._memo[key] = builder()
+        return value
+
+    def to_dicts(self):
+        """기존 order_list 와 같은 dict 목록 (캐시된 값이므로 수정하지 말 것)"""
+        return self.memo("dicts", lambda: [line.to_dict() for line in self._lines])
+
+    def to_json(self):
+        """공백 없는 JSON 문자열 (캐시)"""
+        return self.memo("json", lambda: json.dumps(self.to_dicts(), ensure_ascii=False, separators=(",", ":")))
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+from order_models import DEFAULT_DRINK_ID, DEFAULT_SAUCE_ID, DEFAULT_SIDE_ID
+from order_stream import ORDER_COMPLETE_TAG
+
+# SET_TYPE → 필수 항목 키
+SET_REQUIRED_KEYS = {
+    "burger_set": "BURGER",
+    "burger_combo": "BURGER",
+    "chicken_full_pack": "CHICKEN",
+    "chicken_half_pack": "CHICKEN",
+}
+
+# 단품은 먼저 나온 키 순서대로 하나만 인정 (기존 파서와 같은 우선순위)
+SINGLE_ITEM_KEYS = (("BURGER", "burger"), ("CHICKEN", "chicken"), ("SIDE", "side"), ("DRINK", "drink"), ("SAUCE", "sauce"))
+
+# 정수여야 하는 항목 (오류 메시지에서 어느 항목이 잘못됐는지 찾을 때 사용)
+NUMBER_KEYS = ("QUANTITY", "BURGER", "CHICKEN", "SIDE", "DRINK", "SAUCE")
+
+# add_order 인자 종류 → 메뉴 카탈로그 카테고리명 (MenuCategory.CATEGORY_NAME)
+TOOL_MENU_CATEGORIES = {
+    "burger": "버거",
+    "chicken": "치킨",
+    "side": "사이드",
+    "drink": "드링크",
+    "sauce": "치킨소스",
+    "topping": "토핑",
+}
+
+
+class OrderParseError(ValueError):
+    """
+    주문 블록 하나를 주문으로 만들지 못한 이유
+
+    - block_index: 응답 안에서 몇 번째 [ORDER_COMPLETE] 블록인지 (0부터)
+    - code: missing_type | unknown_type | unknown_set_type | missing_item | invalid_number | invalid_quantity
+    - key: 문제가 된 항목 키 (없으면 None)
+    - fields: 블록에서 읽은 KEY: VALUE 전체
+    """
+
+    def __init__(self, block_index, code, message, key=None, fields=None):
+        super().__init__(f"주문 블록 {block_index + 1}: {message}")
+        self.block_index = block_index
+        self.code = code
+        self.key = key
+        self.fields = fields or {}
+
+    def to_dict(self):
+        return {"block_index": self.block_index, "code": self.code, "key": self.key, "message": str(self)}
+
+
+class _NumberTable(dict):
+    """
+    자주 나오는 숫자 → int 변환표 (0~999 의 int, "60", " 60")
+
+    - 블록 값의 메뉴ID/수량은 거의 항상 작은 수이므로 블록마다 int() 를 부르지 않고 표에서 찾음
+    - 표에 없는 값은 int() 로 변환 (잘못된 값은 int() 와 같은 ValueError)
+    """
+
+    def __missing__(self, value):
+        return int(value)
+
+
+_NUMBERS = _NumberTable({key: number for number in range(1000) for key in (number, str(number), f" {number}")})
+
+
+def _parse_toppings(value):
+    if value.isdigit():
+        return [_NUMBERS[value]]
+    parts = value.split(", " if ", " in value else ",")
+    # 대부분은 "101, 102" 처럼 숫자만 있으므로 한 번에 변환
+    if "".join(parts).isdigit() and "" not in parts:
+        return list(map(_NUMBERS.__getitem__, parts))
+    # 숫자가 아닌 항목은 무시 (기존 동작과 동일)
+    toppings = [int(part) for part in value.split(",") if part.strip().isdigit()]
+    return toppings or None
+
+
+class OrderBlockParser:
+    """
+    [ORDER_COMPLETE] 주문 블록 파서 (스트리밍 조각 단위로 넣을 수 있음)
+
+    - 조각은 모아 두기만 하고, 태그가 나와 끝난 블록만 한 번씩 KEY: VALUE 로 파싱
+    - 블록은 다음 [ORDER_COMPLETE] 태그나 close() 에서 끝나고, 그때 검증된 주문을 바로 돌려줌
+    - 잘못된 블록은 버리지 않고 errors 에 OrderParseError 로 남김
+    - 결과 주문 dict 는 register_order() 로 봇의 add_* 메서드에 넘김
+    """
+
+    __slots__ = ("tag", "orders", "errors", "closed", "_pending", "_started", "_block_count")
+
+    def __init__(self, tag=ORDER_COMPLETE_TAG):
+        self.tag = tag
+        self.orders = []
+        self.errors = []
+        self.closed = False
+        self._pending = []  # 마지막 태그 이후의 조각들 (아직 끝나지 않은 블록)
+        self._started = False  # 첫 태그가 나왔는지 (그 전의 텍스트는 안내 문장)
+        self._block_count = 0
+
+    def feed(self, text):
+        """조각을 넣고, 이번 조각으로 완성된 주문 목록을 반환합니다."""
+        if self.closed or not text:
+            return []
+        pending = self._pending
+        pending.append(text)
+        # 블록은 다음 태그가 와야 끝나고 태그는 항상 마지막 글자("]")로 끝나므로,
+        # 그 글자가 없는 조각은 모아 두기만 함 (스트리밍 조각마다 버퍼를 잇거나 훑지 않음)
+        if self.tag[-1] not in text:
+            return []
+        segments = ("".join(pending) if len(pending) > 1 else text).split(self.tag)
+        # 마지막 태그 뒤는 아직 끝나지 않은 블록 (태그가 없었으면 전체가 그대로 남음)
+        self._pending = [segments.pop()]
+        if segments and not self._started:
+            # 첫 태그 전의 안내 문장은 건너뜀
+            self._started = True
+            del segments[0]
+        return self._read_blocks(segments) if segments else []
+
+    def close(self):
+        """응답이 끝났을 때 마지막 블록을 마무리하고, 완성된 주문 목록을 반환합니다."""
+        if self.closed:
+            return []
+        self.closed = True
+        pending = self._pending
+        self._pending = []
+        # 태그가 한 번도 없었으면 안내 문장뿐이므로 주문 없음
+        if not self._started:
+            return []
+        return self._read_blocks(pending if len(pending) == 1 else ["".join(pending)])
+
+    def _read_blocks(self, blocks):
+        """태그 사이의 완성된 블록 텍스트들을 주문으로 만들고, 새로 완성된 주문 목록을 반환합니다."""
+        orders = self.orders
+        first_new = len(orders)
+        block_index = self._block_count
+        for block in blocks:
+            # 값은 숫자로만 쓰이므로 앞뒤 공백은 숫자 변환(_NUMBERS, int())에 맡기고, 문자열로 비교하는 값만 따로 strip
+            fields = {}
+            for line in block.strip().splitlines():
+                key, colon, value = line.partition(":")
+                if colon:
+                    fields[key.strip()] = value
+            try:
+                orders.append(_build_order(block_index, fields))
+            except OrderParseError as error:
+                self.errors.append(error)
+            block_index += 1
+        self._block_count = block_index
+        return orders[first_new:]
+
+
+def _build_order(block_index, fields):
+    """블록의 KEY: VALUE → 주문 dict (잘못된 블록은 OrderParseError)"""
+    get = fields.get
+    order_type = get("TYPE", "").strip()
+    if not order_type:
+        raise _parse_error(block_index, "missing_type", "TYPE 이 없습니다.", "TYPE", fields)
+
+    # 숫자 변환은 한 번의 try 로 처리하고, 실패했을 때만 어느 항목인지 찾음
+    try:
+        quantity = _NUMBERS[get("QUANTITY", 1)]
+
+        if order_type == "set":
+            set_type = get("SET_TYPE", "burger_set").strip()
+            required_key = SET_REQUIRED_KEYS.get(set_type)
+            if required_key is None:
+                raise _parse_error(block_index, "unknown_set_type", f"알 수 없는 SET_TYPE: {set_type!r}", "SET_TYPE", fields)
+            item_id = get(required_key)
+            if not item_id or item_id.isspace():
+                raise _parse_error(block_index, "missing_item", f"{set_type} 에 {required_key} 가 없습니다.", required_key, fields)
+
+            if required_key == "BURGER":
+                toppings = get("TOPPINGS")
+                order = {
+                    "order_type": "set",
+                    "set_type": set_type,
+                    "quantity": quantity,
+                    "burger": _NUMBERS[item_id],
+                    "toppings": None if toppings is None else _parse_toppings(toppings.strip()),
+                    "drink": _NUMBERS[get("DRINK", DEFAULT_DRINK_ID)]
+                }
+                if set_type == "burger_set":
+                    order["side"] = _NUMBERS[get("SIDE", DEFAULT_SIDE_ID)]
+            else:
+                order = {
+                    "order_type": "set",
+                    "set_type": set_type,
+                    "quantity": quantity,
+                    "chicken": _NUMBERS[item_id],
+                    "sauce": _NUMBERS[get("SAUCE", DEFAULT_SAUCE_ID)]
+                }
+
+        elif order_type == "single":
+            # SINGLE_ITEM_KEYS 순서대로 검사 (루프 대신 풀어 씀 - 블록마다 도는 경로)
+            if "BURGER" in fields:
+                toppings = get("TOPPINGS")
+                order = {
+                    "order_type": "single",
+                    "item_type": "burger",
+                    "item_id": _NUMBERS[fields["BURGER"]],
+                    "quantity": quantity,
+                    "toppings": None if toppings is None else _parse_toppings(toppings.strip())
+                }
+            elif "CHICKEN" in fields:
+                order = {"order_type": "single", "item_type": "chicken", "item_id": _NUMBERS[fields["CHICKEN"]], "quantity": quantity}
+            elif "SIDE" in fields:
+                order = {"order_type": "single", "item_type": "side", "item_id": _NUMBERS[fields["SIDE"]], "quantity": quantity}
+            elif "DRINK" in fields:
+                order = {"order_type": "single", "item_type": "drink", "item_id": _NUMBERS[fields["DRINK"]], "quantity": quantity}
+            elif "SAUCE" in fields:
+                order = {"order_type": "single", "item_type": "sauce", "item_id": _NUMBERS[fields["SAUCE"]], "quantity": quantity}
+            else:
+                raise _parse_error(block_index, "missing_item", "단품 메뉴 항목(BURGER/CHICKEN/SIDE/DRINK/SAUCE)이 없습니다.", None, fields)
+
+        else:
+            raise _parse_error(block_index, "unknown_type", f"알 수 없는 TYPE: {order_type!r}", "TYPE", fields)
+    except ValueError as error:
+        if isinstance(error, OrderParseError):
+            raise
+        raise _invalid_number_error(block_index, fields)
+
+    if quantity < 1:
+        raise _parse_error(block_index, "invalid_quantity", f"QUANTITY 는 1 이상이어야 합니다: {quantity}", "QUANTITY", fields)
+    return order
+
+
+def _parse_error(block_index, code, message, key, fields):
+    """오류에 남기는 fields 는 사람이 읽도록 값의 공백을 정리"""
+    fields = {field_key: value.strip() for field_key, value in fields.items()}
+    return OrderParseError(block_index, code, message, key, fields)
+
+
+def _invalid_number_error(block_index, fields):
+    for key in NUMBER_KEYS:
+        value = fields.get(key)
+        if value is not None:
+            try:
+                int(value)
+            except ValueError:
+                return _parse_error(block_index, "invalid_number", f"{key} 값이 숫자가 아닙니다: {value.strip()!r}", key, fields)
+    return _parse_error(block_index, "invalid_number", "숫자 항목을 읽을 수 없습니다.", None, fields)
+
+
+def parse_order_blocks(response):
+    """응답 전체를 한 번에 파싱합니다. (orders, errors) 반환"""
+    parser = OrderBlockParser()
+    parser.feed(response)
+    parser.close()
+    return parser.orders, parser.errors
+
+
+def _tool_menu_id(catalog, value, kind, name):
+    """add_order 인자의 메뉴 ID 검증 (카탈로그가 있으면 메뉴가 있는지, 카테고리가 맞는지도 확인)"""
+    if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+        raise ValueError(f"{name} 가 올바르지 않습니다: {value!r}")
+    # 메뉴를 불러오지 못했으면 비교할 대상이 없으므로 형식만 확인
+    if catalog is None or not catalog.items:
+        return value
+    item = catalog.get(value)
+    if item is None:
+        raise ValueError(f"{name} {value} 는 메뉴에 없습니다.")
+    category = TOOL_MENU_CATEGORIES[kind]
+    if item["category"] != category:
+        raise ValueError(f"{name} {value}({item['name']}) 는 {category} 메뉴가 아닙니다 ({item['category']}).")
+    return value
+
+
+def _optional_tool_menu_id(catalog, arguments, key, kind, default):
+    """사이드/음료/소스 ID - 없으면(null) 기본 메뉴 (기본 메뉴도 카탈로그와 대조)"""
+    value = arguments.get(key)
+    if value is None:
+        return _tool_menu_id(catalog, default, kind, f"기본 {key}")
+    return _tool_menu_id(catalog, value, kind, key)
+
+
+def order_from_tool_arguments(arguments, catalog=None):
+    """
+    add_order 도구 인자(JSON)를 parse 결과와 같은 주문 dict 로 변환합니다.
+
+    - catalog(menu_catalog.MenuCatalog)가 있으면 메뉴/사이드/음료/소스/토핑 ID 가
+      메뉴에 있고 종류(카테고리)가 맞는지 확인
+    - 잘못된 인자는 ValueError (메시지는 모델에게 그대로 돌려줌)
+    """
+    order_type = arguments.get("order_type")
+    quantity = arguments.get("quantity")
+    if quantity is None:
+        quantity = 1
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+        raise ValueError(f"quantity 는 1 이상이어야 합니다: {quantity!r}")
+    toppings = arguments.get("toppings") or []
+    if not isinstance(toppings, list):
+        raise ValueError(f"toppings 는 메뉴ID 목록이어야 합니다: {toppings!r}")
+    toppings = [_tool_menu_id(catalog, topping, "topping", "toppings") for topping in toppings] or None
+
+    if order_type == "single":
+        item_type = arguments.get("item_type")
+        if item_type not in dict(SINGLE_ITEM_KEYS).values():
+            raise ValueError(f"단품 item_type 이 올바르지 않습니다: {item_type!r}")
+        menu_id = _tool_menu_id(catalog, arguments.get("menu_id"), item_type, "menu_id")
+        order = {"order_type": "single", "item_type": item_type, "item_id": menu_id, "quantity": quantity}
+        if item_type == "burger":
+            order["toppings"] = toppings
+        return order
+
+    required_key = SET_REQUIRED_KEYS.get(order_type)
+    if required_key is None:
+        raise ValueError(f"알 수 없는 order_type: {order_type!r}")
+    order = {"order_type": "set", "set_type": order_type, "quantity": quantity}
+    if required_key == "BURGER":
+        order["burger"] = _tool_menu_id(catalog, arguments.get("menu_id"), "burger", "menu_id")
+        order["toppings"] = toppings
+        order["drink"] = _optional_tool_menu_id(catalog, arguments, "drink_id", "drink", DEFAULT_DRINK_ID)
+        if order_type == "burger_set":
+            order["side"] = _optional_tool_menu_id(catalog, arguments, "side_id", "side", DEFAULT_SIDE_ID)
+    else:
+        order["chicken"] = _tool_menu_id(catalog, arguments.get("menu_id"), "chicken", "menu_id")
+        order["sauce"] = _optional_tool_menu_id(catalog, arguments, "sauce_id", "sauce", DEFAULT_SAUCE_ID)
+    return order
+
+
+def register_order(bot, order):
+    """파싱된 주문을 봇의 add_* 메서드로 등록하고, 등록된 주문(dict)을 반환합니다."""
+    quantity = order["quantity"]
+    if order["order_type"] == "single":
+        return bot.add_single_order(order["item_id"], order["item_type"], quantity, order.get("toppings"))
+
+    set_type = order["set_type"]
+    if set_type == "burger_set":
+        return bot.add_burger_set_order(order["burger"], order["side"], order["drink"], quantity, order["toppings"])
+    if set_type == "burger_combo":
+        return bot.add_burger_combo_order(order["burger"], order["drink"], quantity, order["toppings"])
+    if set_type == "chicken_full_pack":
+        return bot.add_chicken_full_pack_order(order["chicken"], order["sauce"], quantity)
+    return bot.add_chicken_half_pack_order(order["chicken"], order["sauce"], quantity)
+
+
+def register_orders(bot, parser):
+    """
+    파서를 마무리하고 모든 주문을 봇에 등록합니다. (등록된 주문 목록 반환)
+
+    파싱 오류는 출력하고 bot.last_order_errors 에 남깁니다.
+    """
+    parser.close()
+    bot.last_order_errors = parser.errors
+    for error in parser.errors:
+        print(f"주문 파싱 중 오류: {error}")
+    return [register_order(bot, order) for order in parser.orders]
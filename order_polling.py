@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# /orders/<session_id> 폴링 응답 (app.py, async_app.py 공용)
+# - ETag: 세션 주문 버전 → If-None-Match 가 같으면 304 (본문 없음)
+# - ?since=<버전>: 그 버전 이후 추가/삭제된 주문만 반환 (기록이 없는 오래된 버전이면 전체 응답)
+# - 응답 본문은 주문 버전마다 한 번만 직렬화 (OrderList.memo)
+import json
+
+EMPTY_ORDERS_BODY = json.dumps(
+    {"orders": "[]", "order_summary": "주문 내역이 없습니다.", "order_total": 0, "order_unpriced": 0}, ensure_ascii=False
+)
+
+# 브라우저가 캐시된 응답을 쓰기 전에 항상 ETag 로 확인하게 함
+ORDERS_CACHE_CONTROL = "no-cache"
+
+
+def orders_etag(bot):
+    """ETag 값 (따옴표 제외) - 주문 버전은 새 세션에서도 계속 증가하므로 세션 안에서 겹치지 않음"""
+    return f"orders-{bot.order_list.version}"
+
+
+def parse_since(value):
+    """?since= 값 (없거나 잘못된 값이면 None → 전체 응답)"""
+    try:
+        since = int(value)
+    except (TypeError, ValueError):
+        return None
+    return since if since >= 0 else None
+
+
+def order_total_fields(bot):
+    """order_total: 합계 금액, order_unpriced: 가격을 알 수 없어 합계에서 빠진 주문 수"""
+    total, unpriced = bot.get_order_total()
+    return {"order_total": total, "order_unpriced": unpriced}
+
+
+def orders_body(bot):
+    """전체 응답 본문: 주문 JSON + 주문 요약 + 합계 + 버전"""
+    order_list = bot.order_list
+    return order_list.memo("orders_body", lambda: json.dumps({
+        "version": order_list.version,
+        "full": True,
+        "orders": bot.get_orders_json(),
+        "order_summary": bot.get_order_summary(),
+        **order_total_fields(bot)
+    }, ensure_ascii=False))
+
+
+def orders_delta_body(bot, since):
+    """
+    since 버전 이후의 변경만 담은 응답 본문
+
+    - 변경 없음: {"version", "full": false, "changes": []}
+    - 변경 있음: changes 와 함께 새 주문 요약/합계도 포함
+    - since 가 너무 오래되었거나 다른 세션의 버전이면 orders_body() 와 같은 전체 응답
+    """
+    changes = bot.order_list.changes_since(since)
+    if changes is None:
+        return orders_body(bot)
+    body = {"version": bot.order_list.version, "full": False, "changes": changes}
+    if changes:
+        body["order_summary"] = bot.get_order_summary()
+        body.update(order_total_fields(bot))
+    return json.dumps(body, ensure_ascii=False)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+ORDER_COMPLETE_TAG = "[ORDER_COMPLETE]"
+
+
+class OrderTagSplitter:
+    """
+    스트리밍 응답에서 [ORDER_COMPLETE] 이전의 보이는 부분만 흘려보내는 상태 기계
+
+    - 태그의 앞부분일 수 있는 꼬리("[", "[ORD" 등)는 다음 조각이 올 때까지 보류
+    - 태그가 확인되면 그 뒤의 주문 정보는 클라이언트로 절대 내보내지 않음
+    - 결과는 기존 full_response.split("[ORDER_COMPLETE]")[0].strip() 과 동일
+    """
+
+    def __init__(self, tag=ORDER_COMPLETE_TAG):
+        self.tag = tag
+        self.closed = False
+        self._pending = ""
+        self._started = False
+
+    def feed(self, text: str) -> str:
+        """새로 도착한 조각을 넣고, 지금 바로 보여줘도 되는 텍스트를 반환합니다."""
+        if self.closed or not text:
+            return ""
+
+        self._pending += text
+
+        tag_index = self._pending.find(self.tag)
+        if tag_index != -1:
+            visible = self._pending[:tag_index].rstrip()
+            self._pending = ""
+            self.closed = True
+            return self._emit(visible)
+
+        # 태그 접두사일 수 있는 꼬리와, 그 앞의 공백은 보류 (strip 결과와 맞추기 위해)
+        safe_end = len(self._pending) - self._partial_tag_length(self._pending)
+        visible = self._pending[:safe_end].rstrip()
+        self._pending = self._pending[len(visible):]
+        return self._emit(visible)
+
+    def flush(self) -> str:
+        """스트림이 끝났을 때 보류 중이던 텍스트를 반환합니다."""
+        if self.closed:
+            return ""
+
+        visible = self._pending.rstrip()
+        self._pending = ""
+        self.closed = True
+        return self._emit(visible)
+
+    def _emit(self, text: str) -> str:
+        # 응답 앞쪽 공백은 strip 과 동일하게 버림
+        if not self._started:
+            text = text.lstrip()
+            if text:
+                self._started = True
+        return text
+
+    def _partial_tag_length(self, text: str) -> int:
+        """text 의 끝이 태그의 앞부분과 겹치는 최대 길이"""
+        for length in range(min(len(self.tag) - 1, len(text)), 0, -1):
+            if text.endswith(self.tag[:length]):
+                return length
+        return 0
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+# 분위수 계산 (nearest-rank) - metrics.py, load_test.py, batch_runner.py 공용
+
+
+def percentile_of_sorted(ordered, fraction):
+    """이미 정렬된 값 목록의 분위수 (비어 있으면 0.0)"""
+    if not ordered:
+        return 0.0
+    last = len(ordered) - 1
+    return ordered[min(last, int(round(fraction * last)))]
+
+
+def percentile(values, fraction):
+    """값 목록의 분위수 (fraction: 0.0 ~ 1.0)"""
+    return percentile_of_sorted(sorted(values), fraction)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import threading
+
+
+def usage_cache_info(usage):
+    """
+    응답 usage 에서 프롬프트 캐시 적중 정보를 꺼냅니다.
+
+    OpenAI 는 1024 토큰 이상이 앞부분부터 똑같은 요청에 대해 prompt_tokens_details.cached_tokens 를 돌려줍니다.
+    """
+    if usage is None:
+        return None
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = (getattr(details, "cached_tokens", None) or 0) if details else 0
+    return {
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "completion_tokens": getattr(usage, "completion_tokens", None) or 0,
+        "hit_rate": round(cached_tokens / prompt_tokens, 4) if prompt_tokens else 0.0
+    }
+
+
+class PromptCacheStats:
+    """프로세스 전체의 프롬프트 캐시 적중률 누적"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, usage):
+        """요청 하나의 usage 를 누적하고 그 요청의 적중 정보를 반환합니다."""
+        info = usage_cache_info(usage)
+        if info is None:
+            return None
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += info["prompt_tokens"]
+            self.cached_tokens += info["cached_tokens"]
+        return info
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "hit_rate": round(self.cached_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0
+            }
+
+
+prompt_cache_stats = PromptCacheStats()
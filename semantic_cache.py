@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from history_compactor import is_summary_message
+
+# 주문 진행 중인 답변("네", "톨이요")은 대화 맥락에 따라 달라지므로 메뉴/가격/추천 같은 질문만 캐시
+# 캐시는 모든 세션이 같이 쓰므로, 이전 대화가 있는 턴("그럼 총 얼마예요?")은 조회/저장하지 않음 (is_history_free)
+QUESTION_MARKERS = ("?", "얼마", "추천", "뭐", "무엇", "있나요", "있어요", "어떤", "어때", "알려")
+MIN_QUESTION_LENGTH = 4
+
+
+def is_cacheable_question(text):
+    text = text.strip()
+    return len(text) >= MIN_QUESTION_LENGTH and any(marker in text for marker in QUESTION_MARKERS)
+
+
+def is_history_free(conversation_history):
+    """
+    답변이 이전 대화에 좌우되지 않는 턴인지 (= 손님의 첫 질문인지)
+
+    system prompt 외에 user 메시지나 이전 대화 요약이 있으면 False
+    """
+    for message in conversation_history:
+        if message.get("role") == "user" or is_summary_message(message):
+            return False
+    return True
+
+
+def normalize_embedding(embedding):
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class _CacheEntry:
+    __slots__ = ("question", "answer", "menu_version", "created_at")
+
+    def __init__(self, question, answer, menu_version):
+        self.question = question
+        self.answer = answer
+        self.menu_version = menu_version
+        self.created_at = time.monotonic()
+
+
+class SemanticAnswerCache:
+    """
+    비슷한 질문에 대한 답변 캐시 (CafeBot 용)
+
+    - 질문 임베딩(정규화)끼리 코사인 유사도가 threshold 이상이면 저장된 답변을 재사용
+    - 메뉴 버전이 다르면 적중으로 보지 않음 (메뉴/가격이 바뀌면 자연스럽게 무효화)
+    - ttl 초가 지난 답변은 만료, max_entries 초과 시 가장 오래 사용하지 않은 답변부터 제거
+    """
+
+    def __init__(self, threshold=0.93, ttl=3600, max_entries=512):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._vectors = {}
+        self._matrix = None  # 저장된 임베딩 행렬 (lookup 때 필요하면 다시 만듦, 순서: _keys)
+        self._keys = []
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    def _rebuild_matrix(self):
+        self._keys = list(self._entries)
+        if self._keys:
+            self._matrix = np.stack([self._vectors[key] for key in self._keys])
+        else:
+            self._matrix = None
+
+    def _remove(self, key):
+        del self._entries[key]
+        del self._vectors[key]
+        self._matrix = None
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl]
+        for key in expired:
+            self._remove(key)
+
+    def lookup(self, question, embedding, menu_version):
+        """(답변, 유사도) 를 반환합니다. 적중하지 않으면 None."""
+        if not is_cacheable_question(question):
+            with self._lock:
+                self.skipped += 1
+            return None
+
+        vector = normalize_embedding(embedding)
+        with self._lock:
+            self._expire()
+            if self._matrix is None:
+                self._rebuild_matrix()
+            if self._matrix is not None:
+                similarities = self._matrix @ vector
+                # 유사도가 높은 순서대로 메뉴 버전이 같은 첫 답변을 찾음
+                for index in np.argsort(-similarities):
+                    similarity = float(similarities[index])
+                    if similarity < self.threshold:
+                        break
+                    key = self._keys[index]
+                    entry = self._entries[key]
+                    if entry.menu_version == menu_version:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return entry.answer, similarity
+            self.misses += 1
+            return None
+
+    def store(self, question, embedding, answer, menu_version):
+        if not is_cacheable_question(question) or not answer:
+            return
+        vector = normalize_embedding(embedding)
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = _CacheEntry(question, answer, menu_version)
+            self._vectors[key] = vector
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+            self._matrix = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+semantic_answer_cache = SemanticAnswerCache(
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.93")),
+    ttl=int(os.getenv("SEMANTIC_CACHE_TTL", "3600")),
+    max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512"))
+)
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import OrderedDict
+
+# 메시지 하나당 dict/문자열 객체 등 고정 오버헤드 (대략적인 값)
+MESSAGE_OVERHEAD_BYTES = 240
+ORDER_OVERHEAD_BYTES = 400
+
+
+def estimate_session_bytes(bot):
+    """
+    봇 인스턴스가 차지하는 메모리를 대략적으로 추정합니다.
+
+    첫 번째 system 메시지는 모든 세션이 공유하는 프롬프트이므로 제외합니다.
+    """
+    total = 0
+    history = getattr(bot, "conversation_history", [])
+    for index, message in enumerate(history):
+        if index == 0 and message.get("role") == "system":
+            continue
+        total += MESSAGE_OVERHEAD_BYTES + len(message.get("content") or "") * 2
+        for tool_call in message.get("tool_calls") or []:
+            total += MESSAGE_OVERHEAD_BYTES + len(tool_call["function"]["arguments"] or "")
+    total += len(getattr(bot, "order_list", [])) * ORDER_OVERHEAD_BYTES
+    return total
+
+
+def close_bot(session_id, bot):
+    """기본 제거 훅: 봇이 가진 자원 정리"""
+    close = getattr(bot, "close", None)
+    if close:
+        close()
+
+
+class _SessionEntry:
+    __slots__ = ("bot", "last_access", "size")
+
+    def __init__(self, bot, size):
+        self.bot = bot
+        self.last_access = time.monotonic()
+        self.size = size
+
+
+class SessionRegistry:
+    """
+    세션 ID별 봇 인스턴스 보관소
+
+    - LRU 순서 유지: 가장 오래 사용하지 않은 세션부터 제거
+    - idle_ttl 초 동안 요청이 없던 세션은 만료
+    - 세션 수(max_sessions)와 대략적인 메모리 총량(max_bytes) 상한
+    - 제거될 때 on_evict(session_id, bot) 훅으로 자원 정리
+    """
+
+    def __init__(self, max_sessions=1000, idle_ttl=1800, max_bytes=256 * 1024 * 1024,
+                 on_evict=close_bot, size_of=estimate_session_bytes):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.size_of = size_of
+        self._sessions = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id):
+        """세션의 봇을 반환합니다 (없으면 None). 사용 시각과 LRU 순서를 갱신합니다."""
+        with self._lock:
+            evicted = self._expire_idle()
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                self._stats["misses"] += 1
+            else:
+                self._stats["hits"] += 1
+                self._touch(session_id, entry)
+        self._run_evict_hooks(evicted)
+        return entry.bot if entry else None
+
+    def get_or_create(self, session_id, factory):
+        """세션의 봇을 반환하고, 없으면 factory() 로 만들어 등록합니다."""
+        bot = self.get(session_id)
+        if bot is not None:
+            return bot
+
+        # 봇 생성은 락 밖에서 (동시에 만들어졌다면 먼저 등록된 쪽을 사용)
+        new_bot = factory()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._touch(session_id, entry)
+                evicted = [(session_id, new_bot)]
+            else:
+                entry = self._insert(session_id, new_bot)
+                evicted = self._enforce_limits(keep=session_id)
+        self._run_evict_hooks(evicted)
+        return entry.bot
+
+    def put(self, session_id, bot):
+        """세션을 새 봇으로 교체합니다 (기존 봇은 제거 훅으로 정리)."""
+        with self._lock:
+            evicted = []
+            old = self._sessions.pop(session_id, None)
+            if old is not None:
+                self._total_bytes -= old.size
+                evicted.append((session_id, old.bot))
+            self._insert(session_id, bot)
+            evicted.extend(self._enforce_limits(keep=session_id))
+        self._run_evict_hooks(evicted)
+        return bot
+
+    def items(self):
+        """현재 세션의 (세션 ID, 봇) 목록 스냅샷 (사용 시각/LRU 순서는 바꾸지 않음)"""
+        with self._lock:
+            return [(session_id, entry.bot) for session_id, entry in self._sessions.items()]
+
+    def snapshot(self, view):
+        """
+        현재 세션의 (세션 ID, view(봇)) 목록 (사용 시각/LRU 순서는 바꾸지 않음)
+
+        view 는 락 안에서 호출되므로, 응답을 스트리밍하는 동안 봇이 바뀌어도
+        결과가 흔들리지 않도록 필요한 값을 복사해서 반환해야 합니다. (예: list(bot.order_list))
+        """
+        with self._lock:
+            return [(session_id, view(entry.bot)) for session_id, entry in self._sessions.items()]
+
+    def remove(self, session_id):
+        """세션을 제거합니다."""
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is not None:
+                self._total_bytes -= entry.size
+        if entry is not None:
+            self._run_evict_hooks([(session_id, entry.bot)])
+
+    def update_size(self, session_id):
+        """턴이 끝난 뒤 세션 크기를 다시 계산하고 용량 상한을 적용합니다."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return
+            size = self.size_of(entry.bot)
+            self._total_bytes += size - entry.size
+            entry.size = size
+            evicted = self._enforce_limits(keep=session_id)
+        self._run_evict_hooks(evicted)
+
+    def evict_expired(self):
+        """유휴 시간이 지난 세션을 정리합니다 (주기적 정리용)."""
+        with self._lock:
+            evicted = self._expire_idle()
+        self._run_evict_hooks(evicted)
+        return len(evicted)
+
+    def stats(self):
+        """hit/miss/eviction 통계와 현재 세션 수, 추정 메모리"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["sessions"] = len(self._sessions)
+            stats["approx_bytes"] = self._total_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["max_sessions"] = self.max_sessions
+        stats["max_bytes"] = self.max_bytes
+        stats["idle_ttl"] = self.idle_ttl
+        return stats
+
+    # 아래 메서드는 모두 self._lock 을 잡은 상태에서 호출
+    def _touch(self, session_id, entry):
+        entry.last_access = time.monotonic()
+        self._sessions.move_to_end(session_id)
+
+    def _insert(self, session_id, bot):
+        entry = _SessionEntry(bot, self.size_of(bot))
+        self._sessions[session_id] = entry
+        self._total_bytes += entry.size
+        return entry
+
+    def _expire_idle(self):
+        evicted = []
+        if not self.idle_ttl:
+            return evicted
+        deadline = time.monotonic() - self.idle_ttl
+        # LRU 순서이므로 앞에서부터 만료된 것만 확인하면 됨
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if entry.last_access > deadline:
+                break
+            self._sessions.popitem(last=False)
+            self._total_bytes -= entry.size
+            self._stats["expirations"] += 1
+            evicted.append((session_id, entry.bot))
+        return evicted
+
+    def _enforce_limits(self, keep):
+        evicted = []
+        while self._sessions and (
+            len(self._sessions) > self.max_sessions
+            or (self.max_bytes and self._total_bytes > self.max_bytes)
+        ):
+            session_id, entry = next(iter(self._sessions.items()))
+            if session_id == keep:
+                # 방금 사용한 세션 하나만 남았다면 제거하지 않음
+                break
+            self._sessions.popitem(last=False)
+            self._total_bytes -= entry.size
+            self._stats["evictions"] += 1
+            evicted.append((session_id, entry.bot))
+        return evicted
+
+    def _run_evict_hooks(self, evicted):
+        if not self.on_evict:
+            return
+        for session_id, bot in evicted:
+            try:
+                self.on_evict(session_id, bot)
+            except Exception as e:
+                print(f"❌ 세션 정리 실패 ({session_id}): {e}")
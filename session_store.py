@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+class SessionConflictError(Exception):
+    """다른 워커가 먼저 같은 세션을 저장해서 버전이 맞지 않을 때 발생"""
+
+    def __init__(self, session_id, expected_version, current_version):
+        super().__init__(
+            f"세션 {session_id} 버전 충돌 (예상: {expected_version}, 현재: {current_version})"
+        )
+        self.session_id = session_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+def encode_state(state):
+    """세션 상태를 압축된 JSON 바이트로 변환"""
+    payload = json.dumps(state, ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(payload.encode("utf-8"))
+
+
+def decode_state(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class SessionStore:
+    """
+    세션 상태(conversation_history, order_list) 저장소 인터페이스
+
+    - 버전은 저장할 때마다 1씩 증가 (없는 세션은 0)
+    - save() 는 expected_version 이 현재 버전과 같을 때만 성공 (낙관적 잠금)
+    """
+
+    def version(self, session_id):
+        """현재 저장된 버전 (없으면 0)"""
+        raise NotImplementedError
+
+    def load(self, session_id):
+        """(version, state) 를 반환합니다. 없으면 None."""
+        raise NotImplementedError
+
+    def save(self, session_id, state, expected_version):
+        """상태를 저장하고 새 버전을 반환합니다. 버전이 다르면 SessionConflictError."""
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+
+class InMemorySessionStore(SessionStore):
+    """프로세스 내부 저장소 (단일 워커용, 기본값)"""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def version(self, session_id):
+        entry = self._sessions.get(session_id)
+        return entry[0] if entry else 0
+
+    def load(self, session_id):
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        return entry[0], decode_state(entry[1])
+
+    def save(self, session_id, state, expected_version):
+        blob = encode_state(state)
+        with self._lock:
+            current_version = self.version(session_id)
+            if current_version != expected_version:
+                raise SessionConflictError(session_id, expected_version, current_version)
+            self._sessions[session_id] = (current_version + 1, blob)
+            return current_version + 1
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    로컬 SQLite 파일 저장소
+
+    같은 파일을 여러 워커 프로세스가 공유할 수 있어 gunicorn 멀티 워커나 재시작 후에도 세션이 유지됩니다.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+
+        db_directory = os.path.dirname(db_path)
+        if db_directory and not os.path.exists(db_directory):
+            os.makedirs(db_directory)
+
+        connection = self._connection()
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS chat_sessions (
+                session_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                state BLOB NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        connection.commit()
+
+    def _connection(self):
+        # sqlite3 연결은 스레드 간에 공유하지 않음
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def version(self, session_id):
+        row = self._connection().execute(
+            "SELECT version FROM chat_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def load(self, session_id):
+        row = self._connection().execute(
+            "SELECT version, state FROM chat_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], decode_state(row[1])
+
+    def save(self, session_id, state, expected_version):
+        blob = encode_state(state)
+        connection = self._connection()
+        new_version = expected_version + 1
+
+        with connection:
+            if expected_version == 0:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO chat_sessions (session_id, version, state, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (session_id, new_version, blob, time.time())
+                )
+            else:
+                cursor = connection.execute(
+                    "UPDATE chat_sessions SET version = ?, state = ?, updated_at = ? "
+                    "WHERE session_id = ? AND version = ?",
+                    (new_version, blob, time.time(), session_id, expected_version)
+                )
+
+        if cursor.rowcount != 1:
+            raise SessionConflictError(session_id, expected_version, self.version(session_id))
+        return new_version
+
+    def delete(self, session_id):
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+
+
+def restore_bot_state(store, session_id, bot):
+    """저장소에 더 새로운 상태가 있으면 봇에 불러옴 (다른 워커가 처리한 턴 반영)"""
+    if store.version(session_id) <= bot.state_version:
+        return False
+    stored = store.load(session_id)
+    if stored is None:
+        return False
+    bot.state_version, state = stored
+    bot.load_state(state)
+    return True
+
+
+def save_bot_state(store, session_id, bot):
+    """
+    턴이 끝난 뒤 봇 상태를 저장소에 저장
+
+    다른 워커가 먼저 저장했다면(버전 충돌) 이번 턴을 버리고 최신 상태를 다시 불러옴
+    """
+    try:
+        bot.state_version = store.save(session_id, bot.export_state(), bot.state_version)
+        return True
+    except SessionConflictError as e:
+        print(f"❌ {e} - 최신 상태를 다시 불러옵니다.")
+        restore_bot_state(store, session_id, bot)
+        return False
+
+
+def create_session_store():
+    """
+    환경 변수로 저장소를 선택합니다.
+
+    - SESSION_STORE=memory (기본값) | sqlite
+    - SESSION_STORE_PATH: sqlite 파일 경로 (기본값: data/sessions.db)
+    """
+    backend = os.getenv("SESSION_STORE", "memory").lower()
+    if backend == "sqlite":
+        db_path = os.getenv("SESSION_STORE_PATH") or os.path.join(os.path.dirname(__file__), "data", "sessions.db")
+        print(f"✅ SQLite 세션 저장소 사용 (경로: {db_path})")
+        return SQLiteSessionStore(db_path)
+    return InMemorySessionStore()
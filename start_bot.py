@@ -1,3 +1,4 @@
+import hashlib
 import os
 import uuid
 import sqlite3
@@ -6,7 +7,11 @@ from dotenv import load_dotenv
 from sentence_transformers import SentenceTransformer
 import chromadb
 import chromadb.utils.embedding_functions as embedding_functions
-from openai import OpenAI
+
+from history_compactor import HistoryCompactor
+from openai_client import get_openai_client
+from prompt_cache import prompt_cache_stats
+from semantic_cache import is_history_free, semantic_answer_cache
 
 # Disable ChromaDB telemetry
 os.environ["CHROMA_TELEMETRY"] = "false"
@@ -15,8 +20,11 @@ os.environ["CHROMA_TELEMETRY"] = "false"
 load_dotenv()
 
 class CafeBot:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    def __init__(self, client=None, answer_cache=None):
+        self.client = client or get_openai_client()
+        # 자주 묻는 질문 답변 캐시 (메뉴가 바뀌면 menu_version 이 달라져 이전 답변은 쓰지 않음)
+        self.answer_cache = answer_cache or semantic_answer_cache
+        self.menu_version = None
         self.embedder = SentenceTransformer('jhgan/ko-sroberta-multitask')
         self.chroma_client = chromadb.Client()
         self.collection_name = "juno-cafe"
@@ -28,6 +36,7 @@ class CafeBot:
             embedding_function=self.embedding_function
         )
         self.conversation_history = []
+        self.history_compactor = HistoryCompactor(self.client)
         self.clear_conversation_history()
 
     def clear_conversation_history(self):
@@ -61,6 +70,7 @@ class CafeBot:
             texts.append(text)
             metadatas.append({"id": menu_id, "size": menu_size, "price": menu_price})
             ids.append(str(uuid.uuid4()))
+        self.menu_version = hashlib.sha1("\n".join(texts).encode("utf-8")).hexdigest()[:12]
         # Remove existing vectors with same ids (if any)
         self.collection.delete(ids=ids)
         embeddings = self.embedder.encode(texts).tolist()
@@ -72,10 +82,11 @@ class CafeBot:
         )
         conn.close()
 
-    def retrieve_relevant_context(self, query, n_results=10):
-        query_embedding = self.embedder.encode([query]).tolist()
+    def retrieve_relevant_context(self, query, n_results=10, query_embedding=None):
+        if query_embedding is None:
+            query_embedding = self.embedder.encode([query])[0]
         results = self.collection.query(
-            query_embeddings=query_embedding,
+            query_embeddings=[query_embedding.tolist()],
             n_results=n_results,
             include=["metadatas", "documents", "distances"]
         )
@@ -93,12 +104,27 @@ class CafeBot:
         return filtered_docs, filtered_metas
 
     def chat_with_gpt(self, user_input):
-        context_texts, context_metadatas = self.retrieve_relevant_context(user_input)
+        # 질문 임베딩은 한 번만 계산해서 답변 캐시와 메뉴 검색에 같이 사용
+        query_embedding = self.embedder.encode([user_input])[0]
+        # 답변 캐시는 세션끼리 공유하므로 이전 대화가 없는 첫 질문만 조회/저장 (다른 손님의 주문 합계 등을 돌려주지 않도록)
+        use_answer_cache = is_history_free(self.conversation_history)
+        cached = None
+        if use_answer_cache:
+            cached = self.answer_cache.lookup(user_input, query_embedding, self.menu_version)
+        if cached is not None:
+            gpt_response, similarity = cached
+            print(f"🔁 답변 캐시 적중 (유사도 {similarity:.3f})")
+            self.conversation_history.append({"role": "user", "content": user_input})
+            self.conversation_history.append({"role": "assistant", "content": gpt_response})
+            return gpt_response
+
+        context_texts, context_metadatas = self.retrieve_relevant_context(user_input, query_embedding=query_embedding)
         context = "\n".join(
             [f"[{meta['id']}]: {text} (가격: {meta['price']}원)"
              for text, meta in zip(context_texts, context_metadatas)]
         )
         prompt = f"컨텍스트: {context}\n질문: {user_input}"
+        self.history_compactor.apply(self.conversation_history)
         self.conversation_history.append({"role": "user", "content": prompt})
         response = self.client.chat.completions.create(
             model="gpt-4.1-mini",
@@ -106,8 +132,12 @@ class CafeBot:
             max_tokens=150,
             temperature=0.7
         )
+        prompt_cache_stats.record(response.usage)
         gpt_response = response.choices[0].message.content.strip()
         self.conversation_history.append({"role": "assistant", "content": gpt_response})
+        if use_answer_cache:
+            self.answer_cache.store(user_input, query_embedding, gpt_response, self.menu_version)
+        self.history_compactor.schedule(self.conversation_history)
         return gpt_response
 
 def main():
@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+# 부하 테스트용 OpenAI 호환 chat.completions 스텁 서버 (실제 토큰을 쓰지 않음)
+# - 첫 토큰 지연(TTFT), 초당 토큰 수, tool 호출, [ORDER_COMPLETE] 주문 블록 비율을 옵션으로 조절
+# - 실행: python stub_openai_server.py --port 8001 --ttft 0.3 --tps 40
+# - 앱 연결: OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=stub python app.py
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLIES = [
+    "네, 말씀하신 메뉴로 준비해 드릴게요. 음료나 사이드 변경이 필요하시면 말씀해 주세요.",
+    "버거하우스의 인기 메뉴는 한우불고기버거와 새우버거입니다. 어떤 메뉴로 드릴까요?",
+    "세트로 주문하시면 후렌치 후라이와 콜라가 함께 제공됩니다. 세트로 하시겠어요?",
+    "토핑 추가도 가능합니다. 치즈나 베이컨을 추가해 드릴까요?",
+]
+
+# 메뉴ID 는 burger.sql 기준 (60 포테이토 미디움, 61 포테이토 라지, 75 펩시 콜라 (미디움), 77 펩시 콜라 (라지))
+ORDER_BLOCKS = [
+    "[ORDER_COMPLETE]\nTYPE: set\nSET_TYPE: burger_set\nBURGER: {burger}\nSIDE: 60\nDRINK: 75\nQUANTITY: {quantity}",
+    "[ORDER_COMPLETE]\nTYPE: set\nSET_TYPE: burger_combo\nBURGER: {burger}\nDRINK: 75\nQUANTITY: {quantity}",
+    "[ORDER_COMPLETE]\nTYPE: single\nDRINK: 75\nQUANTITY: {quantity}",
+]
+
+# add_order 도구 모드(BurgerBotV2)에서 보내는 주문 인자 - 봇이 카탈로그와 대조하므로 실제 사이드/음료 ID 를 사용
+ADD_ORDER_ARGUMENTS = [
+    {"order_type": "burger_set", "menu_id": 2, "item_type": None, "side_id": 61, "drink_id": 77, "sauce_id": None, "toppings": [], "quantity": 1},
+    {"order_type": "burger_combo", "menu_id": 3, "item_type": None, "side_id": None, "drink_id": None, "sauce_id": None, "toppings": [], "quantity": 2},
+    {"order_type": "single", "menu_id": 75, "item_type": "drink", "side_id": None, "drink_id": None, "sauce_id": None, "toppings": [], "quantity": 1},
+]
+
+TOOL_QUERIES = ["불고기", "새우", "치킨", "콜라", "감자"]
+
+# 스트리밍 시 한 조각(토큰)으로 보낼 글자 수 - 한글은 대략 1~2글자가 1토큰
+CHARS_PER_TOKEN = 2
+
+
+class StubSettings:
+    def __init__(self, ttft=0.3, tokens_per_second=40.0, tool_rate=0.3, order_rate=0.3, jitter=0.2, seed=None):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.tool_rate = tool_rate
+        self.order_rate = order_rate
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def roll(self):
+        with self.lock:
+            return self.random.random()
+
+    def choice(self, items):
+        with self.lock:
+            return self.random.choice(items)
+
+    def delay(self, seconds):
+        """jitter 비율만큼 흔들린 지연"""
+        if seconds <= 0:
+            return 0.0
+        return max(0.0, seconds * (1 + (self.roll() * 2 - 1) * self.jitter))
+
+
+def estimate_prompt_tokens(messages):
+    total = 0
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+        total += 4 + len(content.encode("utf-8")) // 3
+    return total
+
+
+def split_tokens(text):
+    return [text[index:index + CHARS_PER_TOKEN] for index in range(0, len(text), CHARS_PER_TOKEN)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive 지원 (공유 클라이언트 연결 재사용 확인용)
+    settings = StubSettings()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json({"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        else:
+            self._send_json({"error": {"message": "not found"}}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json({"error": {"message": "invalid json"}}, status=400)
+            return
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json({"error": {"message": "not found"}}, status=404)
+            return
+
+        settings = self.settings
+        with settings.lock:
+            settings.requests += 1
+        model = body.get("model", "stub")
+        messages = body.get("messages") or []
+        content, tool_calls = self._plan_reply(body, messages)
+        usage = self._usage(messages, content, tool_calls)
+
+        if body.get("stream"):
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            self._stream(model, content, tool_calls, usage if include_usage else None)
+        else:
+            message = {"role": "assistant", "content": content or None}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            self._send_json({
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if tool_calls else "stop"
+                }],
+                "usage": usage
+            }, delay=settings.delay(settings.ttft) + self._generation_seconds(content))
+
+    def _plan_reply(self, body, messages):
+        """tool 호출 / 일반 답변 / 주문(블록 또는 add_order) 포함 답변 중 하나를 정합니다."""
+        settings = self.settings
+        can_call_tool = (
+            body.get("tools")
+            and body.get("tool_choice") != "none"
+            and not (messages and messages[-1].get("role") == "tool")
+        )
+        if can_call_tool and settings.roll() < settings.tool_rate:
+            arguments = json.dumps({"action": "search", "query": settings.choice(TOOL_QUERIES)}, ensure_ascii=False)
+            return "", [{
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "function",
+                "function": {"name": "get_menu_info", "arguments": arguments}
+            }]
+
+        content = settings.choice(REPLIES)
+        tool_names = {tool.get("function", {}).get("name") for tool in body.get("tools") or []}
+        if "add_order" in tool_names and body.get("tool_choice") != "none":
+            # add_order 도구가 있으면 [ORDER_COMPLETE] 블록 대신 안내 문장 + add_order 호출로 답함
+            if settings.roll() < settings.order_rate:
+                arguments = json.dumps(settings.choice(ADD_ORDER_ARGUMENTS), ensure_ascii=False)
+                return "감사합니다. 주문 완료되었습니다.", [{
+                    "id": f"call_{uuid.uuid4().hex[:24]}",
+                    "type": "function",
+                    "function": {"name": "add_order", "arguments": arguments}
+                }]
+            return content, None
+        if settings.roll() < settings.order_rate:
+            block = settings.choice(ORDER_BLOCKS).format(
+                burger=settings.choice([1, 2, 3, 4, 5]),
+                quantity=settings.choice([1, 1, 2])
+            )
+            content = f"주문 확인했습니다. {content}\n\n{block}"
+        return content, None
+
+    def _usage(self, messages, content, tool_calls):
+        prompt_tokens = estimate_prompt_tokens(messages)
+        completion_tokens = len(split_tokens(content)) if content else 0
+        if tool_calls:
+            completion_tokens += sum(len(call["function"]["arguments"]) // 3 + 5 for call in tool_calls)
+        # 1024 토큰 이상이면 128 토큰 단위로 앞부분이 캐시된 것처럼 보고 (실제 API 와 같은 규칙)
+        cached_tokens = (prompt_tokens // 128) * 128 if prompt_tokens >= 1024 else 0
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens}
+        }
+
+    def _generation_seconds(self, content):
+        if not content or self.settings.tokens_per_second <= 0:
+            return 0.0
+        return len(split_tokens(content)) / self.settings.tokens_per_second
+
+    def _stream(self, model, content, tool_calls, usage):
+        settings = self.settings
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        def chunk(delta, finish_reason=None, chunk_usage=None, choices=True):
+            payload = {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if choices else [],
+            }
+            if chunk_usage is not None:
+                payload["usage"] = chunk_usage
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            time.sleep(settings.delay(settings.ttft))
+            self._write_chunk(chunk({"role": "assistant", "content": ""}))
+
+            interval = 1.0 / settings.tokens_per_second if settings.tokens_per_second > 0 else 0.0
+            if content:
+                for piece in split_tokens(content):
+                    if interval:
+                        time.sleep(settings.delay(interval))
+                    self._write_chunk(chunk({"content": piece}))
+
+            for index, call in enumerate(tool_calls or []):
+                self._write_chunk(chunk({"tool_calls": [{
+                    "index": index,
+                    "id": call["id"],
+                    "type": "function",
+                    "function": {"name": call["function"]["name"], "arguments": ""}
+                }]}))
+                arguments = call["function"]["arguments"]
+                for start in range(0, len(arguments), 8):
+                    self._write_chunk(chunk({"tool_calls": [{
+                        "index": index,
+                        "function": {"arguments": arguments[start:start + 8]}
+                    }]}))
+
+            self._write_chunk(chunk({}, finish_reason="tool_calls" if tool_calls else "stop"))
+            if usage is not None:
+                self._write_chunk(chunk(None, chunk_usage=usage, choices=False))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _write_chunk(self, data):
+        # HTTP/1.1 chunked encoding (빈 데이터는 종료 청크)
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, payload, status=200, delay=0.0):
+        if delay:
+            time.sleep(delay)
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def create_stub_server(host="127.0.0.1", port=8001, settings=None):
+    """스텁 서버를 만듭니다. serve_forever() 로 실행하세요 (테스트에서는 스레드로 실행)."""
+    StubHandler.settings = settings or StubSettings()
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 호환 chat.completions 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--ttft", type=float, default=0.3, help="첫 토큰까지 지연(초)")
+    parser.add_argument("--tps", type=float, default=40.0, help="초당 생성 토큰 수 (0이면 지연 없음)")
+    parser.add_argument("--tool-rate", type=float, default=0.3, help="tools 가 있는 요청에서 tool 호출로 답할 확률")
+    parser.add_argument("--order-rate", type=float, default=0.3, help="답변에 [ORDER_COMPLETE] 블록을 붙일 확률")
+    parser.add_argument("--jitter", type=float, default=0.2, help="지연 흔들림 비율 (0.2 = ±20%%)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = StubSettings(
+        ttft=args.ttft,
+        tokens_per_second=args.tps,
+        tool_rate=args.tool_rate,
+        order_rate=args.order_rate,
+        jitter=args.jitter,
+        seed=args.seed
+    )
+    server = create_stub_server(args.host, args.port, settings)
+    print(f"✅ OpenAI 스텁 서버 실행: http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("스텁 서버를 종료합니다.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
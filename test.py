@@ -1,12 +1,11 @@
-from openai import OpenAI
-import os
 from dotenv import load_dotenv
+from openai_client import get_openai_client
 
 load_dotenv()
 
 class SimpleChatBot:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    def __init__(self, client=None):
+        self.client = client or get_openai_client()
         self.conversation_history = []
         
     def chat(self, user_input):